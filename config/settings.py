@@ -49,11 +49,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # วัดทั้ง request (รวม middleware อื่น) -> ไว้บนสุด
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.querylog.QueryLogMiddleware',
+    'core.profiling.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -101,6 +105,68 @@ DATABASES = {
 }
 
 
+# Cache (ใช้ร่วมกันทุก worker ถ้าตั้งเป็น redis/memcached เช่น
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache CACHE_LOCATION=redis://127.0.0.1:6379/1)
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+# cache ข้าม request (group ของ user ฯลฯ) เปิดเฉพาะ backend ที่ทุก process เห็นร่วมกัน
+# LocMem แยกต่อ worker: ลบ cache ใน worker หนึ่งไม่ถึง worker อื่น -> resolve ใหม่ทุก request แทน
+# (unread badge เก็บใน LocMem แค่ไม่กี่วินาที) การลด query ของ nav จึงได้ผลเต็มที่เมื่อใช้ Redis/memcached
+SHARED_CACHE = CACHES["default"]["BACKEND"] not in {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+# Outbox: notification + webhook ถูกส่งโดย `manage.py run_outbox` หลัง commit
+# OUTBOX_WEBHOOK_URLS = รายการ URL คั่นด้วย comma ที่จะได้รับ POST (JSON) ทุก event
+OUTBOX_WEBHOOK_URLS = [u.strip() for u in os.getenv("OUTBOX_WEBHOOK_URLS", "").split(",") if u.strip()]
+OUTBOX_WEBHOOK_TIMEOUT = float(os.getenv("OUTBOX_WEBHOOK_TIMEOUT", "5"))
+# event ของ object เดียวกันที่เกิดภายในกี่วินาทีจะถูกรวมเป็นอันเดียว
+OUTBOX_COALESCE_SECONDS = float(os.getenv("OUTBOX_COALESCE_SECONDS", "2"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+# OUTBOX_INLINE=1 ส่งทันทีหลัง commit ไม่ต้องรัน worker (สำหรับ dev)
+OUTBOX_INLINE = os.getenv("OUTBOX_INLINE", "0") == "1"
+
+
+# Pagination: ผลลัพธ์ที่ planner ประมาณว่าเกินเท่านี้แถวจะแสดง "about N" แทน COUNT(*) จริง (PostgreSQL)
+PAGINATION_ESTIMATE_THRESHOLD = int(os.getenv("PAGINATION_ESTIMATE_THRESHOLD", "10000"))
+# COUNT(*) จริงของผลลัพธ์ใหญ่ ๆ เก็บใน cache กี่วินาที
+PAGINATION_COUNT_CACHE_SECONDS = int(os.getenv("PAGINATION_COUNT_CACHE_SECONDS", "30"))
+
+
+# Import ผ่านหน้าเว็บทำใน request: ไฟล์ที่เกินเท่านี้แถวถูกปฏิเสธก่อนเขียน (ไม่ให้ชน timeout ของ gunicorn
+# แล้วค้างครึ่งทาง) ไฟล์ใหญ่กว่านี้ใช้ `manage.py import_tickets` บน server
+IMPORT_WEB_MAX_ROWS = int(os.getenv("IMPORT_WEB_MAX_ROWS", "10000"))
+
+
+# Metrics (/metrics): ว่าง = รวมเฉพาะใน process; หลาย worker ให้ชี้ไปโฟลเดอร์เดียวกัน
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+# scraper ส่ง Authorization: Bearer <token> แทนการ login เป็น ADMIN
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+
+# Query log (core/querylog.py): log query ช้า + query รูปเดียวกันซ้ำเกิน N ครั้งต่อ request (N+1)
+QUERYLOG_ENABLED = os.getenv("QUERYLOG_ENABLED", "1") == "1"
+QUERYLOG_SLOW_MS = float(os.getenv("QUERYLOG_SLOW_MS", "200"))
+QUERYLOG_REPEAT_THRESHOLD = int(os.getenv("QUERYLOG_REPEAT_THRESHOLD", "10"))
+# path ของไฟล์ JSON lines (ว่าง = ไม่เขียน)
+QUERYLOG_JSONL = os.getenv("QUERYLOG_JSONL", "")
+
+
+# Profiler (core/profiling.py): ว่าง = ปิด; ไฟล์ .pstats อยู่ที่ PROFILE_DIR/<view>/
+PROFILE_DIR = os.getenv("PROFILE_DIR", "")
+# สัดส่วน request ที่สุ่มมา profile (0.01 = 1%); 0 = เฉพาะที่ขอด้วย header X-Profile: 1
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# เก็บไฟล์ล่าสุดไม่เกินเท่านี้ (ทุก view รวมกัน)
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "500"))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -3,8 +3,9 @@ from .models import (
     Department, Location, Vendor, AssetCategory, Asset,
     Part, PartStockMovement,
     Ticket, TicketAttachment, TicketComment,
-    AuditLog,
+    AuditLog, ExportJob, OutboxEvent,
 )
+from .pagination import EstimatedCountPaginator
 
 
 @admin.register(Department)
@@ -77,3 +78,23 @@ class AuditLogAdmin(admin.ModelAdmin):
     list_display = ["action", "object_type", "object_id", "created_by", "created_at"]
     list_filter = ["action", "object_type", "created_at"]
     search_fields = ["action", "object_type", "object_id", "summary", "created_by__username"]
+    list_select_related = ["created_by"]
+    # ตรงกับ audit_created_idx; ไม่ต้อง COUNT(*) ทั้งตารางซ้ำอีกรอบตอน filter/search
+    ordering = ["-created_at", "-id"]
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ["id", "kind", "status", "since", "row_count", "requested_by", "created_at", "finished_at"]
+    list_filter = ["kind", "status"]
+    readonly_fields = ["fingerprint", "data_version", "cutoff_at", "file", "row_count", "error", "attempts", "heartbeat_at"]
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ["id", "topic", "key", "status", "attempts", "created_at", "processed_at"]
+    list_filter = ["topic", "status"]
+    search_fields = ["key"]
+    readonly_fields = ["payload", "notified_at", "last_error"]
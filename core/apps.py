@@ -8,3 +8,7 @@ class CoreConfig(AppConfig):
         from . import signals_asset  # noqa
         from . import signals_notifications  # noqa
         from . import signals_stock  # noqa
+        from . import signals_permissions  # noqa
+        from . import signals_kpi  # noqa
+        from . import signals_search  # noqa
+        from . import signals_exports  # noqa
@@ -0,0 +1,104 @@
+"""
+Helpers ที่ใช้ร่วมกันใน management command ตระกูล bench_*
+benchmark ทุกตัวรันบน test database แยก ไม่แตะข้อมูลจริง
+"""
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.db import close_old_connections, connection
+
+
+@contextmanager
+def bench_database(keepdb: bool = False, verbosity: int = 0):
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity, keepdb=keepdb)
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(samples_ms) -> dict:
+    return {
+        "n": len(samples_ms),
+        "mean_ms": round(statistics.fmean(samples_ms), 3) if samples_ms else 0.0,
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "max_ms": round(max(samples_ms), 3) if samples_ms else 0.0,
+    }
+
+
+def regressions(baseline: dict, current: dict, tolerance: float, min_delta_ms: float = 0.0) -> list[str]:
+    """
+    เทียบผล {label: {"p50_ms", "p95_ms", "queries"}} กับ baseline
+    ช้าลง = p50 เกิน baseline × (1 + tolerance) และมากกว่า min_delta_ms (กัน noise ของ view ที่เร็วมาก);
+    จำนวน query เพิ่มแม้แต่ query เดียวก็นับ
+    """
+    failed = []
+    for label, now in current.items():
+        base = baseline.get(label)
+        if base is None:
+            continue
+        if now["p50_ms"] > base["p50_ms"] * (1 + tolerance) and now["p50_ms"] - base["p50_ms"] > min_delta_ms:
+            failed.append(f"{label}: p50 {base['p50_ms']:.1f}ms -> {now['p50_ms']:.1f}ms")
+        if now.get("queries", 0) > base.get("queries", 0):
+            failed.append(f"{label}: queries {base['queries']} -> {now['queries']}")
+    return failed
+
+
+def run_threads(fn, items, workers: int):
+    """เรียก fn(item) ขนานกัน คืน (results, elapsed_seconds); ปิด connection ของแต่ละ thread ให้เอง"""
+    def call(item):
+        try:
+            return fn(item)
+        finally:
+            close_old_connections()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(call, items))
+    return results, time.perf_counter() - started
+
+
+@contextmanager
+def webhook_sink(delay_ms: float = 0, status: int = 204):
+    """
+    HTTP server จำลองปลายทาง webhook บน 127.0.0.1 (port สุ่ม)
+    yield (url, received) โดย received เป็น list ของ JSON body ที่ได้รับ
+    """
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if delay_ms:
+                time.sleep(delay_ms / 1000)
+            received.append(json.loads(body or b"{}"))
+            self.send_response(status)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/hook", received
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,203 @@
+import gzip
+import hashlib
+import os
+from datetime import datetime, time, timedelta
+from pathlib import Path
+from time import monotonic
+
+from django.conf import settings
+from django.db.models import F, Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .exports import EXPORTS, iter_csv
+from .models import (
+    Asset, ExportJob, ExportVersion, Notification, Part, PartStockBalance, PartStockMovement, Ticket,
+)
+from .notify import notify_users
+
+EXPORT_DIR = "exports"
+# worker ต่ออายุ lease ทุกกี่วินาทีระหว่างเขียนไฟล์ (ต้องน้อยกว่า --stale-after มาก ๆ)
+HEARTBEAT_SECONDS = 30
+
+
+class LeaseLost(Exception):
+    """job ถูก requeue / claim ซ้ำระหว่างที่ worker นี้ยังเขียนไฟล์อยู่"""
+
+
+def data_version(kind: str) -> str:
+    """
+    ค่าที่เปลี่ยนทุกครั้งที่ข้อมูลของ export นั้นเปลี่ยน: insert/update ดูจาก Max(updated_at) / Max(id)
+    (อ่านจาก index ไม่ COUNT ทั้งตาราง) ส่วนการลบและชื่อในตารางที่ join ไปดูจาก ExportVersion.stamp
+    """
+    if kind == ExportJob.Kind.ASSETS:
+        agg = Asset.objects.aggregate(ts=Max("updated_at"))
+    elif kind == ExportJob.Kind.TICKETS:
+        agg = Ticket.objects.aggregate(ts=Max("updated_at"))
+    elif kind == ExportJob.Kind.PARTS:
+        agg = Part.objects.aggregate(ts=Max("updated_at"))
+        agg["stock_ts"] = PartStockBalance.objects.aggregate(ts=Max("updated_at"))["ts"]
+    else:
+        agg = PartStockMovement.objects.aggregate(mx=Max("id"))
+    agg["stamp"] = ExportVersion.objects.filter(kind=kind).values_list("stamp", flat=True).first() or 0
+    return "|".join(f"{k}={v.isoformat() if hasattr(v, 'isoformat') else v}" for k, v in sorted(agg.items()))
+
+
+def bump_export_versions(kinds):
+    """ทำให้ artifact เดิมของ export เหล่านี้ใช้ไม่ได้ (เรียกจาก signals_exports)"""
+    kinds = sorted(set(kinds))
+    if not kinds:
+        return
+    ExportVersion.objects.bulk_create([ExportVersion(kind=k) for k in kinds], ignore_conflicts=True)
+    ExportVersion.objects.filter(kind__in=kinds).update(stamp=F("stamp") + 1)
+
+
+def fingerprint(kind: str, since, version: str) -> str:
+    raw = f"{kind}|{since.isoformat() if since else ''}|{version}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def resolve_since(kind: str, user, raw: str):
+    """
+    raw = "" -> full export, "last" -> ต่อจาก export ล่าสุดของ user คนนี้,
+    หรือวันที่/เวลาแบบ ISO
+    """
+    raw = (raw or "").strip()
+    if not raw:
+        return None
+    if raw == "last":
+        last = (
+            ExportJob.objects.filter(kind=kind, requested_by=user, status=ExportJob.Status.DONE)
+            .order_by("-cutoff_at")
+            .values_list("cutoff_at", flat=True)
+            .first()
+        )
+        return last
+    dt = parse_datetime(raw)
+    if dt is None:
+        d = parse_date(raw)
+        if d is None:
+            raise ValueError(f"Invalid since value: {raw}")
+        dt = datetime.combine(d, time.min)
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+def request_export(kind: str, user, since=None) -> ExportJob:
+    """คืน job ที่มี fingerprint เดียวกัน (cache/กำลังรัน) หรือสร้าง job ใหม่เข้าคิว"""
+    version = data_version(kind)
+    fp = fingerprint(kind, since, version)
+
+    job = ExportJob.objects.filter(fingerprint=fp).exclude(status=ExportJob.Status.FAILED).first()
+    if job and (job.is_pending() or artifact_exists(job)):
+        return job
+
+    return ExportJob.objects.create(
+        kind=kind, requested_by=user, since=since, fingerprint=fp, data_version=version,
+    )
+
+
+def artifact_path(job: ExportJob) -> Path:
+    return Path(settings.MEDIA_ROOT) / job.file.name
+
+
+def artifact_exists(job: ExportJob) -> bool:
+    return bool(job.file) and artifact_path(job).exists()
+
+
+def download_name(job: ExportJob) -> str:
+    suffix = f"_since_{job.since:%Y%m%d%H%M}" if job.since else ""
+    return f"{job.kind}_{job.cutoff_at:%Y-%m-%d}{suffix}.csv.gz"
+
+
+# -----------------------
+# Worker side
+# -----------------------
+def claim_next_job():
+    """หยิบ job QUEUED ที่เก่าที่สุด (conditional update กันหลาย worker หยิบซ้ำ)"""
+    for job in ExportJob.objects.filter(status=ExportJob.Status.QUEUED).order_by("created_at")[:10]:
+        now = timezone.now()
+        claimed = ExportJob.objects.filter(pk=job.pk, status=ExportJob.Status.QUEUED).update(
+            status=ExportJob.Status.RUNNING, started_at=now, heartbeat_at=now, attempts=F("attempts") + 1
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def renew_lease(job: ExportJob) -> bool:
+    """False = job ไม่ใช่ของ attempt นี้แล้ว (ถูก requeue ไปแล้ว)"""
+    return bool(
+        ExportJob.objects.filter(pk=job.pk, status=ExportJob.Status.RUNNING, attempts=job.attempts)
+        .update(heartbeat_at=timezone.now())
+    )
+
+
+def requeue_stale_jobs(older_than: timedelta) -> int:
+    """job RUNNING ที่ heartbeat ขาดเกิน older_than (worker ตายกลางทาง) ให้กลับเข้าคิวรันใหม่"""
+    limit = timezone.now() - older_than
+    return ExportJob.objects.filter(
+        Q(heartbeat_at__lt=limit) | Q(heartbeat_at__isnull=True, started_at__lt=limit),
+        status=ExportJob.Status.RUNNING,
+    ).update(status=ExportJob.Status.QUEUED, started_at=None, heartbeat_at=None)
+
+
+def run_job(job: ExportJob) -> ExportJob:
+    header, rows = EXPORTS[job.kind]
+    cutoff_at = timezone.now()
+    rel_name = f"{EXPORT_DIR}/{job.kind}_{job.pk}.csv.gz"
+    path = Path(settings.MEDIA_ROOT) / rel_name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # ชื่อ tmp ต่อ attempt: worker เก่าที่ยังไม่รู้ตัวว่าหมด lease จะไม่เขียนทับไฟล์ของ worker ใหม่
+    tmp = path.with_name(f"{path.name}.{job.attempts}.tmp")
+
+    row_count = 0
+    beat = monotonic()
+
+    def counted(it):
+        nonlocal row_count, beat
+        for row in it:
+            row_count += 1
+            if monotonic() - beat >= HEARTBEAT_SECONDS:
+                if not renew_lease(job):
+                    raise LeaseLost(f"job {job.pk} was requeued")
+                beat = monotonic()
+            yield row
+
+    try:
+        with gzip.open(tmp, "wt", encoding="utf-8", newline="") as fh:
+            for chunk in iter_csv(header, counted(rows(since=job.since))):
+                fh.write(chunk)
+        if not renew_lease(job):
+            raise LeaseLost(f"job {job.pk} was requeued")
+        os.replace(tmp, path)
+    except LeaseLost:
+        # job เป็นของ attempt ใหม่แล้ว: ทิ้งไฟล์ตัวเองแต่ไม่แตะสถานะ
+        tmp.unlink(missing_ok=True)
+        raise
+    except Exception as e:
+        tmp.unlink(missing_ok=True)
+        job.status = ExportJob.Status.FAILED
+        job.error = str(e)[:2000]
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at"])
+        raise
+
+    job.status = ExportJob.Status.DONE
+    job.file.name = rel_name
+    job.cutoff_at = cutoff_at
+    job.row_count = row_count
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "file", "cutoff_at", "row_count", "finished_at"])
+
+    if job.requested_by_id and job.requested_by.is_active:
+        notify_users(
+            [job.requested_by],
+            Notification.Type.EXPORT_READY,
+            title=f"Export ready: {job.get_kind_display()}",
+            message=f"{row_count} rows",
+            url=f"/exports/{job.pk}/",
+        )
+    return job
@@ -0,0 +1,69 @@
+from django.contrib import messages
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import redirect
+from django.views import View
+from django.views.generic import DetailView
+
+from .export_jobs import artifact_exists, artifact_path, download_name, request_export, resolve_since
+from .models import ExportJob
+from .permissions import GroupRequiredMixin
+
+
+class ExportRequestView(LoginRequiredMixin, GroupRequiredMixin, View):
+    """
+    /export/<kind>.csv: เข้าคิว ExportJob (หรือใช้ไฟล์เดิมถ้าข้อมูลไม่เปลี่ยน)
+    ?since=last สำหรับ delta ต่อจาก export ครั้งก่อน หรือ ?since=YYYY-MM-DD
+    """
+    required_groups = ["ADMIN", "IT", "MANAGER"]
+    kind = None
+
+    def get(self, request, *args, **kwargs):
+        try:
+            since = resolve_since(self.kind, request.user, request.GET.get("since", ""))
+        except ValueError as e:
+            messages.error(request, str(e))
+            return redirect("core:dashboard")
+
+        job = request_export(self.kind, request.user, since=since)
+        if job.status == ExportJob.Status.DONE:
+            return redirect("core:export_job_download", pk=job.pk)
+
+        messages.info(request, "Export queued. You will get a notification when the file is ready.")
+        return redirect("core:export_job_detail", pk=job.pk)
+
+
+class ExportJobDetailView(LoginRequiredMixin, GroupRequiredMixin, DetailView):
+    required_groups = ["ADMIN", "IT", "MANAGER"]
+    model = ExportJob
+    template_name = "core/export_job_detail.html"
+    context_object_name = "job"
+
+    def render_to_response(self, context, **response_kwargs):
+        # polling: ?format=json
+        if self.request.GET.get("format") == "json":
+            job = self.object
+            return JsonResponse({
+                "id": job.pk,
+                "kind": job.kind,
+                "status": job.status,
+                "row_count": job.row_count,
+                "error": job.error,
+                "download_url": f"/exports/{job.pk}/download/" if job.status == ExportJob.Status.DONE else "",
+            })
+        return super().render_to_response(context, **response_kwargs)
+
+
+class ExportJobDownloadView(LoginRequiredMixin, GroupRequiredMixin, View):
+    required_groups = ["ADMIN", "IT", "MANAGER"]
+
+    def get(self, request, pk):
+        job = ExportJob.objects.filter(pk=pk, status=ExportJob.Status.DONE).first()
+        if not job or not artifact_exists(job):
+            raise Http404("Export file not found")
+        return FileResponse(
+            open(artifact_path(job), "rb"),
+            as_attachment=True,
+            filename=download_name(job),
+            content_type="application/gzip",
+        )
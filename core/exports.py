@@ -1,96 +1,115 @@
 import csv
-from django.http import HttpResponse
-from django.utils import timezone
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
 from .models import Asset, Ticket, Part, PartStockMovement
-from .permissions import is_it, is_manager
-
-
-def export_assets_csv(request):
-    if not (is_it(request.user) or is_manager(request.user)):
-        return HttpResponse("Forbidden", status=403)
-
-    resp = HttpResponse(content_type="text/csv")
-    resp["Content-Disposition"] = f'attachment; filename="assets_{timezone.now().date()}.csv"'
-    w = csv.writer(resp)
-    w.writerow(["asset_code", "category", "status", "serial_number", "owner", "department", "location", "updated_at"])
-
-    for a in Asset.objects.select_related("category", "owner", "department", "location").all().order_by("asset_code"):
-        w.writerow([
-            a.asset_code,
-            str(a.category),
-            a.status,
-            a.serial_number,
-            getattr(a.owner, "username", ""),
-            str(a.department) if a.department else "",
-            str(a.location) if a.location else "",
-            a.updated_at.isoformat(),
-        ])
-    return resp
-
-
-def export_tickets_csv(request):
-    if not (is_it(request.user) or is_manager(request.user)):
-        return HttpResponse("Forbidden", status=403)
-
-    resp = HttpResponse(content_type="text/csv")
-    resp["Content-Disposition"] = f'attachment; filename="tickets_{timezone.now().date()}.csv"'
-    w = csv.writer(resp)
-    w.writerow(["ticket_no", "asset_code", "subject", "status", "priority", "requested_by", "assigned_to", "due_at", "cost"])
-
-    for t in Ticket.objects.select_related("asset", "requested_by", "assigned_to").all().order_by("-created_at"):
-        w.writerow([
-            t.ticket_no,
-            t.asset.asset_code,
-            t.subject,
-            t.status,
-            t.priority,
-            getattr(t.requested_by, "username", ""),
-            getattr(t.assigned_to, "username", ""),
-            t.due_at.isoformat() if t.due_at else "",
-            str(t.cost) if t.cost is not None else "",
-        ])
-    return resp
-
-def export_parts_csv(request):
-    if not (is_it(request.user) or is_manager(request.user)):
-        return HttpResponse("Forbidden", status=403)
-
-    resp = HttpResponse(content_type="text/csv")
-    resp["Content-Disposition"] = f'attachment; filename="parts_{timezone.now().date()}.csv"'
-    w = csv.writer(resp)
-    w.writerow(["sku", "name", "vendor", "unit", "unit_cost", "balance", "threshold"])
-
-    for p in Part.objects.select_related("vendor").all().order_by("sku"):
-        w.writerow([
-            p.sku,
-            p.name,
-            str(p.vendor) if p.vendor else "",
-            p.unit,
-            str(p.unit_cost),
-            p.stock_balance(),
-            p.low_stock_threshold,
-        ])
-    return resp
-
-
-def export_movements_csv(request):
-    if not (is_it(request.user) or is_manager(request.user)):
-        return HttpResponse("Forbidden", status=403)
-
-    resp = HttpResponse(content_type="text/csv")
-    resp["Content-Disposition"] = f'attachment; filename="movements_{timezone.now().date()}.csv"'
-    w = csv.writer(resp)
-    w.writerow(["time", "part_sku", "type", "qty", "ticket_no", "by", "note"])
-
-    qs = PartStockMovement.objects.select_related("part", "ref_ticket", "created_by").all().order_by("-created_at")[:5000]
-    for m in qs:
-        w.writerow([
-            m.created_at.isoformat(),
-            m.part.sku,
-            m.movement_type,
-            m.qty,
-            m.ref_ticket.ticket_no if m.ref_ticket else "",
-            getattr(m.created_by, "username", ""),
-            m.note,
-        ])
-    return resp
\ No newline at end of file
+
+# แถวต่อรอบที่ดึงจาก server-side cursor / ต่อก้อนที่เขียนลงไฟล์
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """file-like ที่ csv.writer เขียนใส่แล้วคืนค่ากลับมาเลย (ไม่ buffer ทั้งไฟล์)"""
+
+    def write(self, value):
+        return value
+
+
+def _location_label(name, detail):
+    # เหมือน str(Location) แต่ไม่ต้องโหลด instance
+    if name is None:
+        return ""
+    return f"{name} {('- ' + detail) if detail else ''}".strip()
+
+
+def _iso(dt):
+    return dt.isoformat() if dt else ""
+
+
+def iter_csv(header, rows, chunk_size=EXPORT_CHUNK_SIZE):
+    """แปลง rows เป็นก้อน CSV ทีละ chunk_size แถว"""
+    writer = csv.writer(Echo())
+    buf = [writer.writerow(header)]
+    for row in rows:
+        buf.append(writer.writerow(row))
+        if len(buf) >= chunk_size:
+            yield "".join(buf)
+            buf = []
+    if buf:
+        yield "".join(buf)
+
+
+# -----------------------
+# Row sources (values_list + iterator => memory คงที่ไม่ว่ากี่แถว)
+# since = delta export เฉพาะแถวที่เปลี่ยนตั้งแต่เวลานั้น
+# -----------------------
+ASSET_HEADER = ["asset_code", "category", "status", "serial_number", "owner", "department", "location", "updated_at"]
+TICKET_HEADER = ["ticket_no", "asset_code", "subject", "status", "priority", "requested_by", "assigned_to", "due_at", "cost"]
+PART_HEADER = ["sku", "name", "vendor", "unit", "unit_cost", "balance", "threshold"]
+MOVEMENT_HEADER = ["time", "part_sku", "type", "qty", "ticket_no", "by", "note"]
+
+
+def asset_rows(since=None):
+    qs = Asset.objects.order_by("asset_code")
+    if since:
+        qs = qs.filter(updated_at__gte=since)
+    qs = qs.values_list(
+        "asset_code", "category__name", "status", "serial_number", "owner__username",
+        "department__name", "location__name", "location__detail", "updated_at",
+    )
+    for code, category, status, serial, owner, dept, loc_name, loc_detail, updated_at in qs.iterator(
+        chunk_size=EXPORT_CHUNK_SIZE
+    ):
+        yield [
+            code, category, status, serial, owner or "", dept or "",
+            _location_label(loc_name, loc_detail), _iso(updated_at),
+        ]
+
+
+def ticket_rows(since=None):
+    qs = Ticket.objects.order_by("-created_at")
+    if since:
+        qs = qs.filter(updated_at__gte=since)
+    qs = qs.values_list(
+        "ticket_no", "asset__asset_code", "subject", "status", "priority",
+        "requested_by__username", "assigned_to__username", "due_at", "cost",
+    )
+    for ticket_no, asset_code, subject, status, priority, req, assignee, due_at, cost in qs.iterator(
+        chunk_size=EXPORT_CHUNK_SIZE
+    ):
+        yield [
+            ticket_no, asset_code, subject, status, priority, req or "", assignee or "",
+            _iso(due_at), str(cost) if cost is not None else "",
+        ]
+
+
+def part_rows(since=None):
+    qs = Part.objects.order_by("sku")
+    if since:
+        qs = qs.filter(Q(updated_at__gte=since) | Q(stock__updated_at__gte=since))
+    qs = (
+        qs.annotate(balance=Coalesce(F("stock__balance"), 0))
+        .values_list("sku", "name", "vendor__name", "unit", "unit_cost", "balance", "low_stock_threshold")
+    )
+    for sku, name, vendor, unit, unit_cost, balance, threshold in qs.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [sku, name, vendor or "", unit, str(unit_cost), balance, threshold]
+
+
+def movement_rows(since=None):
+    qs = PartStockMovement.objects.order_by("-created_at")
+    if since:
+        qs = qs.filter(created_at__gte=since)
+    qs = qs.values_list(
+        "created_at", "part__sku", "movement_type", "qty",
+        "ref_ticket__ticket_no", "created_by__username", "note",
+    )
+    for created_at, sku, mtype, qty, ticket_no, by, note in qs.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [_iso(created_at), sku, mtype, qty, ticket_no or "", by or "", note]
+
+
+# kind -> (header, row source) ใช้โดย ExportJob worker
+EXPORTS = {
+    "assets": (ASSET_HEADER, asset_rows),
+    "tickets": (TICKET_HEADER, ticket_rows),
+    "parts": (PART_HEADER, part_rows),
+    "movements": (MOVEMENT_HEADER, movement_rows),
+}
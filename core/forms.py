@@ -1,6 +1,8 @@
 from django import forms
+from django.conf import settings
 from django.utils import timezone
 from .models import Asset, Ticket, TicketAttachment, TicketComment, Part, PartStockMovement
+from .imports import IMPORT_HEADER, count_rows, guess_format
 from .permissions import is_it, is_manager
 
 
@@ -64,7 +66,8 @@ class TicketForm(forms.ModelForm):
         self.user = user
 
         # ให้เลือกเฉพาะ asset ที่มีจริง และ sort
-        self.fields["asset"].queryset = Asset.objects.all().order_by("asset_code")
+        # label ของ asset แสดง category -> select_related กัน query ต่อ option
+        self.fields["asset"].queryset = Asset.objects.select_related("category").order_by("asset_code")
 
         # ถ้าไม่ใช่ IT/Manager → ซ่อนฟิลด์ admin-like
         if user and not (is_it(user) or is_manager(user)):
@@ -142,3 +145,27 @@ class TicketUsePartForm(forms.Form):
         self.fields["qty"].widget.attrs["class"] = "form-control"
         self.fields["note"].widget.attrs["class"] = "form-control"
         self.fields["note"].widget.attrs["placeholder"] = "Optional note (e.g. replaced RAM)"
+
+
+class TicketImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV, JSON array or JSON lines; columns: " + ", ".join(IMPORT_HEADER))
+    dry_run = forms.BooleanField(required=False, label="Validate only (dry run)")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["file"].widget.attrs["class"] = "form-control"
+        self.fields["dry_run"].widget.attrs["class"] = "form-check-input"
+
+    def clean_file(self):
+        f = self.cleaned_data["file"]
+        try:
+            self.format = guess_format(f.name)
+        except ValueError as e:
+            raise forms.ValidationError(str(e))
+        limit = settings.IMPORT_WEB_MAX_ROWS
+        if count_rows(f, self.format, limit) > limit:
+            raise forms.ValidationError(
+                f"More than {limit} rows: split the file, or ask an admin to run "
+                f"`manage.py import_tickets` with it on the server."
+            )
+        return f
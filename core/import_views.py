@@ -0,0 +1,43 @@
+from django.contrib import messages
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.views.generic import FormView
+
+from .forms import TicketImportForm
+from .imports import import_tickets, open_upload, read_rows
+from .permissions import GroupRequiredMixin
+
+# แสดง error ไม่เกินเท่านี้แถวในหน้าเว็บ (ที่เหลือบอกแค่จำนวน)
+SHOW_ERRORS = 50
+
+
+class TicketImportView(LoginRequiredMixin, GroupRequiredMixin, FormView):
+    """อัปโหลดไฟล์ ticket จากระบบเก่า/email gateway แล้ว import ทีละ batch (core/imports.py)"""
+    required_groups = ["ADMIN", "IT", "MANAGER"]
+    form_class = TicketImportForm
+    template_name = "core/ticket_import.html"
+
+    def form_valid(self, form):
+        dry_run = form.cleaned_data["dry_run"]
+        # ไฟล์เสียกลางทาง (JSON / UTF-8 / CSV) ไม่ raise: result บอกว่าหยุดที่แถวไหนและ import อะไรไปแล้ว
+        result = import_tickets(
+            read_rows(open_upload(form.cleaned_data["file"]), form.format),
+            user=self.request.user, dry_run=dry_run,
+        )
+
+        verb = "Validated" if dry_run else "Imported"
+        level = messages.success if not result.errors else messages.warning
+        level(self.request, f"{verb} {result.created} of {result.rows} tickets ({len(result.errors)} rejected)")
+        if result.stopped_at:
+            messages.error(
+                self.request,
+                f"Stopped at row {result.stopped_at}: the file could not be read from there on. "
+                f"Rows before it were {verb.lower()}; upload only row {result.stopped_at} onwards after fixing it.",
+            )
+        # render หน้าเดิมพร้อมรายการแถวที่ไม่ผ่าน (ไม่ redirect เพราะ error ไม่ได้เก็บไว้ที่ไหน)
+        errors = result.errors[:SHOW_ERRORS]
+        if result.stopped_at and result.errors[-1] not in errors:
+            errors.append(result.errors[-1])
+        return self.render_to_response(self.get_context_data(
+            form=self.form_class(), result=result, errors=errors,
+            more_errors=max(0, len(result.errors) - len(errors)),
+        ))
@@ -0,0 +1,505 @@
+"""
+Bulk import จาก CSV / JSON (ย้ายมาจาก email gateway / ระบบเก่า / ไฟล์ของฝ่ายจัดซื้อ)
+
+ทำทีละ batch แทน save() ทีละแถว:
+- ticket: asset_code / requested_by -> id ด้วย query เดียวต่อ batch, due_at จาก core/sla.py ด้วยเวลาเดียวกัน,
+  เลข ticket จอง block เดียว แล้ว bulk_create + อัปเดต KPI / search index / audit / notification รวมต่อ batch
+- asset: upsert ตาม asset_code (bulk_create update_conflicts) ชื่อ category/department/location จาก map ที่โหลดไว้
+  owner ที่เปลี่ยนเทียบกับค่าเดิมที่ดึงมาทั้ง batch แล้วเขียน AssetAssignmentLog ด้วย bulk_create ครั้งเดียว
+"""
+import csv
+import io
+import json
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .kpi import ASSETS_TOTAL, bump_assets_tickets, bump_slots, slot_of, ticket_contribution
+from .models import (
+    Asset, AssetAssignmentLog, AssetCategory, AuditLog, Department, Location, Notification, OutboxEvent, Ticket,
+    TicketSearchDocument,
+)
+from .outbox import publish
+from .search import index_assets, ticket_document
+from .sla import calc_due_at, get_sla_hours
+
+IMPORT_BATCH_SIZE = 5000
+IMPORT_FORMATS = ("csv", "json", "jsonl")
+IMPORT_HEADER = ["asset_code", "subject", "description", "priority", "status", "requested_by", "sla_hours"]
+
+SUBJECT_MAX = Ticket._meta.get_field("subject").max_length
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.batches = 0
+        self.errors = []  # (ลำดับแถว เริ่มที่ 1, ข้อความ)
+        self.first_ticket_no = ""
+        self.last_ticket_no = ""
+        # แถวที่อ่านไฟล์ต่อไม่ได้ (byte ไม่ใช่ UTF-8 / CSV เสีย): batch ก่อนหน้า commit ไปแล้ว แถวหลังจากนี้ไม่ถูกอ่าน
+        self.stopped_at = None
+
+    @property
+    def rows(self):
+        return self.created + len(self.errors)
+
+
+class UnreadableRow:
+    """แถวที่ parse ไม่ได้ -> validate รายงานเป็น error ของแถวนั้นแทนการ raise กลาง import"""
+
+    def __init__(self, message, fatal=False):
+        self.message = message
+        self.fatal = fatal  # อ่านแถวถัดไปต่อไม่ได้แล้ว
+
+
+def _stopped_at(numbered_rows):
+    row_no, row = numbered_rows[-1]
+    return row_no if isinstance(row, UnreadableRow) and row.fatal else None
+
+
+# -----------------------
+# Reading
+# -----------------------
+def guess_format(name: str) -> str:
+    fmt = Path(name).suffix.lower().lstrip(".")
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"unsupported file type '.{fmt}' (use {', '.join(IMPORT_FORMATS)})")
+    return fmt
+
+
+def read_rows(stream, fmt: str):
+    """text stream -> dict ทีละแถว (json = array ของ object, jsonl = object ละบรรทัด)"""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    elif fmt == "json":
+        data = json.load(stream)
+        if not isinstance(data, list):
+            raise ValueError("JSON import must be an array of objects")
+        yield from data
+    elif fmt == "jsonl":
+        for line in stream:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as e:  # บรรทัดเดียวเสีย อ่านบรรทัดถัดไปต่อได้
+                    yield UnreadableRow(f"invalid JSON: {e}")
+    else:
+        raise ValueError(f"unknown format {fmt}")
+
+
+def open_upload(upload):
+    """UploadedFile (bytes) -> text stream; utf-8-sig ตัด BOM ของไฟล์จาก Excel"""
+    return io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+
+
+def count_rows(upload, fmt: str, stop_after: int) -> int:
+    """นับแถวของไฟล์ที่อัปโหลด (หยุดนับเมื่อเกิน stop_after) แล้วกรอกลับต้นไฟล์"""
+    stream = open_upload(upload)
+    n = 0
+    try:
+        for _ in read_rows(stream, fmt):
+            n += 1
+            if n > stop_after:
+                break
+    except (ValueError, csv.Error):
+        pass  # ไฟล์เสีย: ให้ import รายงานเองว่าหยุดที่แถวไหน
+    finally:
+        stream.detach()  # ไม่ให้ wrapper ปิดไฟล์ของ upload ตอนถูกเก็บกวาด
+        upload.seek(0)
+    return n
+
+
+def numbered_batches(rows, batch_size):
+    """
+    rows -> list ของ (ลำดับแถว เริ่มที่ 1, row) ทีละ batch_size
+    ไฟล์อ่านต่อไม่ได้กลางทาง (UnicodeDecodeError, csv.Error, JSON array เสีย) = แถวสุดท้ายเป็น UnreadableRow แล้วหยุด
+    """
+    rows = iter(rows)
+    batch, row_no = [], 0
+    while True:
+        row_no += 1
+        try:
+            row = next(rows)
+        except StopIteration:
+            break
+        except (ValueError, csv.Error) as e:
+            message = f"cannot read the file from this row on ({e}); later rows were not imported"
+            batch.append((row_no, UnreadableRow(message, fatal=True)))
+            break
+        batch.append((row_no, row))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _text(row, key) -> str:
+    value = row.get(key) if isinstance(row, dict) else None
+    return "" if value is None else str(value).strip()
+
+
+def _lookup(model, field, values) -> dict:
+    values = {v for v in values if v}
+    if not values:
+        return {}
+    return dict(model.objects.filter(**{f"{field}__in": values}).values_list(field, "id"))
+
+
+# -----------------------
+# Tickets
+# -----------------------
+def validate_ticket_batch(numbered_rows, default_requester_id=None, now=None):
+    """[(row_no, dict)] -> ([Ticket ยังไม่มี ticket_no], [(row_no, error)])"""
+    now = now or timezone.now()
+    assets = _lookup(Asset, "asset_code", (_text(r, "asset_code") for _, r in numbered_rows))
+    users = _lookup(User, "username", (_text(r, "requested_by") for _, r in numbered_rows))
+
+    tickets, errors = [], []
+    for row_no, row in numbered_rows:
+        if isinstance(row, UnreadableRow):
+            errors.append((row_no, row.message))
+            continue
+        if not isinstance(row, dict):
+            errors.append((row_no, "row is not an object"))
+            continue
+
+        problems = []
+        code = _text(row, "asset_code")
+        asset_id = assets.get(code)
+        if not code:
+            problems.append("asset_code is required")
+        elif asset_id is None:
+            problems.append(f"unknown asset_code {code}")
+
+        subject = _text(row, "subject")
+        if not subject:
+            problems.append("subject is required")
+        elif len(subject) > SUBJECT_MAX:
+            problems.append(f"subject longer than {SUBJECT_MAX} characters")
+
+        priority = _text(row, "priority").upper() or Ticket.Priority.MEDIUM
+        if priority not in Ticket.Priority.values:
+            problems.append(f"unknown priority {priority}")
+
+        status = _text(row, "status").upper() or Ticket.Status.NEW
+        if status not in Ticket.Status.values:
+            problems.append(f"unknown status {status}")
+
+        requester = _text(row, "requested_by")
+        requested_by_id = users.get(requester) if requester else default_requester_id
+        if requester and requested_by_id is None:
+            problems.append(f"unknown user {requester}")
+
+        sla_hours = _text(row, "sla_hours")
+        if sla_hours:
+            if not sla_hours.isdigit() or int(sla_hours) <= 0:
+                problems.append("sla_hours must be a positive whole number")
+        else:
+            sla_hours = get_sla_hours(priority)
+
+        if problems:
+            errors.append((row_no, "; ".join(problems)))
+            continue
+
+        tickets.append(Ticket(
+            # asset_code ติดไปกับ instance ไว้สร้าง search document โดยไม่ต้องอ่าน asset กลับมา
+            asset=Asset(pk=asset_id, asset_code=code), subject=subject, description=_text(row, "description"),
+            priority=priority, status=status, requested_by_id=requested_by_id,
+            sla_hours=int(sla_hours), due_at=calc_due_at(now, sla_hours),
+        ))
+    return tickets, errors
+
+
+def _write_ticket_batch(tickets, user):
+    """ticket ที่ validate แล้ว -> DB ใน transaction เดียว (signal ของ Ticket ไม่ถูกเรียก จึงทำแทนที่นี่)"""
+    # จองเลขใน transaction สั้น ๆ ของตัวเองก่อน: row ของ TicketSequence ไม่ถูก lock ค้างทั้ง batch
+    # (ticket ที่สร้างจากหน้าเว็บระหว่างนี้ไม่ต้องรอ) batch ที่ rollback ทิ้งช่องว่างของเลขไว้ได้
+    for ticket, no in zip(tickets, Ticket.reserve_ticket_nos(len(tickets))):
+        ticket.ticket_no = no
+
+    with transaction.atomic():
+        Ticket.objects.bulk_create(tickets)
+
+        # ticket ใหม่ยังไม่มี comment -> สร้าง document ได้จากค่าที่มีอยู่แล้ว
+        docs = []
+        for t in tickets:
+            title, body = ticket_document(t.ticket_no, t.asset.asset_code, t.subject, t.description, [])
+            docs.append(TicketSearchDocument(ticket_id=t.pk, title=title, body=body))
+        TicketSearchDocument.objects.bulk_create(docs)
+
+        first, last = tickets[0], tickets[-1]
+        summary = f"{len(tickets)} tickets {first.ticket_no} .. {last.ticket_no}"
+        audit = AuditLog.objects.create(
+            action="IMPORT_TICKETS",
+            object_type="Ticket",
+            object_id=f"{first.pk}-{last.pk}",
+            summary=summary,
+            created_by=user,
+        )
+        # notification แถวเดียวต่อ batch (แทน notify_it ทีละใบ)
+        publish(
+            OutboxEvent.Topic.TICKET_CREATED,
+            f"import:{audit.pk}",
+            ntype=Notification.Type.TICKET_NEW,
+            title=f"Imported {len(tickets)} tickets",
+            message=summary,
+            url="/tickets/?status=NEW",
+            audience="IT",
+            data={"imported": len(tickets), "first_ticket_id": first.pk, "last_ticket_id": last.pk,
+                  "first_ticket_no": first.ticket_no, "last_ticket_no": last.ticket_no},
+        )
+
+        # KPI ไว้ท้ายสุด: batch ใหญ่แตะทุก slot ของ counter จึง lock แถวเหล่านั้นแค่ช่วงก่อน commit
+        totals = defaultdict(Counter)
+        for t in tickets:
+            totals[slot_of(t.pk)].update(ticket_contribution(t.status, t.due_at, t.cost, t.created_at))
+        bump_slots(totals)
+        bump_assets_tickets(Counter(t.asset_id for t in tickets))
+
+
+def import_tickets(rows, user=None, batch_size=IMPORT_BATCH_SIZE, dry_run=False, progress=None):
+    """
+    rows = iterable ของ dict (ดู IMPORT_HEADER); แถวที่ไม่ผ่านถูกข้ามและรายงานใน result.errors
+    requested_by ว่าง = user ที่ import; dry_run = validate อย่างเดียว
+    """
+    result = ImportResult()
+    default_requester_id = user.pk if user else None
+
+    def flush(batch):
+        tickets, errors = validate_ticket_batch(batch, default_requester_id)
+        result.errors.extend(errors)
+        if tickets and not dry_run:
+            _write_ticket_batch(tickets, user)
+            result.first_ticket_no = result.first_ticket_no or tickets[0].ticket_no
+            result.last_ticket_no = tickets[-1].ticket_no
+        result.created += len(tickets)
+        result.batches += 1
+        result.stopped_at = _stopped_at(batch)
+        if progress:
+            progress(result)
+
+    for batch in numbered_batches(rows, batch_size):
+        flush(batch)
+    return result
+
+
+# -----------------------
+# Assets (upsert ตาม asset_code)
+# -----------------------
+# คอลัมน์เดียวกับ export assets.csv (updated_at ถูกข้าม) + ฟิลด์ที่ export ไม่มี
+ASSET_IMPORT_HEADER = [
+    "asset_code", "category", "status", "serial_number", "brand", "model_name",
+    "owner", "department", "location", "purchase_date", "warranty_end", "note",
+]
+# คอลัมน์ชื่อ -> FK (owner = username)
+ASSET_NAME_COLUMNS = {"category": "category_id", "department": "department_id", "location": "location_id",
+                      "owner": "owner_id"}
+ASSET_TEXT_COLUMNS = ["serial_number", "brand", "model_name", "note"]
+ASSET_DATE_COLUMNS = ["purchase_date", "warranty_end"]
+ASSET_FIELDS = ["category_id", "status", *ASSET_TEXT_COLUMNS, "owner_id", "department_id", "location_id",
+                *ASSET_DATE_COLUMNS]
+ASSET_DEFAULTS = {f: None for f in ASSET_FIELDS} | {f: "" for f in ASSET_TEXT_COLUMNS} | {"status": Asset.Status.IN_USE}
+# เก็บตัวอย่าง diff ไว้แสดงไม่เกินเท่านี้แถว (ที่เหลือนับอย่างเดียว)
+DIFF_SAMPLE = 1000
+
+
+class AssetImportResult(ImportResult):
+    def __init__(self):
+        super().__init__()
+        self.updated = 0
+        self.unchanged = 0
+        self.changes = Counter()  # field -> จำนวน asset ที่เปลี่ยน
+        self.diffs = []  # (row_no, asset_code, {column: (เดิม, ใหม่)}); asset ใหม่ = {}
+
+    @property
+    def rows(self):
+        return self.created + self.updated + self.unchanged + len(self.errors)
+
+
+def asset_lookups() -> dict:
+    """ชื่อ -> id ของตาราง master (เล็ก โหลดครั้งเดียวทั้งไฟล์); location ใช้ label แบบเดียวกับ export"""
+    return {
+        "category": dict(AssetCategory.objects.values_list("name", "id")),
+        "department": dict(Department.objects.values_list("name", "id")),
+        "location": {str(loc): loc.pk for loc in Location.objects.all()},
+    }
+
+
+def _max_length(field):
+    return Asset._meta.get_field(field).max_length
+
+
+def validate_asset_batch(numbered_rows, lookups, seen):
+    """
+    [(row_no, dict)] -> (ใหม่ [Asset], แก้ [(row_no, Asset, {attname: ค่าเดิม})], ไม่เปลี่ยน, [(row_no, error)])
+    คอลัมน์ที่ไม่มีในไฟล์ = คงค่าเดิม; owner/department/location ว่าง = ล้างค่า
+    seen = asset_code -> row_no ของทั้งไฟล์ (กันแถวซ้ำ)
+    """
+    rows = [(n, r) for n, r in numbered_rows if isinstance(r, dict)]
+    codes = {_text(r, "asset_code") for _, r in rows}
+    existing = {
+        a["asset_code"]: a
+        for a in Asset.objects.filter(asset_code__in=codes).values("id", "asset_code", "owner__username", *ASSET_FIELDS)
+    }
+    owners = _lookup(User, "username", (_text(r, "owner") for _, r in rows))
+    maps = {**lookups, "owner": owners}
+
+    created, updated, unchanged, errors = [], [], 0, []
+    for row_no, row in numbered_rows:
+        if isinstance(row, UnreadableRow):
+            errors.append((row_no, row.message))
+            continue
+        if not isinstance(row, dict):
+            errors.append((row_no, "row is not an object"))
+            continue
+
+        problems = []
+        code = _text(row, "asset_code")
+        if not code:
+            errors.append((row_no, "asset_code is required"))
+            continue
+        if len(code) > _max_length("asset_code"):
+            errors.append((row_no, f"asset_code longer than {_max_length('asset_code')} characters"))
+            continue
+        if code in seen:
+            errors.append((row_no, f"asset_code {code} already on row {seen[code]}"))
+            continue
+        seen[code] = row_no
+
+        old = existing.get(code)
+        values = {f: old[f] for f in ASSET_FIELDS} if old else dict(ASSET_DEFAULTS)
+
+        for column, attname in ASSET_NAME_COLUMNS.items():
+            if column not in row:
+                continue
+            name = _text(row, column)
+            if not name:
+                values[attname] = None
+            elif name in maps[column]:
+                values[attname] = maps[column][name]
+            else:
+                problems.append(f"unknown {column} {name}")
+        if values["category_id"] is None and not _text(row, "category"):
+            problems.append("category is required")
+
+        if "status" in row:
+            status = _text(row, "status").upper()
+            if status in Asset.Status.values:
+                values["status"] = status
+            else:
+                problems.append(f"unknown status {status or '(blank)'}")
+
+        for column in ASSET_TEXT_COLUMNS:
+            if column in row:
+                values[column] = _text(row, column)
+                limit = _max_length(column)
+                if limit and len(values[column]) > limit:
+                    problems.append(f"{column} longer than {limit} characters")
+
+        for column in ASSET_DATE_COLUMNS:
+            if column not in row:
+                continue
+            raw = _text(row, column)
+            try:
+                values[column] = parse_date(raw) if raw else None
+            except ValueError:
+                values[column] = None
+            if raw and values[column] is None:
+                problems.append(f"{column} must be YYYY-MM-DD")
+
+        if problems:
+            errors.append((row_no, "; ".join(problems)))
+            continue
+
+        if old is None:
+            created.append((row_no, Asset(asset_code=code, **values)))
+            continue
+        before = {f: old[f] for f in ASSET_FIELDS if values[f] != old[f]}
+        if not before:
+            unchanged += 1
+            continue
+        asset = Asset(pk=old["id"], asset_code=code, **values)
+        # username เดิม/ใหม่ไว้แสดงใน diff (id ของ owner ไม่อยู่ใน lookups)
+        asset._owner_names = (old["owner__username"], _text(row, "owner"))
+        updated.append((row_no, asset, before))
+    return created, updated, unchanged, errors
+
+
+def _describe(before, asset, names):
+    """{attname: ค่าเดิม} -> {column: (เดิม, ใหม่)} เป็นชื่อที่อ่านได้; names = id -> ชื่อ ของ lookups"""
+    diff = {}
+    for attname, old in before.items():
+        new = getattr(asset, attname)
+        column = attname.removesuffix("_id")
+        if column == "owner":
+            old, new = asset._owner_names
+        elif column in names:
+            old, new = names[column].get(old), names[column].get(new)
+        diff[column] = ("" if old is None else str(old), "" if new is None else str(new))
+    return diff
+
+
+def _write_asset_batch(created, updated, user):
+    """upsert ทั้ง batch ใน transaction เดียว (pre_save/post_save ของ Asset ไม่ถูกเรียก จึงทำแทนที่นี่)"""
+    assets = created + [a for a, _ in updated]
+    changed = {f for _, before in updated for f in before}
+    update_fields = sorted({Asset._meta.get_field(f).name for f in changed} | {"updated_at"})
+    with transaction.atomic():
+        Asset.objects.bulk_create(
+            assets, update_conflicts=True, unique_fields=["asset_code"], update_fields=update_fields,
+        )
+        # แทน signals_asset.asset_owner_change_log ทีละตัว
+        AssetAssignmentLog.objects.bulk_create([
+            AssetAssignmentLog(asset_id=a.pk, old_owner_id=before["owner_id"], new_owner_id=a.owner_id,
+                               changed_by=user, note="import")
+            for a, before in updated if "owner_id" in before
+        ])
+        bump_slots({slot: {ASSETS_TOTAL: n} for slot, n in Counter(slot_of(a.pk) for a in created).items()})
+        index_assets([a.pk for a in assets])
+        AuditLog.objects.create(
+            action="IMPORT_ASSETS",
+            object_type="Asset",
+            object_id=f"{len(assets)} assets",
+            summary=f"{len(created)} created, {len(updated)} updated ({', '.join(sorted(update_fields))})",
+            created_by=user,
+        )
+
+
+def import_assets(rows, user=None, batch_size=IMPORT_BATCH_SIZE, dry_run=False, progress=None):
+    """
+    rows = iterable ของ dict (ดู ASSET_IMPORT_HEADER); upsert ตาม asset_code
+    แถวที่ไม่ผ่านถูกข้ามและรายงานใน result.errors; dry_run = คำนวณ diff อย่างเดียว
+    """
+    result = AssetImportResult()
+    lookups = asset_lookups()
+    names = {column: {pk: name for name, pk in m.items()} for column, m in lookups.items()}
+    seen = {}
+
+    def flush(batch):
+        created, updated, unchanged, errors = validate_asset_batch(batch, lookups, seen)
+        result.errors.extend(errors)
+        for _, _, before in updated:
+            result.changes.update(before.keys())
+        if len(result.diffs) < DIFF_SAMPLE:
+            diffs = [(n, a.asset_code, {}) for n, a in created]
+            diffs += [(n, a.asset_code, _describe(before, a, names)) for n, a, before in updated]
+            result.diffs.extend(sorted(diffs)[:DIFF_SAMPLE - len(result.diffs)])
+        if (created or updated) and not dry_run:
+            _write_asset_batch([a for _, a in created], [(a, before) for _, a, before in updated], user)
+        result.created += len(created)
+        result.updated += len(updated)
+        result.unchanged += unchanged
+        result.batches += 1
+        result.stopped_at = _stopped_at(batch)
+        if progress:
+            progress(result)
+
+    for batch in numbered_batches(rows, batch_size):
+        flush(batch)
+    return result
@@ -0,0 +1,157 @@
+"""
+KPI snapshot ของ dashboard (KpiCounter / AssetTicketCount)
+
+signals_kpi เรียก apply_* ทุกครั้งที่ ticket/asset เปลี่ยน ส่วน DashboardView อ่านผ่าน
+dashboard_snapshot() + top_assets() (2 query เล็ก ๆ) แทน count/sum บนตารางจริง
+
+แต่ละ counter แยกเป็น KPI_SLOTS แถว ("tickets_open#3") เลือกแถวจาก pk ของ ticket/asset:
+ticket ที่สร้างพร้อมกันไม่แย่ง row lock แถวเดียวกัน และ ticket ใบหนึ่งบวก/ลบที่ slot เดิมเสมอ
+(ค่าในแต่ละแถวจึงไม่ติดลบ) ฝั่งอ่านรวมทุก slot
+"""
+from collections import Counter
+from datetime import timezone as dt_timezone
+
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Mod
+from django.utils import timezone
+
+from .models import Asset, AssetTicketCount, KpiCounter, Ticket
+
+OPEN_STATUSES = ("NEW", "ASSIGNED", "IN_PROGRESS")
+
+TICKETS_OPEN = "tickets_open"
+ASSETS_TOTAL = "assets_total"
+DUE_PREFIX = "due:"
+KPI_SLOTS = 16
+
+
+def slot_of(pk) -> int:
+    return pk % KPI_SLOTS
+
+
+def slot_key(name: str, slot: int) -> str:
+    return f"{name}#{slot}"
+
+
+def _all_slots(name: str) -> Q:
+    # "name#0" .. "name#15" เป็นช่วงของ string ("$" ต่อจาก "#") -> ใช้ primary key index ได้
+    return Q(name__gte=f"{name}#", name__lt=f"{name}$")
+
+
+def due_key(dt) -> str:
+    return DUE_PREFIX + dt.astimezone(dt_timezone.utc).strftime("%Y-%m-%dT%H:%M")
+
+
+def cost_key(dt) -> str:
+    return f"cost:{timezone.localtime(dt):%Y-%m}"
+
+
+def ticket_contribution(status, due_at, cost, created_at) -> Counter:
+    """ticket หนึ่งใบบวกค่าอะไรเข้า KpiCounter บ้าง"""
+    c = Counter()
+    if status in OPEN_STATUSES:
+        c[TICKETS_OPEN] += 1
+        if due_at:
+            c[due_key(due_at)] += 1
+    if cost and created_at:
+        c[cost_key(created_at)] += cost
+    return c
+
+
+def diff(new: Counter, old: Counter) -> dict:
+    # Counter ลบกันแล้วตัดค่าติดลบทิ้ง จึงลบเองทีละ key
+    return {k: new.get(k, 0) - old.get(k, 0) for k in new.keys() | old.keys()}
+
+
+def bump(deltas: dict, slot: int = 0):
+    """บวก delta เข้า slot เดียว (ดู slot_of)"""
+    deltas = {slot_key(k, slot): v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+    KpiCounter.objects.bulk_create([KpiCounter(name=k) for k in deltas], ignore_conflicts=True)
+    # เรียง key ให้ทุก transaction lock แถวในลำดับเดียวกัน (กัน deadlock)
+    for name in sorted(deltas):
+        if not KpiCounter.objects.filter(name=name).update(value=F("value") + deltas[name]):
+            # แถวเพิ่งถูกลบเพราะเหลือ 0 (transaction อื่น commit ระหว่างรอ lock) -> สร้างใหม่แล้วบวกอีกรอบ
+            KpiCounter.objects.bulk_create([KpiCounter(name=name)], ignore_conflicts=True)
+            KpiCounter.objects.filter(name=name).update(value=F("value") + deltas[name])
+    # due bucket ที่ ticket ปิดหมดแล้วลบทิ้ง: overdue sum ไล่เฉพาะนาทีที่ยังมี ticket เปิดอยู่ ไม่โตตามประวัติ
+    emptied = [k for k, v in deltas.items() if v < 0 and k.startswith(DUE_PREFIX)]
+    if emptied:
+        KpiCounter.objects.filter(name__in=emptied, value=0).delete()
+
+
+def bump_slots(deltas_by_slot: dict):
+    """bump หลาย slot (bulk import) เรียง slot ให้ลำดับการ lock คงที่"""
+    for slot in sorted(deltas_by_slot):
+        bump(deltas_by_slot[slot], slot)
+
+
+def bump_asset_tickets(asset_id, delta: int):
+    if not asset_id or not delta:
+        return
+    AssetTicketCount.objects.bulk_create([AssetTicketCount(asset_id=asset_id)], ignore_conflicts=True)
+    AssetTicketCount.objects.filter(asset_id=asset_id).update(tickets=F("tickets") + delta)
+
+
+def bump_assets_tickets(deltas: dict):
+    """bump_asset_tickets ของหลาย asset พร้อมกัน (bulk import): UPDATE ละค่า delta ไม่ใช่ละ asset"""
+    deltas = {a: n for a, n in deltas.items() if a and n}
+    if not deltas:
+        return
+    AssetTicketCount.objects.bulk_create([AssetTicketCount(asset_id=a) for a in deltas], ignore_conflicts=True)
+    for delta in sorted(set(deltas.values())):
+        ids = sorted(a for a, n in deltas.items() if n == delta)
+        AssetTicketCount.objects.filter(asset_id__in=ids).update(tickets=F("tickets") + delta)
+
+
+def expected_counters(chunk_size=2000) -> Counter:
+    """คำนวณ KpiCounter ทั้งหมด (แยก slot แล้ว) จากตารางจริง (ใช้โดย rebuild_kpis)"""
+    totals = Counter()
+    assets = Asset.objects.order_by().annotate(slot=Mod("pk", KPI_SLOTS)).values("slot").annotate(n=Count("pk"))
+    for row in assets:
+        totals[slot_key(ASSETS_TOTAL, int(row["slot"]))] = row["n"]  # sqlite MOD คืน float
+    rows = Ticket.objects.order_by().values_list("pk", "status", "due_at", "cost", "created_at")
+    for pk, status, due_at, cost, created_at in rows.iterator(chunk_size=chunk_size):
+        slot = slot_of(pk)
+        for k, v in ticket_contribution(status, due_at, cost, created_at).items():
+            totals[slot_key(k, slot)] += v
+    return totals
+
+
+def expected_asset_tickets() -> dict:
+    return dict(
+        Ticket.objects.order_by().values("asset_id").annotate(n=Count("id")).values_list("asset_id", "n")
+    )
+
+
+# -----------------------
+# Read side
+# -----------------------
+def dashboard_snapshot(now=None) -> dict:
+    now = now or timezone.now()
+    month = cost_key(now)
+    overdue = Q(name__gte=DUE_PREFIX, name__lt=due_key(now))
+    # overdue: "due:...T05:27#3" < "due:...T05:28" ยังเรียงตามเวลาได้แม้มี slot ต่อท้าย
+    open_tickets, assets_total, cost_month = _all_slots(TICKETS_OPEN), _all_slots(ASSETS_TOTAL), _all_slots(month)
+    agg = KpiCounter.objects.filter(open_tickets | assets_total | cost_month | overdue).aggregate(
+        open_tickets=Sum("value", filter=open_tickets),
+        assets_total=Sum("value", filter=assets_total),
+        overdue_tickets=Sum("value", filter=overdue),
+        cost_month=Sum("value", filter=cost_month),
+    )
+    return {
+        "open_tickets": int(agg["open_tickets"] or 0),
+        "overdue_tickets": int(agg["overdue_tickets"] or 0),
+        "assets_total": int(agg["assets_total"] or 0),
+        "cost_month": agg["cost_month"] or 0,
+    }
+
+
+def top_assets(limit=5):
+    return (
+        AssetTicketCount.objects.filter(tickets__gt=0)
+        .select_related("asset")
+        .only("tickets", "asset__id", "asset__asset_code")
+        .order_by("-tickets", "asset_id")[:limit]
+    )
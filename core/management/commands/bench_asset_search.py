@@ -0,0 +1,89 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from core.benchutils import bench_database, summarize
+from core.models import Asset, AssetCategory
+from core.search import rebuild_asset_index, search_assets
+
+BRANDS = {
+    "Dell": ["Latitude 5440", "OptiPlex 7010", "P2422H"],
+    "HP": ["EliteBook 840", "ProDesk 400", "LaserJet M404"],
+    "Lenovo": ["ThinkPad T14", "ThinkCentre M70q"],
+    "Apple": ["MacBook Pro 14", "iPad Air"],
+    "Cisco": ["Catalyst 9200", "IP Phone 8841"],
+}
+
+# (ชื่อ, query) — code/serial ตรงตัว, substring ของ code/serial, brand+model, owner
+QUERIES = [
+    ("exact code", "IT-004242"),
+    ("exact serial", "SN00424242"),
+    ("partial code", "04242"),
+    ("partial serial", "0042424"),
+    ("brand model", "thinkpad t14"),
+    ("owner", "staff0421"),
+    ("no hit", "zzz-nothing"),
+]
+
+
+class Command(BaseCommand):
+    help = "Asset search latency: icontains OR scan vs trigram index, on a generated inventory"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--assets", type=int, default=500_000)
+        parser.add_argument("--reps", type=int, default=20, help="Timed runs per query")
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        with bench_database(keepdb=options["keepdb"]):
+            self._seed(options["assets"], options["batch_size"])
+            for label, q in QUERIES:
+                for mode in ("icontains", "index"):
+                    self._measure(mode, label, q, options["reps"])
+
+    def _seed(self, n, batch_size):
+        rnd = random.Random(7)
+        category = AssetCategory.objects.create(name="Bench")
+        users = User.objects.bulk_create(User(username=f"staff{i:04d}") for i in range(max(1, n // 50)))
+        brands = list(BRANDS)
+        started = time.perf_counter()
+        for start in range(0, n, batch_size):
+            batch = []
+            for i in range(start, min(n, start + batch_size)):
+                brand = rnd.choice(brands)
+                batch.append(Asset(
+                    asset_code=f"IT-{i:06d}", serial_number=f"SN{rnd.randrange(10**8):08d}", category=category,
+                    brand=brand, model_name=rnd.choice(BRANDS[brand]), owner=rnd.choice(users),
+                ))
+            if start <= 4242 < start + len(batch):
+                batch[4242 - start].serial_number = "SN00424242"
+            Asset.objects.bulk_create(batch)
+        seeded = time.perf_counter()
+        indexed = rebuild_asset_index(batch_size=batch_size)
+        self.stdout.write(
+            f"seeded {n} assets in {seeded - started:.1f}s, indexed {indexed} in {time.perf_counter() - seeded:.1f}s"
+        )
+
+    def _measure(self, mode, label, q, reps):
+        base = Asset.objects.select_related("category", "department", "owner", "location")
+
+        def run():
+            if mode == "icontains":
+                # query เดิมของ AssetListView: count + หน้าแรก
+                qs = base.filter(asset_code__icontains=q) | base.filter(serial_number__icontains=q)
+            else:
+                qs = search_assets(base, q)
+            return qs.count(), list(qs[:10])
+
+        samples, total = [], 0
+        for _ in range(reps):
+            t0 = time.perf_counter()
+            total, _page = run()
+            samples.append((time.perf_counter() - t0) * 1000)
+        s = summarize(samples)
+        self.stdout.write(
+            f"{mode:<9} {label:<15} hits={total:<7} p50={s['p50_ms']:8.2f}ms p95={s['p95_ms']:8.2f}ms"
+        )
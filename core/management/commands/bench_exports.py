@@ -0,0 +1,83 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.benchutils import bench_database
+from core.exports import EXPORTS, iter_csv
+from core.models import Asset, AssetCategory, Part, PartStockMovement, Ticket
+
+
+class Command(BaseCommand):
+    help = "Measure peak Python memory of every CSV export at growing row counts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10000,100000",
+                            help="Comma separated row counts to seed per table; keep the smallest above "
+                                 "EXPORT_CHUNK_SIZE so every size streams more than one chunk")
+        parser.add_argument("--tolerance", type=float, default=2.0,
+                            help="Fail if peak memory at the largest size exceeds smallest × tolerance")
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(s) for s in options["sizes"].split(","))
+        with bench_database(keepdb=options["keepdb"]):
+            results = {}
+            seeded = 0
+            for size in sizes:
+                self._seed(seeded, size)
+                seeded = size
+                for name, (header, rows) in EXPORTS.items():
+                    results[(name, size)] = self._measure(header, rows)
+                    peak, elapsed, nbytes = results[(name, size)]
+                    self.stdout.write(
+                        f"{name:<10} rows={size:<9} peak={peak / 1024:>8.0f} KiB "
+                        f"time={elapsed:>6.2f}s size={nbytes / 1024:>9.0f} KiB"
+                    )
+
+        failed = []
+        for name in EXPORTS:
+            small, large = results[(name, sizes[0])][0], results[(name, sizes[-1])][0]
+            # +256 KiB เผื่อ noise ของ allocator ตอนที่ค่าเล็กมาก
+            if large > small * options["tolerance"] + 256 * 1024:
+                failed.append(f"{name}: {small / 1024:.0f} KiB -> {large / 1024:.0f} KiB")
+        if failed:
+            raise CommandError("peak memory grows with row count: " + "; ".join(failed))
+        self.stdout.write(self.style.SUCCESS("✅ peak memory flat across sizes"))
+
+    @staticmethod
+    def _measure(header, rows):
+        # วัดเส้นทางเดียวกับ run_export_jobs (row source -> iter_csv) ไม่รวม gzip
+        tracemalloc.start()
+        started = time.perf_counter()
+        nbytes = 0
+        for chunk in iter_csv(header, rows()):
+            nbytes += len(chunk)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak, elapsed, nbytes
+
+    @staticmethod
+    def _seed(start, stop, batch=5000):
+        """เติมข้อมูลให้ครบ stop แถวต่อ table (bulk_create ไม่ผ่าน signal)"""
+        category, _ = AssetCategory.objects.get_or_create(name="Bench")
+        if not Part.objects.exists():
+            Part.objects.bulk_create(Part(name=f"Part {i}", sku=f"BENCH-P{i:04d}") for i in range(50))
+        part_ids = list(Part.objects.values_list("id", flat=True))
+        now = timezone.now()
+
+        for lo in range(start, stop, batch):
+            hi = min(lo + batch, stop)
+            assets = Asset.objects.bulk_create(
+                Asset(asset_code=f"BENCH-{i:08d}", serial_number=f"SN{i}", category=category) for i in range(lo, hi)
+            )
+            tickets = Ticket.objects.bulk_create(
+                Ticket(ticket_no=f"BENCH-{i:08d}", asset=a, subject=f"Ticket {i}", description="-", due_at=now)
+                for i, a in zip(range(lo, hi), assets)
+            )
+            PartStockMovement.objects.bulk_create(
+                PartStockMovement(part_id=part_ids[i % len(part_ids)], movement_type="IN", qty=1, ref_ticket=t)
+                for i, t in zip(range(lo, hi), tickets)
+            )
@@ -0,0 +1,71 @@
+import time
+
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.benchutils import bench_database, summarize
+from core.models import Notification
+from core.notify import notifications_for, notify_broadcast, users_in_groups
+
+
+def fanout_notify_it(ntype, title, message="", url=""):
+    """แบบเดิม: หนึ่งแถวต่อ ADMIN/IT ทุกคน (ไว้เทียบเท่านั้น)"""
+    Notification.objects.bulk_create(
+        Notification(recipient=u, ntype=ntype, title=title, message=message, url=url)
+        for u in users_in_groups(["ADMIN", "IT"])
+    )
+
+
+class Command(BaseCommand):
+    help = "Compare fan-out vs broadcast notifications: rows written, write time and list latency"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--it-users", default="50,500", help="Comma separated IT headcounts")
+        parser.add_argument("--events", type=int, default=500, help="Broadcast events (new ticket / low stock)")
+        parser.add_argument("--reps", type=int, default=30, help="Timed list queries per case")
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        headcounts = [int(x) for x in options["it_users"].split(",")]
+        with bench_database(keepdb=options["keepdb"]):
+            it_group = Group.objects.create(name="IT")
+            for n in headcounts:
+                for mode in ("fanout", "broadcast"):
+                    self._case(it_group, n, mode, options)
+
+    def _case(self, it_group, headcount, mode, options):
+        Notification.objects.all().delete()
+        User.objects.filter(username__startswith="bench-").delete()
+        users = User.objects.bulk_create(User(username=f"bench-{i}") for i in range(headcount))
+        it_group.user_set.add(*users)
+        cache.clear()
+
+        write = fanout_notify_it if mode == "fanout" else (lambda *a, **kw: notify_broadcast("IT", *a, **kw))
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as ctx:
+            for i in range(options["events"]):
+                write(Notification.Type.TICKET_NEW, f"New Ticket: {i}", "bench", f"/tickets/{i}/")
+        write_s = time.perf_counter() - started
+        rows = Notification.objects.count()
+
+        reader = User.objects.get(pk=users[0].pk)
+        if mode == "fanout":
+            list_qs = lambda: Notification.objects.filter(recipient_id=reader.pk).order_by("-created_at")
+        else:
+            list_qs = lambda: notifications_for(reader)
+
+        samples = []
+        for _ in range(options["reps"] + 3):
+            t0 = time.perf_counter()
+            list(list_qs()[:20])
+            samples.append((time.perf_counter() - t0) * 1000)
+        stats = summarize(samples[3:])  # ตัด warmup
+
+        self.stdout.write(
+            f"{mode:<9} it_users={headcount:<5} events={options['events']:<5} rows={rows:<8} "
+            f"write={write_s:6.2f}s ({len(ctx.captured_queries)} queries) "
+            f"list p50={stats['p50_ms']:.2f}ms p95={stats['p95_ms']:.2f}ms"
+        )
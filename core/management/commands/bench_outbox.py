@@ -0,0 +1,91 @@
+import time
+
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.benchutils import bench_database, summarize, webhook_sink
+from core.models import Asset, AssetCategory, OutboxEvent, Part, PartStockMovement, Ticket
+from core.outbox import process_batch
+
+
+class Command(BaseCommand):
+    help = "Request latency of ticket/stock writes: inline delivery vs outbox + run_outbox worker"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=100, help="Requests per write kind")
+        parser.add_argument("--it-users", type=int, default=50)
+        parser.add_argument("--webhook-delay", type=float, default=50, help="Stand-in webhook latency (ms)")
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        with bench_database(keepdb=options["keepdb"]):
+            with webhook_sink(delay_ms=options["webhook_delay"]) as (url, received):
+                self._setup(options["it_users"])
+                for mode in ("inline", "outbox"):
+                    with override_settings(OUTBOX_INLINE=mode == "inline", OUTBOX_WEBHOOK_URLS=[url]):
+                        self._run(mode, options)
+                    received.clear()
+
+    def _setup(self, it_users):
+        it = Group.objects.create(name="IT")
+        Group.objects.create(name="EMPLOYEE")
+        techs = User.objects.bulk_create(User(username=f"bench-it-{i}") for i in range(it_users))
+        it.user_set.add(*techs)
+        self.tech = techs[0]
+        self.employee = User.objects.create(username="bench-emp")
+        self.asset = Asset.objects.create(
+            asset_code="BENCH-0001", category=AssetCategory.objects.create(name="Bench"), owner=self.employee,
+        )
+        # threshold สูงให้ทุก OUT เข้าเงื่อนไข low stock
+        self.part = Part.objects.create(name="Bench part", sku="BENCH-P", low_stock_threshold=10**9)
+        PartStockMovement.objects.create(part=self.part, movement_type="IN", qty=10**6)
+        OutboxEvent.objects.all().delete()
+
+    def _timed(self, client, path, data, samples):
+        t0 = time.perf_counter()
+        resp = client.post(path, data)
+        samples.append((time.perf_counter() - t0) * 1000)
+        if resp.status_code != 302:
+            raise RuntimeError(f"POST {path} -> {resp.status_code}")
+
+    def _run(self, mode, options):
+        cache.clear()
+        employee, tech = Client(), Client()
+        employee.force_login(self.employee)
+        tech.force_login(self.tech)
+        n = options["requests"]
+        ticket_form = {"asset": self.asset.pk, "subject": "bench", "description": "-", "priority": "MEDIUM"}
+
+        samples = {"ticket create": [], "ticket update": [], "stock OUT": []}
+        for i in range(n):
+            self._timed(employee, reverse("core:ticket_create"), ticket_form, samples["ticket create"])
+        ticket = Ticket.objects.latest("id")
+        for i in range(n):
+            self._timed(tech, reverse("core:ticket_update", args=[ticket.pk]), {
+                **ticket_form, "status": "IN_PROGRESS", "sla_hours": 24, "description": f"update {i}",
+            }, samples["ticket update"])
+        for i in range(n):
+            self._timed(tech, reverse("core:part_detail", args=[self.part.pk]),
+                        {"movement_type": "OUT", "qty": 1, "note": ""}, samples["stock OUT"])
+
+        for kind, values in samples.items():
+            s = summarize(values)
+            self.stdout.write(f"{mode:<7} {kind:<14} p50={s['p50_ms']:7.2f}ms p95={s['p95_ms']:7.2f}ms mean={s['mean_ms']:7.2f}ms")
+
+        if mode == "outbox":
+            started = time.perf_counter()
+            totals = {"notified": 0, "coalesced": 0, "delivered": 0, "failed": 0}
+            while True:
+                stats = process_batch(window=0)
+                if not any(stats.values()):
+                    break
+                for k, v in stats.items():
+                    totals[k] += v
+            self.stdout.write(
+                f"outbox  worker drained {OutboxEvent.objects.count()} events in "
+                f"{time.perf_counter() - started:.2f}s: " + " ".join(f"{k}={v}" for k, v in totals.items())
+            )
+        OutboxEvent.objects.all().delete()
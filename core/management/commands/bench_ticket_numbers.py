@@ -0,0 +1,74 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchutils import bench_database, run_threads
+from core.models import Asset, AssetCategory, Ticket
+
+
+class Command(BaseCommand):
+    help = "Create tickets from parallel threads and verify ticket numbers have no gaps or collisions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tickets", type=int, default=5000)
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--block", type=int, default=0,
+                            help="Also reserve numbers in blocks of this size via Ticket.reserve_ticket_nos")
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        with bench_database(keepdb=options["keepdb"]):
+            self._run(options)
+
+    def _run(self, options):
+        category = AssetCategory.objects.create(name="Bench")
+        asset = Asset.objects.create(asset_code="BENCH-0001", category=category)
+
+        def create(i):
+            try:
+                return Ticket.objects.create(asset=asset, subject=f"bench {i}", description="-").ticket_no
+            except Exception as e:  # นับเป็น error แทนการล้มทั้ง run
+                return e
+
+        results, elapsed = run_threads(create, range(options["tickets"]), options["threads"])
+        numbers = [r for r in results if isinstance(r, str)]
+        errors = [r for r in results if not isinstance(r, str)]
+        self.stdout.write(
+            f"created {len(numbers)} tickets in {elapsed:.2f}s "
+            f"({len(numbers) / elapsed:.0f}/s, {options['threads']} threads, {len(errors)} errors)"
+        )
+
+        if options["block"]:
+            blocks = max(1, options["tickets"] // options["block"])
+            reserved, b_elapsed = run_threads(
+                lambda _: Ticket.reserve_ticket_nos(options["block"]), range(blocks), options["threads"]
+            )
+            for block in reserved:
+                numbers.extend(block)
+            self.stdout.write(
+                f"reserved {blocks} blocks of {options['block']} in {b_elapsed:.2f}s "
+                f"({blocks * options['block'] / b_elapsed:.0f} numbers/s)"
+            )
+
+        problems = self._check(numbers)
+        for p in problems:
+            self.stdout.write(self.style.ERROR(p))
+        if errors or problems:
+            raise CommandError(f"{len(errors)} errors, {len(problems)} numbering problems")
+        self.stdout.write(self.style.SUCCESS(f"✅ {len(numbers)} numbers, no gaps or collisions"))
+
+    @staticmethod
+    def _check(numbers):
+        problems = []
+        if len(set(numbers)) != len(numbers):
+            problems.append(f"collisions: {len(numbers) - len(set(numbers))}")
+
+        by_day = defaultdict(list)
+        for n in numbers:
+            prefix, _, seq = n.rpartition("-")
+            by_day[prefix].append(int(seq))
+        for prefix, seqs in by_day.items():
+            missing = set(range(1, max(seqs) + 1)) - set(seqs)
+            if missing:
+                problems.append(f"{prefix}: {len(missing)} gaps, e.g. {sorted(missing)[:5]}")
+        return problems
@@ -0,0 +1,83 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from core.benchutils import bench_database, summarize
+from core.models import Asset, AssetCategory, Ticket
+from core.search import rebuild_ticket_index, search_tickets
+
+WORDS = (
+    "screen battery keyboard printer paper jam network wifi vpn outlook password reset monitor cable "
+    "dock charger fan noise overheating update driver install license scanner toner mouse audio camera "
+    "bluetooth disk backup restore slow crash freeze boot bios login account email calendar teams"
+).split()
+
+# คำทั่วไปที่ไม่ได้บอกอะไร (ให้ description ยาวพอ ๆ กับของจริง โดยคำค้นไม่ได้อยู่ทุกใบ)
+FILLER = [f"note{i}" for i in range(20_000)]
+
+QUERIES = ["screen", "batt", "vpn password", "toner", "IT-000042", "overheat fan", "zzz-nothing"]
+
+
+class Command(BaseCommand):
+    help = "Ticket search latency: icontains scan vs search index, on a generated ticket table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tickets", type=int, default=1_000_000)
+        parser.add_argument("--reps", type=int, default=20, help="Timed runs per query")
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        with bench_database(keepdb=options["keepdb"]):
+            self._seed(options["tickets"], options["batch_size"])
+            for q in QUERIES:
+                for mode in ("icontains", "index"):
+                    self._measure(mode, q, options["reps"])
+
+    def _seed(self, n, batch_size):
+        rnd = random.Random(7)
+        category = AssetCategory.objects.create(name="Bench")
+        assets = Asset.objects.bulk_create(
+            Asset(asset_code=f"IT-{i:06d}", category=category) for i in range(max(1, n // 20))
+        )
+        started = time.perf_counter()
+        for start in range(0, n, batch_size):
+            Ticket.objects.bulk_create(
+                Ticket(
+                    ticket_no=f"TCK-BENCH-{i:08d}",
+                    asset=assets[i % len(assets)],
+                    subject=" ".join(rnd.sample(WORDS, 3)),
+                    description=" ".join(rnd.choices(WORDS, k=2) + rnd.choices(FILLER, k=25)),
+                )
+                for i in range(start, min(n, start + batch_size))
+            )
+        seeded = time.perf_counter()
+        indexed = rebuild_ticket_index(batch_size=batch_size)
+        self.stdout.write(
+            f"seeded {n} tickets in {seeded - started:.1f}s, indexed {indexed} in {time.perf_counter() - seeded:.1f}s"
+        )
+
+    def _measure(self, mode, q, reps):
+        base = Ticket.objects.select_related("asset", "assigned_to", "requested_by", "vendor").order_by("-created_at")
+
+        def run():
+            if mode == "icontains":
+                # query เดิมของ TicketListView: count + หน้าแรก
+                qs = base.filter(
+                    Q(ticket_no__icontains=q) | Q(subject__icontains=q) | Q(asset__asset_code__icontains=q)
+                )
+                return qs.count(), list(qs[:10])
+            results = search_tickets(base, q)
+            return results.count(), list(results[:10])
+
+        samples, total = [], 0
+        for _ in range(reps):
+            t0 = time.perf_counter()
+            total, _page = run()
+            samples.append((time.perf_counter() - t0) * 1000)
+        s = summarize(samples)
+        self.stdout.write(
+            f"{mode:<9} q={q!r:<16} hits={total:<7} p50={s['p50_ms']:8.2f}ms p95={s['p95_ms']:8.2f}ms"
+        )
@@ -0,0 +1,143 @@
+import json
+import time
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.benchutils import bench_database, regressions, summarize
+from core.exports import EXPORTS, iter_csv
+from core.models import Part, PartStockMovement, Ticket
+
+# (role, url name, url kwargs, query string) -> label = "role name?query"
+VIEWS = [
+    ("it", "core:dashboard", {}, {}),
+    ("it", "core:my_dashboard", {}, {}),
+    ("employee", "core:my_dashboard", {}, {}),
+    ("it", "core:ticket_list", {}, {}),
+    ("it", "core:ticket_list", {}, {"status": "IN_PROGRESS"}),
+    ("it", "core:ticket_list", {}, {"mine": "1"}),
+    ("it", "core:ticket_list", {}, {"overdue": "1"}),
+    ("it", "core:ticket_list", {}, {"q": "printer"}),
+    ("employee", "core:ticket_list", {}, {}),
+    ("it", "core:ticket_detail", {"pk": "ticket"}, {}),
+    ("it", "core:asset_list", {}, {}),
+    ("it", "core:asset_list", {}, {"q": "thinkpad"}),
+    ("it", "core:part_list", {}, {}),
+    ("it", "core:part_detail", {"pk": "part"}, {}),
+    ("it", "core:low_stock", {}, {}),
+    ("it", "core:stock_report", {}, {}),
+    ("it", "core:movement_history", {}, {}),
+    ("it", "core:movement_history", {}, {"type": "OUT"}),
+    ("it", "core:notifications", {}, {}),
+    ("employee", "core:notifications", {}, {}),
+]
+
+
+class Command(BaseCommand):
+    help = "Time every key view and CSV export on a seeded database; save a JSON baseline or compare against one"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=float, default=0.01, help="seed_load scale (0.01 = 20k tickets)")
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--reps", type=int, default=20)
+        parser.add_argument("--save", metavar="PATH", help="Write the results as a JSON baseline")
+        parser.add_argument("--compare", metavar="PATH", help="Fail if a view regressed against this baseline")
+        parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p50 slowdown (0.25 = +25%%)")
+        parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                            help="Ignore slowdowns smaller than this many ms (noise on fast views)")
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as f:
+                baseline = json.load(f)
+
+        with bench_database(keepdb=options["keepdb"]):
+            started = time.perf_counter()
+            call_command("seed_load", scale=options["scale"], stdout=StringIO())
+            self.stdout.write(f"seeded scale={options['scale']} in {time.perf_counter() - started:.1f}s")
+            results = self._run(options["warmup"], options["reps"])
+
+        meta = {
+            "scale": options["scale"], "reps": options["reps"], "db": connection.vendor,
+            "at": timezone.now().isoformat(timespec="seconds"),
+        }
+        if options["save"]:
+            with open(options["save"], "w", encoding="utf-8") as f:
+                json.dump({"meta": meta, "results": results}, f, indent=2, sort_keys=True)
+            self.stdout.write(f"baseline written to {options['save']}")
+
+        if baseline is not None:
+            if baseline["meta"].get("scale") != meta["scale"] or baseline["meta"].get("db") != meta["db"]:
+                self.stdout.write(self.style.WARNING(
+                    f"⚠️ baseline was recorded with scale={baseline['meta'].get('scale')} "
+                    f"db={baseline['meta'].get('db')}; timings are not comparable"
+                ))
+            failed = regressions(baseline["results"], results, options["tolerance"], options["min_delta_ms"])
+            if failed:
+                raise CommandError(f"{len(failed)} regressions:\n  " + "\n  ".join(failed))
+            self.stdout.write(self.style.SUCCESS(f"✅ {len(results)} benchmarks within tolerance of the baseline"))
+
+    def _run(self, warmup, reps) -> dict:
+        it_user = User.objects.filter(groups__name="IT").order_by("pk").first()
+        employee = (
+            User.objects.filter(groups__name="EMPLOYEE", tickets_requested__isnull=False).order_by("pk").first()
+        )
+        clients = {}
+        for role, user in (("it", it_user), ("employee", employee)):
+            clients[role] = Client()
+            clients[role].force_login(user)
+        # ticket/part ที่มีประวัติเบิกอะไหล่ (หน้า detail ที่หนักที่สุด)
+        last_use = PartStockMovement.objects.filter(ref_ticket__isnull=False).order_by("-id").first()
+        objects = {
+            "ticket": last_use.ref_ticket_id if last_use else Ticket.objects.order_by("-id").values_list("pk", flat=True)[0],
+            "part": last_use.part_id if last_use else Part.objects.values_list("pk", flat=True)[0],
+        }
+
+        results = {}
+        for role, name, kwargs, params in VIEWS:
+            url = reverse(name, kwargs={k: objects[v] for k, v in kwargs.items()})
+            label = f"{role} {name}" + (f"?{'&'.join(f'{k}={v}' for k, v in params.items())}" if params else "")
+
+            def get(client=clients[role], url=url, params=params):
+                resp = client.get(url, params)
+                if resp.status_code != 200:
+                    raise CommandError(f"GET {url} -> {resp.status_code}")
+
+            results[label] = self._measure(label, get, warmup, reps)
+
+        for kind, (header, rows) in EXPORTS.items():
+            # เส้นทางเดียวกับ run_export_jobs (row source -> CSV) ไม่รวม gzip/เขียนไฟล์
+            def export(header=header, rows=rows):
+                for _chunk in iter_csv(header, rows()):
+                    pass
+
+            results[f"export {kind}"] = self._measure(f"export {kind}", export, warmup, max(3, reps // 5))
+        return results
+
+    def _measure(self, label, fn, warmup, reps) -> dict:
+        for _ in range(warmup):
+            fn()
+        with CaptureQueriesContext(connection) as ctx:
+            fn()
+        # นับทันที: request ถัดไปล้าง connection.queries (request_started -> reset_queries)
+        queries = len(ctx.captured_queries)
+        samples = []
+        for _ in range(reps):
+            t0 = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - t0) * 1000)
+        s = summarize(samples)
+        result = {"p50_ms": s["p50_ms"], "p95_ms": s["p95_ms"], "queries": queries}
+        self.stdout.write(
+            f"{label:<48} p50={s['p50_ms']:8.2f}ms p95={s['p95_ms']:8.2f}ms queries={result['queries']}"
+        )
+        return result
@@ -0,0 +1,81 @@
+import sys
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.imports import IMPORT_BATCH_SIZE, IMPORT_FORMATS, guess_format, import_assets, read_rows
+
+
+class Command(BaseCommand):
+    help = "Create or update assets by asset_code from CSV / JSON / JSON lines (columns: see core/imports.ASSET_IMPORT_HEADER)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for stdin (needs --format)")
+        parser.add_argument("--format", choices=IMPORT_FORMATS, help="Default: from the file extension")
+        parser.add_argument("--user", help="Username recorded as changed_by / in the audit log")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Print what would change, write nothing")
+        parser.add_argument("--show", type=int, default=20, help="Changed assets and row errors to list")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            fmt = options["format"] or guess_format(path)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        user = None
+        if options["user"]:
+            user = User.objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"unknown user {options['user']}")
+
+        def progress(result):
+            if options["verbosity"] >= 2:
+                self.stdout.write(
+                    f"batch {result.batches}: {result.created} new, {result.updated} changed, "
+                    f"{result.unchanged} unchanged, {len(result.errors)} errors"
+                )
+
+        started = time.perf_counter()
+        stream = sys.stdin if path == "-" else open(path, encoding="utf-8-sig", newline="")
+        try:
+            result = import_assets(
+                read_rows(stream, fmt), user=user, batch_size=options["batch_size"],
+                dry_run=options["dry_run"], progress=progress,
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        elapsed = time.perf_counter() - started
+
+        show = options["show"]
+        for row_no, code, diff in result.diffs[:show]:
+            if not diff:
+                self.stdout.write(f"+ {code} (row {row_no})")
+                continue
+            changes = ", ".join(f"{column}: {old or '-'} -> {new or '-'}" for column, (old, new) in diff.items())
+            self.stdout.write(f"~ {code} (row {row_no}) {changes}")
+        listed = min(show, len(result.diffs))
+        if result.created + result.updated > listed:
+            self.stdout.write(f"... {result.created + result.updated - listed} more changed assets")
+
+        for row_no, message in result.errors[:show]:
+            self.stdout.write(self.style.WARNING(f"row {row_no}: {message}"))
+        if len(result.errors) > show:
+            self.stdout.write(self.style.WARNING(f"... {len(result.errors) - show} more errors"))
+
+        if result.changes:
+            fields = ", ".join(f"{field.removesuffix('_id')} {n}" for field, n in result.changes.most_common())
+            self.stdout.write(f"changed fields: {fields}")
+
+        create, update = ("would create", "update") if options["dry_run"] else ("created", "updated")
+        style = self.style.SUCCESS if not result.errors else self.style.WARNING
+        self.stdout.write(style(
+            f"✅ {create} {result.created}, {update} {result.updated}, unchanged {result.unchanged} "
+            f"of {result.rows} assets in {elapsed:.1f}s, {len(result.errors)} rejected"
+        ))
+        if result.stopped_at:
+            # upsert ตาม asset_code: แก้ไฟล์แล้วรันซ้ำทั้งไฟล์ได้เลย
+            raise CommandError(f"stopped at row {result.stopped_at}: {result.errors[-1][1]}")
@@ -0,0 +1,67 @@
+import sys
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.imports import IMPORT_BATCH_SIZE, IMPORT_FORMATS, guess_format, import_tickets, read_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk import tickets from CSV / JSON / JSON lines (columns: see core/imports.IMPORT_HEADER)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for stdin (needs --format)")
+        parser.add_argument("--format", choices=IMPORT_FORMATS, help="Default: from the file extension")
+        parser.add_argument("--user", help="Username recorded in the audit log and used when requested_by is empty")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Validate only, write nothing")
+        parser.add_argument("--max-errors", type=int, default=20, help="Row errors to print")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            fmt = options["format"] or guess_format(path)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        user = None
+        if options["user"]:
+            user = User.objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"unknown user {options['user']}")
+
+        def progress(result):
+            if options["verbosity"] >= 2:
+                self.stdout.write(f"batch {result.batches}: {result.created} ok, {len(result.errors)} errors")
+
+        started = time.perf_counter()
+        stream = sys.stdin if path == "-" else open(path, encoding="utf-8-sig", newline="")
+        try:
+            result = import_tickets(
+                read_rows(stream, fmt), user=user, batch_size=options["batch_size"],
+                dry_run=options["dry_run"], progress=progress,
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        elapsed = time.perf_counter() - started
+
+        for row_no, message in result.errors[:options["max_errors"]]:
+            self.stdout.write(self.style.WARNING(f"row {row_no}: {message}"))
+        if len(result.errors) > options["max_errors"]:
+            self.stdout.write(self.style.WARNING(f"... {len(result.errors) - options['max_errors']} more errors"))
+
+        verb = "would import" if options["dry_run"] else "imported"
+        numbers = f" ({result.first_ticket_no} .. {result.last_ticket_no})" if result.first_ticket_no else ""
+        style = self.style.SUCCESS if not result.errors else self.style.WARNING
+        self.stdout.write(style(
+            f"✅ {verb} {result.created} of {result.rows} tickets{numbers} in {elapsed:.1f}s "
+            f"({result.rows / elapsed if elapsed else 0:,.0f} rows/s), {len(result.errors)} rejected"
+        ))
+        if result.stopped_at:
+            # batch ก่อนหน้า commit ไปแล้ว: import ไฟล์เดิมซ้ำทั้งไฟล์จะได้ ticket ซ้ำ
+            raise CommandError(
+                f"stopped at row {result.stopped_at}: {result.errors[-1][1]}. "
+                f"Rows before it were {verb}{numbers}; fix the file and import only row {result.stopped_at} onwards"
+            )
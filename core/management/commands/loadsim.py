@@ -0,0 +1,272 @@
+import json
+import random
+import threading
+import time
+from collections import Counter
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.cookiejar import Cookie, CookieJar
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import Client
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+
+from core.benchutils import bench_database, percentile, run_threads
+from core.models import Asset, PartStockBalance, Ticket
+
+ROLES = {"employee": "EMPLOYEE", "it": "IT", "manager": "MANAGER"}
+
+
+# -----------------------
+# Sessions (ยิงผ่าน WSGI ใน process หรือ HTTP ไปยัง server จริง)
+# -----------------------
+def login_cookie(user) -> str:
+    """สร้าง session ใน session store ที่ใช้ร่วมกับ server (เหมือน Client.force_login) คืนค่า cookie"""
+    client = Client()
+    client.force_login(user)
+    return client.cookies[settings.SESSION_COOKIE_NAME].value
+
+
+class WsgiSession:
+    def __init__(self, user):
+        self.client = Client()
+        self.client.force_login(user)
+
+    def request(self, method, path, data=None):
+        resp = getattr(self.client, method)(path, data or {})
+        return resp.status_code, resp.get("Location", "")
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    def __init__(self, user, base_url, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        host = urllib.parse.urlsplit(self.base_url).hostname
+        # csrftoken ตั้งเอง: Django รับ secret แบบไม่ mask ใน X-CSRFToken ได้
+        self.csrf = get_random_string(32)
+        jar = CookieJar()
+        for name, value in ((settings.SESSION_COOKIE_NAME, login_cookie(user)), (settings.CSRF_COOKIE_NAME, self.csrf)):
+            jar.set_cookie(Cookie(0, name, value, None, False, host, False, False, "/", True, False, None, False,
+                                  None, None, {}))
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar), _NoRedirect)
+
+    def request(self, method, path, data=None):
+        url = self.base_url + path
+        body = None
+        if method == "get" and data:
+            url += "?" + urllib.parse.urlencode(data)
+        elif method == "post":
+            body = urllib.parse.urlencode(data or {}).encode()
+        req = urllib.request.Request(url, data=body, method=method.upper(), headers={"X-CSRFToken": self.csrf})
+        try:
+            with self.opener.open(req, timeout=self.timeout) as resp:
+                resp.read()
+                return resp.status, ""
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code, e.headers.get("Location", "")
+
+
+# -----------------------
+# Scenarios: name -> (weight, role, fn(rnd) -> [(method, path, data)])
+# fn คืน request ที่ต้องยิง (เลือก ticket/asset จาก DB นอกช่วงที่จับเวลา); [] = ข้ามรอบนี้ (skip)
+# -----------------------
+def _pick(qs, rnd, n=200):
+    ids = list(qs.values_list("pk", flat=True)[:n])
+    return rnd.choice(ids) if ids else None
+
+
+def create_ticket(rnd):
+    asset = _pick(Asset.objects.filter(status="IN_USE").order_by("-id"), rnd, 1000)
+    return [("post", reverse("core:ticket_create"), {
+        "asset": asset, "subject": f"loadsim {rnd.getrandbits(32):08x}", "description": "printer paper jam",
+        "priority": rnd.choice(["LOW", "MEDIUM", "HIGH"]),
+    })]
+
+
+def _ticket_action(status, name):
+    def scenario(rnd):
+        pk = _pick(Ticket.objects.filter(status=status).order_by("-created_at"), rnd)
+        return [("post", reverse(name, kwargs={"pk": pk}), {})] if pk else []
+    return scenario
+
+
+def use_part(rnd):
+    ticket = _pick(Ticket.objects.filter(status="IN_PROGRESS").order_by("-created_at"), rnd)
+    part = _pick(PartStockBalance.objects.filter(balance__gte=5).order_by("part_id"), rnd)
+    if not (ticket and part):
+        return []
+    return [("post", reverse("core:ticket_detail", kwargs={"pk": ticket}),
+             {"use_part": "1", "part": part, "qty": 1, "note": "loadsim"})]
+
+
+def _get(name, **params):
+    return lambda rnd: [("get", reverse(name), params)]
+
+
+def view_ticket(rnd):
+    pk = _pick(Ticket.objects.order_by("-created_at"), rnd)
+    return [("get", reverse("core:ticket_detail", kwargs={"pk": pk}), {})]
+
+
+SCENARIOS = {
+    "create_ticket": (25, "employee", create_ticket),
+    "my_dashboard": (15, "employee", _get("core:my_dashboard")),
+    "assign_to_me": (8, "it", _ticket_action("NEW", "core:ticket_assign_to_me")),
+    "start": (8, "it", _ticket_action("ASSIGNED", "core:ticket_start")),
+    "resolve": (8, "it", _ticket_action("IN_PROGRESS", "core:ticket_resolve")),
+    "use_part": (6, "it", use_part),
+    "ticket_list": (10, "it", _get("core:ticket_list")),
+    "ticket_detail": (8, "it", view_ticket),
+    "dashboard": (8, "manager", _get("core:dashboard")),
+    "export_tickets": (2, "manager", _get("core:export_tickets_csv")),
+    "export_movements": (2, "manager", _get("core:export_movements_csv")),
+}
+
+
+class Command(BaseCommand):
+    help = "Run a weighted mix of user scenarios from concurrent virtual users and report latency per scenario"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50, help="Virtual users (threads)")
+        parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+        parser.add_argument("--think-ms", type=float, default=0, help="Pause between actions of one virtual user")
+        parser.add_argument("--url", help="Base URL of a running server (default: call the WSGI app in-process)")
+        parser.add_argument("--timeout", type=float, default=30, help="HTTP timeout (--url only)")
+        parser.add_argument("--only", help="Comma separated scenario names (default: the full mix)")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--seed-scale", type=float,
+                            help="Run on a throw-away database loaded with seed_load at this scale")
+        parser.add_argument("--json", metavar="PATH", help="Also write the report as JSON")
+
+    def handle(self, *args, **options):
+        names = options["only"].split(",") if options["only"] else list(SCENARIOS)
+        unknown = set(names) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"unknown scenarios: {', '.join(sorted(unknown))} (choose from {', '.join(SCENARIOS)})")
+        mix = {name: SCENARIOS[name] for name in names}
+
+        if options["seed_scale"]:
+            if options["url"]:
+                raise CommandError("--seed-scale runs in-process; it cannot be combined with --url")
+            with bench_database():
+                call_command("seed_load", scale=options["seed_scale"], stdout=StringIO())
+                report = self._simulate(mix, options)
+        else:
+            report = self._simulate(mix, options)
+
+        self._print(report)
+        if options["json"]:
+            with open(options["json"], "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+
+    # -----------------------
+    def _simulate(self, mix, options) -> dict:
+        people = {}
+        for role, group in ROLES.items():
+            people[role] = list(User.objects.filter(groups__name=group, is_active=True).order_by("pk")[:1000])
+            if not people[role] and any(r == role for _, r, _ in mix.values()):
+                raise CommandError(f"no active users in group {group} (load data with seed_load first)")
+
+        def session(user):
+            if options["url"]:
+                return HttpSession(user, options["url"], options["timeout"])
+            return WsgiSession(user)
+
+        names = list(mix)
+        weights = [mix[n][0] for n in names]
+        deadline = time.monotonic() + options["duration"]
+        lock = threading.Lock()
+        samples = {n: [] for n in names}
+        errors = {n: Counter() for n in names}
+        skipped = {n: 0 for n in names}
+
+        def virtual_user(i):
+            rnd = random.Random(options["seed"] * 100_003 + i)
+            # แต่ละ virtual user login เป็นคนละคนตาม role (วนซ้ำถ้าคนไม่พอ)
+            sessions = {role: session(users[i % len(users)]) for role, users in people.items() if users}
+            while time.monotonic() < deadline:
+                name = rnd.choices(names, weights)[0]
+                _weight, role, scenario = mix[name]
+                requests = scenario(rnd)
+                if not requests:
+                    skipped[name] += 1  # ยังไม่มี ticket ใน status ที่ต้องใช้
+                    continue
+                error = None
+                started = time.perf_counter()
+                for method, path, data in requests:
+                    try:
+                        status, location = sessions[role].request(method, path, data)
+                        if status >= 400:
+                            error = error or f"HTTP {status}"
+                        elif location.startswith(settings.LOGIN_URL):
+                            error = error or "redirected to login"  # session หลุด / ไม่มีสิทธิ์
+                    except Exception as e:  # noqa: BLE001 - นับเป็น error แล้วยิงต่อ
+                        error = error or f"{type(e).__name__}: {str(e)[:80]}"
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    samples[name].append(elapsed)
+                    if error:
+                        errors[name][error] += 1
+                if options["think_ms"]:
+                    time.sleep(options["think_ms"] / 1000)
+                close_old_connections()
+
+        _, elapsed = run_threads(virtual_user, range(options["users"]), options["users"])
+
+        scenarios = {}
+        for name in names:
+            s = samples[name]
+            failed = sum(errors[name].values())
+            scenarios[name] = {
+                "count": len(s),
+                "errors": failed,
+                "error_rate": round(failed / len(s), 4) if s else 0.0,
+                "error_kinds": dict(errors[name].most_common(5)),
+                "skipped": skipped[name],
+                "rps": round(len(s) / elapsed, 2),
+                "p50_ms": round(percentile(s, 50), 2),
+                "p95_ms": round(percentile(s, 95), 2),
+                "p99_ms": round(percentile(s, 99), 2),
+                "max_ms": round(max(s), 2) if s else 0.0,
+            }
+        total = sum(v["count"] for v in scenarios.values())
+        return {
+            "target": options["url"] or "wsgi",
+            "users": options["users"],
+            "seconds": round(elapsed, 2),
+            "requests": total,
+            "rps": round(total / elapsed, 2),
+            "errors": sum(v["errors"] for v in scenarios.values()),
+            "scenarios": scenarios,
+        }
+
+    def _print(self, report):
+        self.stdout.write(
+            f"{'scenario':<18} {'count':>7} {'skip':>5} {'err%':>6} {'rps':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"
+        )
+        for name, s in report["scenarios"].items():
+            self.stdout.write(
+                f"{name:<18} {s['count']:>7} {s['skipped']:>5} {s['error_rate'] * 100:>5.1f}% {s['rps']:>7.1f} "
+                f"{s['p50_ms']:>7.1f}ms {s['p95_ms']:>7.1f}ms {s['p99_ms']:>7.1f}ms {s['max_ms']:>7.1f}ms"
+            )
+        for name, s in report["scenarios"].items():
+            for kind, n in s["error_kinds"].items():
+                self.stdout.write(self.style.WARNING(f"  {name}: {n}× {kind}"))
+        style = self.style.SUCCESS if not report["errors"] else self.style.WARNING
+        self.stdout.write(style(
+            f"{report['requests']} actions in {report['seconds']}s from {report['users']} users "
+            f"({report['rps']} actions/s, {report['errors']} errors) against {report['target']}"
+        ))
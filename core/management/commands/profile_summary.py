@@ -0,0 +1,46 @@
+import pstats
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchutils import summarize
+from core.profiling import profile_files
+
+SORT_KEYS = ["cumulative", "tottime", "ncalls"]
+
+
+class Command(BaseCommand):
+    help = "Top functions across the captured request profiles (PROFILE_DIR) of one view"
+
+    def add_arguments(self, parser):
+        parser.add_argument("view", nargs="?", help="URL name, e.g. core:ticket_detail (omit to list views)")
+        parser.add_argument("--limit", type=int, default=25, help="Functions to show")
+        parser.add_argument("--sort", choices=SORT_KEYS, default="cumulative")
+        parser.add_argument("--last", type=int, default=0, help="Only the newest N profiles")
+
+    def handle(self, *args, **options):
+        if not settings.PROFILE_DIR:
+            raise CommandError("PROFILE_DIR is not set")
+
+        if not options["view"]:
+            counts = {}
+            for path in profile_files():
+                counts[path.parent.name] = counts.get(path.parent.name, 0) + 1
+            for name, n in sorted(counts.items(), key=lambda kv: -kv[1]):
+                self.stdout.write(f"{n:6d}  {name.replace('_', ':', 1)}")
+            return
+
+        files = profile_files(options["view"])
+        if options["last"]:
+            files = files[-options["last"]:]
+        if not files:
+            raise CommandError(f"no profiles for {options['view']}")
+
+        ms = [int(m.group(1)) for f in files for m in [re.search(r"-(\d+)ms\.pstats$", f.name)] if m]
+        s = summarize(ms)
+        self.stdout.write(
+            f"{options['view']}: {len(files)} profiles, request p50={s['p50_ms']:.0f}ms p95={s['p95_ms']:.0f}ms"
+        )
+        stats = pstats.Stats(*map(str, files), stream=self.stdout)
+        stats.strip_dirs().sort_stats(options["sort"]).print_stats(options["limit"])
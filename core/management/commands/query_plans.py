@@ -0,0 +1,212 @@
+import random
+import re
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.benchutils import bench_database
+from core.export_jobs import data_version
+from core.exports import EXPORTS
+from core.models import (
+    Asset, AssetCategory, AuditLog, Department, Location, Notification, Part, PartStockBalance,
+    PartStockMovement, Ticket,
+)
+from core.querylog import shape
+
+# ตาราง lookup เล็ก ๆ ที่ scan ทั้งตารางได้ไม่เป็นปัญหา
+# (core_part = catalog หลักร้อย-พัน SKU; low stock เทียบ balance กับ threshold คนละตารางจึงใช้ index ไม่ได้อยู่แล้ว)
+SMALL_TABLES = {"auth_group", "core_assetcategory", "core_department", "core_location", "core_vendor", "core_part"}
+
+# (user, url name, url kwargs, query string) ทุกหน้า list / dashboard
+PAGES = [
+    ("it", "core:dashboard", {}, {}),
+    ("it", "core:my_dashboard", {}, {}),
+    ("employee", "core:my_dashboard", {}, {}),
+    ("it", "core:ticket_list", {}, {}),
+    ("it", "core:ticket_list", {}, {"status": "IN_PROGRESS"}),
+    ("it", "core:ticket_list", {}, {"mine": "1"}),
+    ("it", "core:ticket_list", {}, {"overdue": "1"}),
+    ("employee", "core:ticket_list", {}, {}),
+    ("it", "core:ticket_detail", {"pk": "ticket"}, {}),
+    ("it", "core:asset_list", {}, {}),
+    ("it", "core:asset_detail", {"pk": "asset"}, {}),
+    ("it", "core:part_list", {}, {}),
+    ("it", "core:part_detail", {"pk": "part"}, {}),
+    ("it", "core:low_stock", {}, {}),
+    ("it", "core:movement_history", {}, {}),
+    ("it", "core:movement_history", {}, {"type": "OUT", "from": "2020-01-01", "to": "2020-01-31"}),
+    ("it", "core:stock_report", {}, {}),
+    ("it", "core:notifications", {}, {}),
+]
+
+
+def explain(sql: str) -> list[str]:
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # ปิด seq scan: ถ้ายังได้ Seq Scan แปลว่าไม่มี index ที่ใช้ได้เลย
+            cursor.execute("SET enable_seqscan = off")
+            cursor.execute("EXPLAIN " + sql)
+            return [row[0] for row in cursor.fetchall()]
+        cursor.execute("EXPLAIN QUERY PLAN " + sql)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def seq_scans(plan: list[str]) -> set[str]:
+    if connection.vendor == "postgresql":
+        return {m.group(1) for line in plan for m in [re.search(r"Seq Scan on (\w+)", line)] if m}
+    scans = set()
+    for line in plan:
+        # sqlite: "SCAN t" = อ่านทั้งตาราง, "SCAN t USING INDEX ..." / "SEARCH ..." = ใช้ index
+        m = re.match(r"\s*SCAN (\w+)", line)
+        if m and "USING" not in line and m.group(1) not in {"CONSTANT", "SUBQUERY"}:
+            scans.add(m.group(1))
+    return scans
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN every list/dashboard/export query on a seeded database and fail on sequential scans"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tickets", type=int, default=20000, help="Seeded tickets (other tables scale from it)")
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        if connection.vendor not in {"postgresql", "sqlite"}:
+            raise CommandError(f"query_plans supports postgresql and sqlite, not {connection.vendor}")
+
+        with bench_database(keepdb=options["keepdb"]):
+            self._seed(options["tickets"])
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+            failures = 0
+            queries = self._collect()
+            for label, sql in queries:
+                plan = explain(sql)
+                scans = seq_scans(plan) - SMALL_TABLES
+                if scans:
+                    failures += 1
+                    self.stdout.write(self.style.ERROR(f"✗ {label}: seq scan on {', '.join(sorted(scans))}"))
+                elif options["verbosity"] >= 2:
+                    self.stdout.write(f"✓ {label}")
+                if scans or options["verbosity"] >= 2:
+                    self.stdout.write(f"    {sql[:300]}")
+                    for line in plan:
+                        self.stdout.write(f"      {line}")
+
+        if failures:
+            raise CommandError(f"{failures} of {len(queries)} queries fall back to a sequential scan")
+        self.stdout.write(self.style.SUCCESS(f"✅ {len(queries)} queries, all use an index"))
+
+    # -----------------------
+    # Queries
+    # -----------------------
+    def _collect(self):
+        """คืน [(label, sql)] ไม่ซ้ำกัน จากการเปิดทุกหน้าจริง + export row source + query ad-hoc"""
+        seen, queries = set(), []
+
+        def capture(label, fn):
+            with CaptureQueriesContext(connection) as ctx:
+                fn()
+            for i, q in enumerate(ctx.captured_queries):
+                sql = q["sql"]
+                # dedupe query รูปเดียวกัน (ค่าต่างกัน)
+                key = shape(sql)
+                if not sql.lstrip().upper().startswith("SELECT") or key in seen:
+                    continue
+                seen.add(key)
+                queries.append((f"{label} #{i + 1}", sql))
+
+        clients = {}
+        for role, user in (("it", self.it_user), ("employee", self.employee)):
+            clients[role] = Client()
+            clients[role].force_login(user)
+
+        for role, name, kwargs, params in PAGES:
+            url = reverse(name, kwargs={k: getattr(self, v).pk for k, v in kwargs.items()})
+            label = f"{role} {name}" + (f"?{'&'.join(f'{k}={v}' for k, v in params.items())}" if params else "")
+
+            def get(client=clients[role], url=url, params=params):
+                resp = client.get(url, params)
+                if resp.status_code != 200:
+                    raise CommandError(f"GET {url} -> {resp.status_code}")
+                # keyset pagination: หน้าถัดไป (WHERE created_at <= ...) ต้องใช้ index เหมือนหน้าแรก
+                nxt = re.search(r'cursor=([\w-]+)">Next', resp.content.decode())
+                if nxt:
+                    client.get(url, {**params, "cursor": nxt.group(1)})
+
+            capture(label, get)
+
+        since = timezone.now() - timedelta(days=1)
+        for kind, (_header, rows) in EXPORTS.items():
+            capture(f"export {kind}", lambda rows=rows: list(islice(rows(), 100)))
+            capture(f"export {kind} since", lambda rows=rows: list(islice(rows(since), 100)))
+            # อยู่บน request thread ทุกครั้งที่ขอ export
+            capture(f"export {kind} version", lambda kind=kind: data_version(kind))
+
+        capture("audit history", lambda: list(
+            AuditLog.objects.filter(object_type="Ticket", object_id=str(self.ticket.pk))[:20]
+        ))
+        capture("unread direct", lambda: Notification.objects.filter(recipient=self.it_user, is_read=False).count())
+        return queries
+
+    # -----------------------
+    # Seed
+    # -----------------------
+    def _seed(self, n_tickets):
+        rnd = random.Random(42)
+        it = Group.objects.create(name="IT")
+        Group.objects.create(name="EMPLOYEE")
+        users = User.objects.bulk_create(User(username=f"user{i}") for i in range(max(50, n_tickets // 100)))
+        self.it_user, self.employee = users[0], users[1]
+        it.user_set.add(*users[:10])
+
+        categories = AssetCategory.objects.bulk_create(AssetCategory(name=f"Category {i}") for i in range(10))
+        depts = Department.objects.bulk_create(Department(name=f"Dept {i}") for i in range(10))
+        locs = Location.objects.bulk_create(Location(name=f"Floor {i}") for i in range(20))
+        assets = Asset.objects.bulk_create(
+            Asset(asset_code=f"IT-{i:06d}", serial_number=f"SN{i:08d}", category=rnd.choice(categories),
+                  department=rnd.choice(depts), location=rnd.choice(locs), owner=rnd.choice(users))
+            for i in range(max(100, n_tickets // 10))
+        )
+        self.asset = assets[0]
+
+        statuses = [s for s, _ in Ticket.Status.choices]
+        now = timezone.now()
+        tickets = Ticket.objects.bulk_create(
+            Ticket(
+                ticket_no=f"TCK-SEED-{i:07d}", asset=rnd.choice(assets), subject=f"seed {i}", description="-",
+                status=rnd.choice(statuses), requested_by=rnd.choice(users),
+                assigned_to=rnd.choice(users[:10]) if rnd.random() < 0.7 else None,
+                due_at=now + timedelta(hours=rnd.randint(-500, 500)),
+            )
+            for i in range(n_tickets)
+        )
+        self.ticket = tickets[0]
+
+        parts = Part.objects.bulk_create(
+            Part(name=f"Part {i}", sku=f"SKU-{i:05d}", low_stock_threshold=rnd.randint(0, 20)) for i in range(500)
+        )
+        self.part = parts[0]
+        PartStockBalance.objects.bulk_create(PartStockBalance(part=p, balance=rnd.randint(0, 100)) for p in parts)
+        PartStockMovement.objects.bulk_create(
+            PartStockMovement(part=rnd.choice(parts), movement_type=rnd.choice(["IN", "OUT"]), qty=1,
+                              ref_ticket=rnd.choice(tickets), created_by=self.it_user)
+            for _ in range(n_tickets)
+        )
+        Notification.objects.bulk_create(
+            Notification(recipient=rnd.choice(users), ntype=Notification.Type.TICKET_UPDATE, title="seed",
+                         is_read=rnd.random() < 0.8)
+            for _ in range(n_tickets)
+        )
+        AuditLog.objects.bulk_create(
+            AuditLog(action="UPDATE_TICKET", object_type="Ticket", object_id=str(t.pk), summary=t.ticket_no)
+            for t in tickets
+        )
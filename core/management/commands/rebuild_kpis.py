@@ -0,0 +1,53 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.kpi import expected_asset_tickets, expected_counters
+from core.models import AssetTicketCount, KpiCounter
+
+
+class Command(BaseCommand):
+    help = "Recompute the dashboard KPI snapshot (KpiCounter, AssetTicketCount) from tickets and assets"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report drift without fixing it")
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+
+        with transaction.atomic():
+            expected = {k: Decimal(v) for k, v in expected_counters().items() if v}
+            stored = {k: v for k, v in KpiCounter.objects.values_list("name", "value") if v}
+            counters_drift = self._report("kpi", stored, expected)
+
+            expected_assets = expected_asset_tickets()
+            stored_assets = dict(AssetTicketCount.objects.filter(tickets__gt=0).values_list("asset_id", "tickets"))
+            assets_drift = self._report("asset", stored_assets, expected_assets)
+
+            if not dry_run and (counters_drift or assets_drift):
+                # แทนทั้งชุด (ตัด key ที่เป็น 0 เช่น due bucket ที่ปิดหมดแล้วทิ้งไปด้วย)
+                KpiCounter.objects.all().delete()
+                KpiCounter.objects.bulk_create(
+                    [KpiCounter(name=k, value=v) for k, v in expected.items()], batch_size=1000
+                )
+                AssetTicketCount.objects.all().delete()
+                AssetTicketCount.objects.bulk_create(
+                    [AssetTicketCount(asset_id=a, tickets=n) for a, n in expected_assets.items()], batch_size=1000
+                )
+
+        drift = counters_drift + assets_drift
+        if drift == 0:
+            self.stdout.write(self.style.SUCCESS(f"✅ {len(expected)} counters, {len(expected_assets)} assets, no drift"))
+        elif dry_run:
+            self.stdout.write(self.style.WARNING(f"⚠️ {drift} values drifted (dry run, nothing changed)"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ {drift} values drifted and were rebuilt"))
+
+    def _report(self, label, stored, expected) -> int:
+        drift = 0
+        for key in sorted(stored.keys() | expected.keys(), key=str):
+            if stored.get(key, 0) != expected.get(key, 0):
+                drift += 1
+                self.stdout.write(f"{label} {key}: stored={stored.get(key, 0)} expected={expected.get(key, 0)}")
+        return drift
@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, IntegerField, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.models import Part, PartStockBalance, PartStockMovement
+
+
+def _sum_of(movement_type):
+    return Coalesce(
+        Sum(Case(When(movement_type=movement_type, then="qty"), default=Value(0), output_field=IntegerField())),
+        0,
+    )
+
+
+def ledger_totals(part_ids):
+    """{part_id: (in_qty, out_qty, adjust_qty)} คำนวณจาก PartStockMovement โดยตรง"""
+    rows = (
+        PartStockMovement.objects.filter(part_id__in=part_ids)
+        .order_by()
+        .values("part_id")
+        .annotate(in_qty=_sum_of("IN"), out_qty=_sum_of("OUT"), adjust_qty=_sum_of("ADJUST"))
+    )
+    return {r["part_id"]: (r["in_qty"], r["out_qty"], r["adjust_qty"]) for r in rows}
+
+
+class Command(BaseCommand):
+    help = "Recompute PartStockBalance from the movement ledger and report drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report drift without fixing it")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        batch_size = options["batch_size"]
+
+        part_ids = list(Part.objects.order_by("id").values_list("id", flat=True))
+        drift = 0
+
+        for i in range(0, len(part_ids), batch_size):
+            batch = part_ids[i:i + batch_size]
+            with transaction.atomic():
+                # lock balance rows ของ batch นี้ กัน movement ใหม่แทรกระหว่างคำนวณ
+                stored = {
+                    b.part_id: b
+                    for b in PartStockBalance.objects.select_for_update().filter(part_id__in=batch)
+                }
+                totals = ledger_totals(batch)
+
+                to_create, to_update = [], []
+                for part_id in batch:
+                    in_qty, out_qty, adjust_qty = totals.get(part_id, (0, 0, 0))
+                    expected = (in_qty, out_qty, adjust_qty, in_qty - out_qty)
+                    row = stored.get(part_id)
+                    current = (row.in_qty, row.out_qty, row.adjust_qty, row.balance) if row else None
+                    if current == expected:
+                        continue
+
+                    drift += 1
+                    self.stdout.write(f"part={part_id} stored={current} ledger={expected}")
+                    if row is None:
+                        row = PartStockBalance(part_id=part_id)
+                        to_create.append(row)
+                    else:
+                        to_update.append(row)
+                    row.in_qty, row.out_qty, row.adjust_qty, row.balance = expected
+                    row.updated_at = timezone.now()
+
+                if not dry_run:
+                    PartStockBalance.objects.bulk_create(to_create)
+                    PartStockBalance.objects.bulk_update(
+                        to_update, ["in_qty", "out_qty", "adjust_qty", "balance", "updated_at"]
+                    )
+
+        if drift == 0:
+            self.stdout.write(self.style.SUCCESS(f"✅ {len(part_ids)} parts checked, no drift"))
+        elif dry_run:
+            self.stdout.write(self.style.WARNING(f"⚠️ {drift} parts drifted (dry run, nothing changed)"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ {drift} parts drifted and were rebuilt"))
@@ -0,0 +1,50 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from core.models import Notification, NotificationCounter
+from core.notify import unread_cache_key
+
+
+class Command(BaseCommand):
+    help = "Recount unread direct notifications per user and fix NotificationCounter drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report drift without fixing it")
+
+    def handle(self, *args, **options):
+        actual = dict(
+            # broadcast ไม่อยู่ใน counter (นับจาก read cursor แทน)
+            Notification.objects.filter(is_read=False, recipient__isnull=False)
+            .order_by()
+            .values("recipient_id")
+            .annotate(n=Count("id"))
+            .values_list("recipient_id", "n")
+        )
+        stored = dict(NotificationCounter.objects.values_list("user_id", "unread"))
+
+        drift = {
+            uid: actual.get(uid, 0)
+            for uid in set(actual) | set(stored)
+            if actual.get(uid, 0) != stored.get(uid, 0)
+        }
+        for uid, expected in sorted(drift.items()):
+            self.stdout.write(f"user={uid} stored={stored.get(uid)} actual={expected}")
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS(f"✅ {len(stored)} counters checked, no drift"))
+            return
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"⚠️ {len(drift)} counters drifted (dry run, nothing changed)"))
+            return
+
+        with transaction.atomic():
+            NotificationCounter.objects.bulk_create(
+                [NotificationCounter(user_id=uid, unread=n) for uid, n in drift.items()],
+                update_conflicts=True,
+                unique_fields=["user"],
+                update_fields=["unread"],
+            )
+        cache.delete_many([unread_cache_key(uid) for uid in drift])
+        self.stdout.write(self.style.SUCCESS(f"✅ {len(drift)} counters fixed"))
@@ -0,0 +1,40 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core.export_jobs import claim_next_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Worker that runs queued ExportJob rows and writes gzip CSV files under MEDIA_ROOT/exports/"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the queue once and exit")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to wait when the queue is empty")
+        parser.add_argument("--stale-after", type=int, default=900,
+                            help="Requeue RUNNING jobs whose heartbeat is older than this many seconds (crashed worker)")
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(seconds=options["stale_after"])
+        while True:
+            requeued = requeue_stale_jobs(stale_after)
+            if requeued:
+                self.stdout.write(self.style.WARNING(f"requeued {requeued} stale jobs"))
+
+            job = claim_next_job()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["sleep"])
+                continue
+
+            started = time.perf_counter()
+            try:
+                run_job(job)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"job {job.pk} ({job.kind}) failed: {e}"))
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ job {job.pk} ({job.kind}) {job.row_count} rows in {time.perf_counter() - started:.1f}s"
+            ))
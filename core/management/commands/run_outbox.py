@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.outbox import process_batch
+
+
+class Command(BaseCommand):
+    help = "Worker that turns OutboxEvent rows into notifications and webhook POSTs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the outbox once and exit")
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument("--sleep", type=float, default=1.0, help="Seconds to wait when nothing was sent")
+        parser.add_argument("--window", type=float, default=None,
+                            help="Coalesce window in seconds (default settings.OUTBOX_COALESCE_SECONDS)")
+
+    def handle(self, *args, **options):
+        while True:
+            window = options["window"]
+            if options["once"]:
+                # --once ไม่รอ window ส่งทุกอย่างที่ค้างอยู่
+                window = 0 if window is None else window
+            started = time.perf_counter()
+            stats = process_batch(limit=options["batch_size"], window=window)
+            if any(stats.values()):
+                self.stdout.write(
+                    f"notified={stats['notified']} coalesced={stats['coalesced']} "
+                    f"webhooks ok={stats['delivered']} failed={stats['failed']} "
+                    f"in {time.perf_counter() - started:.2f}s"
+                )
+                continue
+            if options["once"]:
+                return
+            time.sleep(options["sleep"])
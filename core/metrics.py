@@ -0,0 +1,206 @@
+"""
+Request metrics ต่อ view (URL name) แบบ Prometheus
+
+MetricsMiddleware เก็บ latency (histogram), จำนวน/เวลา DB query และขนาด response ไว้ใน memory ของ process
+`/metrics` (metrics_views) render เป็น text format ของ Prometheus
+
+gunicorn หลาย worker: ตั้ง METRICS_DIR ให้ทุก process เขียน snapshot ของตัวเองเป็น `<pid>.json`
+(อย่างมากทุก METRICS_FLUSH_SECONDS) แล้ว `/metrics` รวมทุกไฟล์ในโฟลเดอร์; ล้างโฟลเดอร์ตอน deploy ใหม่
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+
+PREFIX = "itams"
+
+# วินาที (ขอบบนของแต่ละ bucket)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+def _new_series():
+    return {
+        "buckets": [0] * len(LATENCY_BUCKETS),
+        "seconds": 0.0,
+        "count": 0,
+        "status": {},
+        "db_queries": 0,
+        "db_seconds": 0.0,
+        "response_bytes": 0,
+    }
+
+
+def merge(into: dict, other: dict):
+    """บวก snapshot `other` เข้า `into` ({"view|method": series})"""
+    for key, series in other.items():
+        target = into.setdefault(key, _new_series())
+        target["buckets"] = [a + b for a, b in zip(target["buckets"], series["buckets"])]
+        for field in ("seconds", "count", "db_queries", "db_seconds", "response_bytes"):
+            target[field] += series[field]
+        for status, n in series["status"].items():
+            target["status"][status] = target["status"].get(status, 0) + n
+    return into
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self._flushed_at = 0.0
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+
+    def observe(self, view, method, status, seconds, db_queries, db_seconds, response_bytes):
+        with self._lock:
+            series = self._series.get(f"{view}|{method}")
+            if series is None:
+                series = self._series[f"{view}|{method}"] = _new_series()
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    series["buckets"][i] += 1
+                    break
+            series["seconds"] += seconds
+            series["count"] += 1
+            series["status"][str(status)] = series["status"].get(str(status), 0) + 1
+            series["db_queries"] += db_queries
+            series["db_seconds"] += db_seconds
+            series["response_bytes"] += response_bytes
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return json.loads(json.dumps(self._series))
+
+    # -----------------------
+    # Multi-process
+    # -----------------------
+    def maybe_flush(self, force=False):
+        directory = settings.METRICS_DIR
+        now = time.monotonic()
+        if not directory or (not force and now - self._flushed_at < settings.METRICS_FLUSH_SECONDS):
+            return
+        self._flushed_at = now
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        # เขียนไฟล์ชั่วคราวแล้ว rename (atomic) กันตัวอ่านเจอไฟล์ครึ่ง ๆ
+        tmp = path / f".{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp.write_text(json.dumps(self.snapshot()))
+        os.replace(tmp, path / f"{os.getpid()}.json")
+
+    def collect(self) -> dict:
+        """snapshot ของทุก process (METRICS_DIR) หรือของ process นี้อย่างเดียว"""
+        if not settings.METRICS_DIR:
+            return self.snapshot()
+        self.maybe_flush(force=True)
+        total = {}
+        for file in sorted(Path(settings.METRICS_DIR).glob("*.json")):
+            try:
+                merge(total, json.loads(file.read_text()))
+            except (OSError, ValueError):
+                continue  # worker กำลังเขียน/ไฟล์เสีย: รอบหน้าค่อยนับ
+        return total
+
+
+REGISTRY = Registry()
+
+
+# -----------------------
+# Exposition
+# -----------------------
+def _labels(**labels) -> str:
+    parts = []
+    for k, v in labels.items():
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def render(series: dict) -> str:
+    lines = []
+
+    def header(name, kind, help_text):
+        lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+    items = sorted((key.split("|", 1), s) for key, s in series.items())
+
+    header("http_request_duration_seconds", "histogram", "Request latency by view")
+    for (view, method), s in items:
+        cumulative = 0
+        for bound, n in zip(LATENCY_BUCKETS, s["buckets"]):
+            cumulative += n
+            lines.append(f"{PREFIX}_http_request_duration_seconds_bucket{_labels(view=view, method=method, le=bound)} {cumulative}")
+        lines.append(f"{PREFIX}_http_request_duration_seconds_bucket{_labels(view=view, method=method, le='+Inf')} {s['count']}")
+        lines.append(f"{PREFIX}_http_request_duration_seconds_sum{_labels(view=view, method=method)} {s['seconds']:.6f}")
+        lines.append(f"{PREFIX}_http_request_duration_seconds_count{_labels(view=view, method=method)} {s['count']}")
+
+    header("http_requests_total", "counter", "Requests by view and status code")
+    for (view, method), s in items:
+        for status, n in sorted(s["status"].items()):
+            lines.append(f"{PREFIX}_http_requests_total{_labels(view=view, method=method, status=status)} {n}")
+
+    for field, name, help_text, fmt in (
+        ("db_queries", "db_queries_total", "SQL queries run while serving the view", "{}"),
+        ("db_seconds", "db_query_seconds_total", "Time spent in SQL while serving the view", "{:.6f}"),
+        ("response_bytes", "http_response_bytes_total", "Response body bytes (streaming: Content-Length if known)", "{}"),
+    ):
+        header(name, "counter", help_text)
+        for (view, method), s in items:
+            lines.append(f"{PREFIX}_{name}{_labels(view=view, method=method)} {fmt.format(s[field])}")
+
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------
+# Middleware
+# -----------------------
+class _QueryTimer:
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.seconds += time.perf_counter() - started
+
+
+def _response_size(response) -> int:
+    if response.streaming:
+        return int(response.get("Content-Length") or 0)
+    return len(response.content)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        REGISTRY.observe(
+            view=match.view_name if match else "<unresolved>",
+            method=request.method if request.method in METHODS else "OTHER",
+            status=response.status_code,
+            seconds=elapsed,
+            db_queries=timer.queries,
+            db_seconds=timer.seconds,
+            response_bytes=_response_size(response),
+        )
+        REGISTRY.maybe_flush()
+        return response
@@ -0,0 +1,27 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views import View
+
+from .metrics import REGISTRY, render
+from .permissions import is_admin
+
+
+class MetricsView(View):
+    """
+    /metrics (Prometheus text format): ADMIN ที่ login อยู่
+    หรือ scraper ที่ส่ง `Authorization: Bearer <METRICS_TOKEN>`
+    """
+
+    def get(self, request):
+        if not self._allowed(request):
+            return HttpResponseForbidden("metrics: admin only")
+        return HttpResponse(render(REGISTRY.collect()), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+    def _allowed(self, request) -> bool:
+        token = settings.METRICS_TOKEN
+        auth = request.headers.get("Authorization", "")
+        if token and auth.startswith("Bearer ") and hmac.compare_digest(auth[7:], token):
+            return True
+        return request.user.is_authenticated and is_admin(request.user)
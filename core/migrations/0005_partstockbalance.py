@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Case, IntegerField, Sum, Value, When
+
+
+def backfill_balances(apps, schema_editor):
+    Part = apps.get_model("core", "Part")
+    PartStockMovement = apps.get_model("core", "PartStockMovement")
+    PartStockBalance = apps.get_model("core", "PartStockBalance")
+
+    def total(mtype):
+        return Sum(Case(When(movement_type=mtype, then="qty"), default=Value(0), output_field=IntegerField()))
+
+    totals = {
+        r["part_id"]: r
+        for r in PartStockMovement.objects.order_by().values("part_id").annotate(
+            in_qty=total("IN"), out_qty=total("OUT"), adjust_qty=total("ADJUST")
+        )
+    }
+    rows = []
+    for part_id in Part.objects.values_list("id", flat=True):
+        t = totals.get(part_id, {})
+        in_qty, out_qty = t.get("in_qty") or 0, t.get("out_qty") or 0
+        rows.append(PartStockBalance(
+            part_id=part_id,
+            in_qty=in_qty,
+            out_qty=out_qty,
+            adjust_qty=t.get("adjust_qty") or 0,
+            balance=in_qty - out_qty,
+        ))
+    PartStockBalance.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_assetassignmentlog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PartStockBalance',
+            fields=[
+                ('part', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stock', serialize=False, to='core.part')),
+                ('in_qty', models.IntegerField(default=0)),
+                ('out_qty', models.IntegerField(default=0)),
+                ('adjust_qty', models.IntegerField(default=0)),
+                ('balance', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
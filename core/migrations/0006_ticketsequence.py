@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:46
+
+from datetime import datetime
+
+from django.db import migrations, models
+from django.db.models import Max
+from django.db.models.functions import Substr
+
+
+def backfill_sequences(apps, schema_editor):
+    # ตั้งตัวนับของแต่ละวันให้ต่อจากเลขสูงสุดที่มีอยู่แล้ว (TCK-YYYYMMDD-NNNNN)
+    Ticket = apps.get_model("core", "Ticket")
+    TicketSequence = apps.get_model("core", "TicketSequence")
+
+    rows = (
+        Ticket.objects.filter(ticket_no__startswith="TCK-")
+        .annotate(ymd=Substr("ticket_no", 5, 8))
+        .order_by()
+        .values("ymd")
+        .annotate(mx=Max("ticket_no"))
+    )
+    seqs = []
+    for r in rows:
+        try:
+            day = datetime.strptime(r["ymd"], "%Y%m%d").date()
+            last_no = int(r["mx"].split("-")[-1])
+        except (TypeError, ValueError):
+            continue
+        seqs.append(TicketSequence(day=day, last_no=last_no))
+    TicketSequence.objects.bulk_create(seqs, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_partstockbalance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketSequence',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+                ('last_no', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_sequences, migrations.RunPython.noop),
+    ]
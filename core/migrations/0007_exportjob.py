@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_ticketsequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='part',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='ntype',
+            field=models.CharField(choices=[('TICKET_NEW', 'New Ticket'), ('TICKET_UPDATE', 'Ticket Updated'), ('TICKET_CLOSED', 'Ticket Closed'), ('LOW_STOCK', 'Low Stock'), ('EXPORT_READY', 'Export Ready')], max_length=32),
+        ),
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('assets', 'Assets'), ('tickets', 'Tickets'), ('parts', 'Parts'), ('movements', 'Movements')], max_length=20)),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='QUEUED', max_length=10)),
+                ('since', models.DateTimeField(blank=True, null=True)),
+                ('fingerprint', models.CharField(db_index=True, max_length=64)),
+                ('data_version', models.CharField(blank=True, default='', max_length=200)),
+                ('cutoff_at', models.DateTimeField(blank=True, null=True)),
+                ('file', models.FileField(blank=True, default='', upload_to='exports/')),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    Notification = apps.get_model("core", "Notification")
+    NotificationCounter = apps.get_model("core", "NotificationCounter")
+    rows = (
+        Notification.objects.filter(is_read=False)
+        .order_by()
+        .values("recipient_id")
+        .annotate(n=Count("id"))
+    )
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=r["recipient_id"], unread=r["n"]) for r in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0007_exportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:57
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_broadcast_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(choices=[('ticket.created', 'Ticket created'), ('ticket.updated', 'Ticket updated'), ('ticket.closed', 'Ticket closed'), ('stock.low', 'Low stock')], max_length=40)),
+                ('key', models.CharField(max_length=80)),
+                ('payload', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('DONE', 'Done'), ('COALESCED', 'Coalesced'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('notified_at', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(condition=models.Q(('status', 'PENDING')), fields=['available_at', 'id'], name='outbox_pending_idx'), models.Index(condition=models.Q(('status', 'PENDING')), fields=['key'], name='outbox_pending_key_idx')],
+            },
+        ),
+    ]
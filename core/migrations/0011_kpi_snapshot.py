@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:59
+
+from collections import Counter
+from datetime import timezone as dt_timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils import timezone
+
+
+def backfill_kpis(apps, schema_editor):
+    # ตรรกะเดียวกับ core.kpi.ticket_contribution (คัดลอกมาเพื่อไม่ผูก migration กับโค้ดปัจจุบัน)
+    Asset = apps.get_model("core", "Asset")
+    Ticket = apps.get_model("core", "Ticket")
+    KpiCounter = apps.get_model("core", "KpiCounter")
+    AssetTicketCount = apps.get_model("core", "AssetTicketCount")
+
+    totals = Counter({"assets_total": Asset.objects.count()})
+    rows = Ticket.objects.order_by().values_list("status", "due_at", "cost", "created_at")
+    for status, due_at, cost, created_at in rows.iterator(chunk_size=2000):
+        if status in ("NEW", "ASSIGNED", "IN_PROGRESS"):
+            totals["tickets_open"] += 1
+            if due_at:
+                totals["due:" + due_at.astimezone(dt_timezone.utc).strftime("%Y-%m-%dT%H:%M")] += 1
+        if cost and created_at:
+            totals[f"cost:{timezone.localtime(created_at):%Y-%m}"] += cost
+    KpiCounter.objects.bulk_create(
+        [KpiCounter(name=k, value=v) for k, v in totals.items() if v], batch_size=1000
+    )
+
+    per_asset = Ticket.objects.order_by().values("asset_id").annotate(n=Count("id")).values_list("asset_id", "n")
+    AssetTicketCount.objects.bulk_create(
+        [AssetTicketCount(asset_id=a, tickets=n) for a, n in per_asset], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_outboxevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetTicketCount',
+            fields=[
+                ('asset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ticket_stats', serialize=False, to='core.asset')),
+                ('tickets', models.IntegerField(db_index=True, default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='KpiCounter',
+            fields=[
+                ('name', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+        ),
+        migrations.RunPython(backfill_kpis, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_kpi_snapshot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['updated_at'], name='asset_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['object_type', 'object_id'], name='audit_object_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['-created_at'], name='audit_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'is_read', '-created_at'], name='notification_recipient_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='partstockmovement',
+            index=models.Index(fields=['-created_at'], name='movement_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='partstockmovement',
+            index=models.Index(fields=['part', 'movement_type'], name='movement_part_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='partstockmovement',
+            index=models.Index(fields=['ref_ticket', 'movement_type'], name='movement_ticket_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['-created_at', '-id'], name='ticket_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['status', '-created_at'], name='ticket_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('status__in', ['NEW', 'ASSIGNED', 'IN_PROGRESS'])), fields=['due_at'], name='ticket_open_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['assigned_to', 'status', 'due_at'], name='ticket_assignee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['requested_by', '-created_at'], name='ticket_requester_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['updated_at'], name='ticket_updated_idx'),
+        ),
+    ]
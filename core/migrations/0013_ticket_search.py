@@ -0,0 +1,121 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+POSTGRES_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    ALTER TABLE core_ticketsearchdocument ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', body), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX ticket_search_vector_idx ON core_ticketsearchdocument USING GIN (search_vector)",
+    "CREATE INDEX ticket_search_title_trgm_idx ON core_ticketsearchdocument USING GIN (title gin_trgm_ops)",
+]
+
+# external content FTS5: เก็บแค่ index, ข้อความจริงอยู่ใน core_ticketsearchdocument
+SQLITE_SQL = [
+    """
+    CREATE VIRTUAL TABLE core_ticketsearch_fts USING fts5(
+        title, body, content='core_ticketsearchdocument', content_rowid='ticket_id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER core_ticketsearch_ai AFTER INSERT ON core_ticketsearchdocument BEGIN
+        INSERT INTO core_ticketsearch_fts(rowid, title, body) VALUES (new.ticket_id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER core_ticketsearch_ad AFTER DELETE ON core_ticketsearchdocument BEGIN
+        INSERT INTO core_ticketsearch_fts(core_ticketsearch_fts, rowid, title, body)
+        VALUES ('delete', old.ticket_id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER core_ticketsearch_au AFTER UPDATE ON core_ticketsearchdocument BEGIN
+        INSERT INTO core_ticketsearch_fts(core_ticketsearch_fts, rowid, title, body)
+        VALUES ('delete', old.ticket_id, old.title, old.body);
+        INSERT INTO core_ticketsearch_fts(rowid, title, body) VALUES (new.ticket_id, new.title, new.body);
+    END
+    """,
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS core_ticketsearch_ai",
+    "DROP TRIGGER IF EXISTS core_ticketsearch_ad",
+    "DROP TRIGGER IF EXISTS core_ticketsearch_au",
+    "DROP TABLE IF EXISTS core_ticketsearch_fts",
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for sql in {"postgresql": POSTGRES_SQL, "sqlite": SQLITE_SQL}.get(vendor, []):
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    # postgresql: column/index หายไปพร้อมตารางตอน reverse CreateModel
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in SQLITE_DROP:
+            schema_editor.execute(sql)
+
+
+BACKFILL_BATCH = 2000
+
+
+def backfill_documents(apps, schema_editor):
+    # ตรรกะเดียวกับ core.search.ticket_document / rebuild_ticket_index:
+    # ทีละ chunk ตาม pk โหลด comment เฉพาะของ chunk นั้น -> memory คงที่ไม่ว่ามีกี่ล้าน ticket
+    Ticket = apps.get_model("core", "Ticket")
+    TicketComment = apps.get_model("core", "TicketComment")
+    TicketSearchDocument = apps.get_model("core", "TicketSearchDocument")
+
+    last_id = 0
+    while True:
+        rows = list(
+            Ticket.objects.filter(pk__gt=last_id).order_by("pk")
+            .values_list("pk", "ticket_no", "asset__asset_code", "subject", "description")[:BACKFILL_BATCH]
+        )
+        if not rows:
+            return
+        comments = {}
+        for ticket_id, message in (
+            TicketComment.objects.filter(ticket_id__in=[r[0] for r in rows])
+            .order_by("created_at")
+            .values_list("ticket_id", "message")
+        ):
+            comments.setdefault(ticket_id, []).append(message)
+        TicketSearchDocument.objects.bulk_create([
+            TicketSearchDocument(
+                ticket_id=pk,
+                title=" ".join(x for x in (ticket_no, asset_code, subject) if x)[:300],
+                body="\n".join([description or "", *comments.get(pk, [])]),
+            )
+            for pk, ticket_no, asset_code, subject, description in rows
+        ])
+        last_id = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketSearchDocument',
+            fields=[
+                ('ticket', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_doc', serialize=False, to='core.ticket')),
+                ('title', models.CharField(max_length=300)),
+                ('body', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
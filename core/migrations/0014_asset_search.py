@@ -0,0 +1,102 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+POSTGRES_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX asset_search_text_trgm_idx ON core_assetsearchdocument USING GIN (text gin_trgm_ops)",
+]
+
+# external content FTS5 แบบ trigram: หา substring ได้ด้วย GLOB/LIKE
+SQLITE_SQL = [
+    """
+    CREATE VIRTUAL TABLE core_assetsearch_fts USING fts5(
+        text, content='core_assetsearchdocument', content_rowid='asset_id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER core_assetsearch_ai AFTER INSERT ON core_assetsearchdocument BEGIN
+        INSERT INTO core_assetsearch_fts(rowid, text) VALUES (new.asset_id, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER core_assetsearch_ad AFTER DELETE ON core_assetsearchdocument BEGIN
+        INSERT INTO core_assetsearch_fts(core_assetsearch_fts, rowid, text) VALUES ('delete', old.asset_id, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER core_assetsearch_au AFTER UPDATE ON core_assetsearchdocument BEGIN
+        INSERT INTO core_assetsearch_fts(core_assetsearch_fts, rowid, text) VALUES ('delete', old.asset_id, old.text);
+        INSERT INTO core_assetsearch_fts(rowid, text) VALUES (new.asset_id, new.text);
+    END
+    """,
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS core_assetsearch_ai",
+    "DROP TRIGGER IF EXISTS core_assetsearch_ad",
+    "DROP TRIGGER IF EXISTS core_assetsearch_au",
+    "DROP TABLE IF EXISTS core_assetsearch_fts",
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for sql in {"postgresql": POSTGRES_SQL, "sqlite": SQLITE_SQL}.get(vendor, []):
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in SQLITE_DROP:
+            schema_editor.execute(sql)
+
+
+BACKFILL_BATCH = 2000
+
+
+def backfill_documents(apps, schema_editor):
+    # ตรรกะเดียวกับ core.search.asset_document; ทีละ chunk ตาม pk เหมือน rebuild_asset_index
+    # (bulk_create รับ generator แล้ว list() ทั้งก้อน -> memory โตตามจำนวน asset)
+    Asset = apps.get_model("core", "Asset")
+    AssetSearchDocument = apps.get_model("core", "AssetSearchDocument")
+
+    last_id = 0
+    while True:
+        rows = list(
+            Asset.objects.filter(pk__gt=last_id).order_by("pk")
+            .values_list("pk", "asset_code", "serial_number", "brand", "model_name", "owner__username")[:BACKFILL_BATCH]
+        )
+        if not rows:
+            return
+        AssetSearchDocument.objects.bulk_create([
+            AssetSearchDocument(asset_id=pk, text=" ".join(x for x in fields if x).lower()[:500])
+            for pk, *fields in rows
+        ])
+        last_id = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_ticket_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetSearchDocument',
+            fields=[
+                ('asset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_doc', serialize=False, to='core.asset')),
+                ('text', models.CharField(max_length=500)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['serial_number'], name='asset_serial_idx'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
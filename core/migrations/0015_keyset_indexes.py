@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_asset_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='audit_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='partstockmovement',
+            name='movement_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['-created_at', '-id'], name='audit_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='partstockmovement',
+            index=models.Index(fields=['-created_at', '-id'], name='movement_created_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportVersion',
+            fields=[
+                ('kind', models.CharField(choices=[('assets', 'Assets'), ('tickets', 'Tickets'), ('parts', 'Parts'), ('movements', 'Movements')], max_length=20, primary_key=True, serialize=False)),
+                ('stamp', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:27
+
+from django.db import migrations
+
+
+def drop_empty_due_buckets(apps, schema_editor):
+    # due bucket ที่ปิดหมดแล้วค้างเป็น 0 ตั้งแต่ก่อน core.kpi.bump จะลบให้เอง
+    KpiCounter = apps.get_model("core", "KpiCounter")
+    KpiCounter.objects.filter(name__startswith="due:", value=0).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_export_lease_and_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_empty_due_buckets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+from collections import Counter
+from datetime import timezone as dt_timezone
+
+from django.db import migrations
+from django.utils import timezone
+
+# ตรงกับ core.kpi ตอนที่แยก slot
+KPI_SLOTS = 16
+OPEN_STATUSES = ("NEW", "ASSIGNED", "IN_PROGRESS")
+BACKFILL_BATCH = 2000
+
+
+def spread_into_slots(apps, schema_editor):
+    # คำนวณใหม่จากตารางจริงแยก slot ตาม pk (เหมือน core.kpi.expected_counters) แทนการย้ายแถวเดิมไป slot 0:
+    # ticket ที่ปิดทีหลังจะลบที่ slot ของมันเอง ค่าของแต่ละ slot จึงต้องเริ่มถูกตั้งแต่แรก
+    Asset = apps.get_model("core", "Asset")
+    Ticket = apps.get_model("core", "Ticket")
+    KpiCounter = apps.get_model("core", "KpiCounter")
+
+    totals = Counter()
+    for pk in Asset.objects.order_by().values_list("pk", flat=True).iterator(chunk_size=BACKFILL_BATCH):
+        totals[f"assets_total#{pk % KPI_SLOTS}"] += 1
+    rows = Ticket.objects.order_by().values_list("pk", "status", "due_at", "cost", "created_at")
+    for pk, status, due_at, cost, created_at in rows.iterator(chunk_size=BACKFILL_BATCH):
+        slot = pk % KPI_SLOTS
+        if status in OPEN_STATUSES:
+            totals[f"tickets_open#{slot}"] += 1
+            if due_at:
+                totals[f"due:{due_at.astimezone(dt_timezone.utc):%Y-%m-%dT%H:%M}#{slot}"] += 1
+        if cost and created_at:
+            totals[f"cost:{timezone.localtime(created_at):%Y-%m}#{slot}"] += cost
+
+    KpiCounter.objects.all().delete()
+    KpiCounter.objects.bulk_create(
+        [KpiCounter(name=k, value=v) for k, v in totals.items() if v], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_drop_empty_due_buckets'),
+    ]
+
+    operations = [
+        migrations.RunPython(spread_into_slots, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,69 @@
 from django.conf import settings
-from django.db import models, transaction
-from django.db.models import Max, Sum
-from django.db.models.functions import Coalesce
+from django.db import connection, models, transaction
+from django.db.models import F
 from django.utils import timezone
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
 
 
+# -----------------------
+# Change tracking
+# -----------------------
+class TrackChangesMixin:
+    """
+    จำค่า field ตอนโหลดจาก DB (และหลัง save / refresh_from_db) ไว้เทียบ แทนการ SELECT ค่าเดิมใน pre_save
+    - changed_fields(): ชื่อ field ที่ค่าต่างจากตอนนั้น (object ใหม่/สร้างเอง = ทุก field)
+    - loaded_value(name): ค่าเดิม (FK = id) หรือ KeyError ถ้าไม่รู้ (สร้างเองพร้อม pk / field ถูก defer)
+    field auto_now (updated_at) ไม่นับ เพราะเปลี่ยนทุกครั้งที่ save
+    """
+
+    @classmethod
+    def _tracked_fields(cls):
+        # cache ต่อ class
+        if "_tracked" not in cls.__dict__:
+            cls._tracked = [f for f in cls._meta.concrete_fields if not getattr(f, "auto_now", False)]
+        return cls._tracked
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot()
+        return instance
+
+    def _snapshot(self, names=None):
+        loaded = self.__dict__.setdefault("_loaded", {})
+        deferred = self.get_deferred_fields()
+        for f in self._tracked_fields():
+            if f.attname in deferred:
+                continue
+            if names is None or f.name in names or f.attname in names:
+                loaded[f.name] = getattr(self, f.attname)
+
+    def changed_fields(self, update_fields=None) -> set:
+        """update_fields (จาก save/signal) = นับเฉพาะ field ที่ save นั้นเขียนลง DB จริง"""
+        loaded = self.__dict__.get("_loaded", {})
+        deferred = self.get_deferred_fields()
+        changed = {
+            f.name for f in self._tracked_fields()
+            if f.attname not in deferred and (f.name not in loaded or loaded[f.name] != getattr(self, f.attname))
+        }
+        if update_fields is not None:
+            changed &= set(update_fields)
+        return changed
+
+    def loaded_value(self, name):
+        return self.__dict__.get("_loaded", {})[name]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._snapshot(kwargs.get("update_fields"))
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._snapshot(fields)
+
+
 # -----------------------
 # Master data
 # -----------------------
@@ -50,7 +106,7 @@ class AssetCategory(models.Model):
 # -----------------------
 # Asset
 # -----------------------
-class Asset(models.Model):
+class Asset(TrackChangesMixin, models.Model):
     class Status(models.TextChoices):
         IN_USE = "IN_USE", "In use"
         IN_STOCK = "IN_STOCK", "In stock"
@@ -85,34 +141,52 @@ class Asset(models.Model):
 
     class Meta:
         ordering = ["asset_code"]
+        indexes = [
+            # delta export (since=...)
+            models.Index(fields=["updated_at"], name="asset_updated_idx"),
+            # ค้นหา serial ตรงตัว (core/search.py)
+            models.Index(fields=["serial_number"], name="asset_serial_idx"),
+        ]
 
     def __str__(self):
         return f"{self.asset_code} ({self.category})"
 
 
+class AssetSearchDocument(models.Model):
+    """
+    ข้อความค้นหาของ asset (ตัวพิมพ์เล็ก) ให้หา substring ผ่าน trigram index แทน icontains ทั้งตาราง
+    index สร้างใน migration: PostgreSQL = pg_trgm GIN, SQLite = FTS5 trigram (core_assetsearch_fts)
+    """
+    asset = models.OneToOneField(Asset, on_delete=models.CASCADE, primary_key=True, related_name="search_doc")
+    # asset_code serial brand model owner-username
+    text = models.CharField(max_length=500)
+
+
 # -----------------------
 # Parts / Stock
 # -----------------------
-class Part(models.Model):
+class Part(TrackChangesMixin, models.Model):
     name = models.CharField(max_length=160)
     sku = models.CharField(max_length=80, unique=True)  # รหัสอะไหล่
     vendor = models.ForeignKey(Vendor, on_delete=models.SET_NULL, null=True, blank=True)
     unit = models.CharField(max_length=30, default="pcs")
     unit_cost = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     low_stock_threshold = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def stock_totals(self) -> "PartStockBalance":
+        # อ่านสดจาก DB ทุกครั้ง (ไม่ใช้ cache ของ self.stock เพราะ balance เปลี่ยนได้ตลอด)
+        row = PartStockBalance.objects.filter(part_id=self.pk).first()
+        return row or PartStockBalance(part_id=self.pk)
 
     def stock_in_total(self):
-        return self.movements.filter(movement_type="IN").aggregate(
-            s=Coalesce(Sum("qty"), 0)
-        )["s"]
+        return self.stock_totals().in_qty
 
     def stock_out_total(self):
-        return self.movements.filter(movement_type="OUT").aggregate(
-            s=Coalesce(Sum("qty"), 0)
-        )["s"]
+        return self.stock_totals().out_qty
 
     def stock_balance(self):
-        return int(self.stock_in_total() - self.stock_out_total())
+        return int(self.stock_totals().balance)
 
     def stock_value(self):
         return self.stock_balance() * float(self.unit_cost)
@@ -122,6 +196,51 @@ class Part(models.Model):
         return f"{self.sku} - {self.name}"
 
 
+class PartStockBalance(models.Model):
+    """
+    ยอดสะสมต่อ part ที่อัปเดตใน transaction เดียวกับ PartStockMovement
+    balance = in_qty - out_qty (ADJUST เก็บแยกใน adjust_qty ไม่นับรวม balance เหมือนเดิม)
+    ถ้าข้อมูลเพี้ยน ให้รัน `manage.py rebuild_stock_balances`
+    """
+    part = models.OneToOneField(Part, on_delete=models.CASCADE, primary_key=True, related_name="stock")
+    in_qty = models.IntegerField(default=0)
+    out_qty = models.IntegerField(default=0)
+    adjust_qty = models.IntegerField(default=0)
+    balance = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    COLUMNS = {"IN": "in_qty", "OUT": "out_qty", "ADJUST": "adjust_qty"}
+
+    @classmethod
+    def apply(cls, part_id, movement_type: str, qty: int):
+        """บวก movement เข้า balance row (qty ติดลบ = ย้อน movement เดิม)"""
+        col = cls.COLUMNS[movement_type]
+        delta = {"IN": qty, "OUT": -qty}.get(movement_type, 0)
+        changes = {col: F(col) + qty, "balance": F("balance") + delta, "updated_at": timezone.now()}
+
+        if not cls.objects.filter(part_id=part_id).update(**changes):
+            cls.objects.bulk_create([cls(part_id=part_id)], ignore_conflicts=True)
+            cls.objects.filter(part_id=part_id).update(**changes)
+
+    @classmethod
+    def consume(cls, part_id, qty: int) -> bool:
+        """
+        ตัด stock แบบ conditional decrement: UPDATE ... WHERE balance >= qty
+        row lock ของ UPDATE ทำให้หลาย worker ตัดพร้อมกันได้โดยไม่ oversell
+        คืน False ถ้ายอดไม่พอ
+        """
+        return bool(
+            cls.objects.filter(part_id=part_id, balance__gte=qty).update(
+                out_qty=F("out_qty") + qty,
+                balance=F("balance") - qty,
+                updated_at=timezone.now(),
+            )
+        )
+
+    def __str__(self):
+        return f"{self.part_id}: {self.balance}"
+
+
 class PartStockMovement(models.Model):
     class Type(models.TextChoices):
         IN = "IN", "Stock In"
@@ -138,7 +257,14 @@ class PartStockMovement(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
-    
+        indexes = [
+            # movement history (keyset บน created_at, id) / export เรียงตามเวลา
+            models.Index(fields=["-created_at", "-id"], name="movement_created_idx"),
+            # ยอดรวมต่อ part แยกประเภท (rebuild_stock_balances) + used parts ของ ticket
+            models.Index(fields=["part", "movement_type"], name="movement_part_type_idx"),
+            models.Index(fields=["ref_ticket", "movement_type"], name="movement_ticket_type_idx"),
+        ]
+
     def clean(self):
         super().clean()
         # กัน OUT เกิน balance
@@ -160,7 +286,23 @@ class PartStockMovement(models.Model):
 
     def save(self, *args, **kwargs):
         self.full_clean()  # เรียก clean() ทุกครั้ง
-        return super().save(*args, **kwargs)
+        with transaction.atomic():
+            # อัปเดต balance ก่อน insert เพื่อให้ post_save (low stock) เห็นยอดใหม่
+            if self.pk:
+                old = PartStockMovement.objects.filter(pk=self.pk).values(
+                    "part_id", "movement_type", "qty"
+                ).first()
+                if old:
+                    PartStockBalance.apply(old["part_id"], old["movement_type"], -old["qty"])
+            if self.movement_type == self.Type.OUT:
+                # clean() เช็คไว้แล้วแต่ไม่ lock จึงต้องเช็คซ้ำตอนตัดจริง
+                if not PartStockBalance.consume(self.part_id, self.qty):
+                    raise ValidationError(
+                        {"qty": f"Not enough stock. Current balance = {self.part.stock_balance()}"}
+                    )
+            else:
+                PartStockBalance.apply(self.part_id, self.movement_type, self.qty)
+            return super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.part.sku} {self.movement_type} {self.qty}"
@@ -169,7 +311,7 @@ class PartStockMovement(models.Model):
 # -----------------------
 # Maintenance Ticket
 # -----------------------
-class Ticket(models.Model):
+class Ticket(TrackChangesMixin, models.Model):
     class Priority(models.TextChoices):
         LOW = "LOW", "Low"
         MEDIUM = "MEDIUM", "Medium"
@@ -223,23 +365,38 @@ class Ticket(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
-
-    def _generate_ticket_no(self) -> str:
+        indexes = [
+            # ticket list (IT/Manager เห็นทั้งหมด เรียงใหม่สุดก่อน)
+            models.Index(fields=["-created_at", "-id"], name="ticket_created_idx"),
+            # filter ตาม status ในหน้า list
+            models.Index(fields=["status", "-created_at"], name="ticket_status_created_idx"),
+            # overdue / due soon: เฉพาะ ticket ที่ยังเปิด (partial index เล็กกว่าทั้งตารางมาก)
+            models.Index(
+                fields=["due_at"],
+                condition=models.Q(status__in=["NEW", "ASSIGNED", "IN_PROGRESS"]),
+                name="ticket_open_due_idx",
+            ),
+            # My Queue (assigned_to) และ My Tickets / ticket list ของ employee (requested_by)
+            models.Index(fields=["assigned_to", "status", "due_at"], name="ticket_assignee_idx"),
+            models.Index(fields=["requested_by", "-created_at"], name="ticket_requester_idx"),
+            # delta export (since=...)
+            models.Index(fields=["updated_at"], name="ticket_updated_idx"),
+        ]
+
+    @staticmethod
+    def format_ticket_no(day, seq: int) -> str:
         # TCK-YYYYMMDD-00001
-        today = timezone.localdate()
-        prefix = f"TCK-{today.strftime('%Y%m%d')}-"
+        return f"TCK-{day.strftime('%Y%m%d')}-{seq:05d}"
 
-        last = (
-            Ticket.objects.filter(ticket_no__startswith=prefix)
-            .aggregate(mx=Max("ticket_no"))
-            .get("mx")
-        )
-        if not last:
-            seq = 1
-        else:
-            seq = int(last.split("-")[-1]) + 1
+    @classmethod
+    def reserve_ticket_nos(cls, count: int) -> list[str]:
+        """จองเลข ticket ต่อเนื่อง count เลขใน round trip เดียว (สำหรับ bulk create)"""
+        today = timezone.localdate()
+        first = TicketSequence.reserve(today, count)
+        return [cls.format_ticket_no(today, seq) for seq in range(first, first + count)]
 
-        return f"{prefix}{seq:05d}"
+    def _generate_ticket_no(self) -> str:
+        return self.reserve_ticket_nos(1)[0]
 
     def save(self, *args, **kwargs):
         creating = self.pk is None
@@ -247,7 +404,7 @@ class Ticket(models.Model):
             if not self.due_at:
                 self.due_at = timezone.now() + timezone.timedelta(hours=self.sla_hours)
 
-            # ปลอดภัยกับ concurrent create
+            # ปลอดภัยกับ concurrent create: เลขมาจาก TicketSequence ที่ถูก lock ระหว่าง transaction
             with transaction.atomic():
                 if not self.ticket_no:
                     self.ticket_no = self._generate_ticket_no()
@@ -264,6 +421,44 @@ class Ticket(models.Model):
         return self.ticket_no
 
 
+class TicketSequence(models.Model):
+    """
+    ตัวนับเลข ticket ต่อวัน แทนการ Max("ticket_no") ทุกครั้งที่สร้าง
+    UPDATE ของ row วันนั้นถือ row lock จนจบ transaction -> คนสร้างพร้อมกันได้เลขไม่ชนกัน
+    """
+    day = models.DateField(primary_key=True)
+    last_no = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.day}: {self.last_no}"
+
+    @classmethod
+    def reserve(cls, day, count: int = 1) -> int:
+        """จอง count เลขของวัน day คืนเลขแรกของ block"""
+        with transaction.atomic():
+            last_no = cls._increment(day, count)
+            if last_no is None:
+                cls.objects.bulk_create([cls(day=day)], ignore_conflicts=True)
+                last_no = cls._increment(day, count)
+        return last_no - count + 1
+
+    @classmethod
+    def _increment(cls, day, count):
+        if connection.vendor == "postgresql":
+            # UPDATE ... RETURNING = round trip เดียว
+            with connection.cursor() as cur:
+                cur.execute(
+                    f"UPDATE {cls._meta.db_table} SET last_no = last_no + %s WHERE day = %s RETURNING last_no",
+                    [count, day],
+                )
+                row = cur.fetchone()
+            return row[0] if row else None
+
+        if not cls.objects.filter(day=day).update(last_no=F("last_no") + count):
+            return None
+        return cls.objects.filter(day=day).values_list("last_no", flat=True).get()
+
+
 def ticket_attachment_path(instance, filename):
     return f"tickets/{instance.ticket.id}/{filename}"
 
@@ -285,6 +480,20 @@ class TicketComment(models.Model):
         ordering = ["created_at"]
 
 
+class TicketSearchDocument(models.Model):
+    """
+    เอกสารค้นหาของ ticket (ดู core/search.py) อัปเดตจาก signals_search ทุกครั้งที่ ticket/comment เปลี่ยน
+    index จริงสร้างใน migration ตาม DB: PostgreSQL = tsvector + GIN และ trigram บน title,
+    SQLite = ตาราง FTS5 (core_ticketsearch_fts) ที่ trigger sync ให้
+    """
+    ticket = models.OneToOneField(Ticket, on_delete=models.CASCADE, primary_key=True, related_name="search_doc")
+    # ticket_no + asset code + subject (น้ำหนักสูงกว่า body)
+    title = models.CharField(max_length=300)
+    # description + ข้อความ comment ทั้งหมด
+    body = models.TextField(blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+
 # -----------------------
 # Audit Log (เบา ๆ)
 # -----------------------
@@ -298,6 +507,11 @@ class AuditLog(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # ประวัติของ object หนึ่ง ๆ + หน้า admin ที่เรียงตามเวลา
+            models.Index(fields=["object_type", "object_id"], name="audit_object_idx"),
+            models.Index(fields=["-created_at", "-id"], name="audit_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.action} {self.object_type}:{self.object_id}"
@@ -308,8 +522,12 @@ class Notification(models.Model):
         TICKET_UPDATE = "TICKET_UPDATE", "Ticket Updated"
         TICKET_CLOSED = "TICKET_CLOSED", "Ticket Closed"
         LOW_STOCK = "LOW_STOCK", "Low Stock"
+        EXPORT_READY = "EXPORT_READY", "Export Ready"
 
-    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name="notifications")
+    # direct: recipient = ผู้รับ / broadcast: recipient ว่าง + audience = role หรือชื่อ group ที่เห็น
+    # (เก็บแถวเดียวต่อ event แทนการ fan-out หนึ่งแถวต่อคน)
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name="notifications", null=True, blank=True)
+    audience = models.CharField(max_length=60, blank=True, default="")
     ntype = models.CharField(max_length=32, choices=Type.choices)
     title = models.CharField(max_length=200)
     message = models.TextField(blank=True, default="")
@@ -320,7 +538,49 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
-        
+        indexes = [
+            # รายการของ user / unread (is_read=False) เรียงใหม่สุดก่อน
+            models.Index(fields=["recipient", "is_read", "-created_at"], name="notification_recipient_idx"),
+            models.Index(
+                fields=["audience", "id"],
+                condition=models.Q(recipient__isnull=True),
+                name="notification_broadcast_idx",
+            ),
+        ]
+
+    @property
+    def is_broadcast(self) -> bool:
+        return self.recipient_id is None
+
+
+class NotificationReadCursor(models.Model):
+    """broadcast ที่ id <= read_through ถือว่า user อ่านแล้ว (ขยับตอน Mark all read)"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="+")
+    read_through = models.BigIntegerField(default=0)
+
+
+class NotificationRead(models.Model):
+    """broadcast ที่อ่านทีละอัน (id > cursor) เก็บเป็น exception row"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name="+")
+
+    class Meta:
+        unique_together = ("user", "notification")
+
+
+class NotificationCounter(models.Model):
+    """
+    จำนวน notification แบบ direct ที่ยังไม่อ่านต่อ user (nav bar อ่านจากตรงนี้ + cache แทนการ COUNT ทุกหน้า)
+    ส่วนของ broadcast นับจาก read cursor ใน notify.get_unread_count
+    อัปเดตโดย notify_users / mark read views; แก้ drift ด้วย `manage.py reconcile_unread_counts`
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="+")
+    unread = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread}"
+
+
 class AssetAssignmentLog(models.Model):
     asset = models.ForeignKey("Asset", on_delete=models.CASCADE, related_name="assign_logs")
     old_owner = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
@@ -331,3 +591,147 @@ class AssetAssignmentLog(models.Model):
 
     class Meta:
         ordering = ["-changed_at"]
+
+
+
+class ExportJob(models.Model):
+    """
+    งาน export ที่รันโดย worker (`manage.py run_export_jobs`) แทนการ query ยาวบน request thread
+    ไฟล์ผลลัพธ์เป็น .csv.gz ใต้ MEDIA_ROOT/exports/ และถูกใช้ซ้ำถ้า fingerprint เดิม
+    (kind + since + data version เดิม = ข้อมูลไม่เปลี่ยน)
+    """
+    class Kind(models.TextChoices):
+        ASSETS = "assets", "Assets"
+        TICKETS = "tickets", "Tickets"
+        PARTS = "parts", "Parts"
+        MOVEMENTS = "movements", "Movements"
+
+    class Status(models.TextChoices):
+        QUEUED = "QUEUED", "Queued"
+        RUNNING = "RUNNING", "Running"
+        DONE = "DONE", "Done"
+        FAILED = "FAILED", "Failed"
+
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+
+    # since != None คือ delta export: เฉพาะแถวที่เปลี่ยนตั้งแต่เวลานั้น
+    since = models.DateTimeField(null=True, blank=True)
+    fingerprint = models.CharField(max_length=64, db_index=True)
+    data_version = models.CharField(max_length=200, blank=True, default="")
+
+    # เวลาที่เริ่ม query ข้อมูล ใช้เป็น since ของ delta ครั้งถัดไป
+    cutoff_at = models.DateTimeField(null=True, blank=True)
+    file = models.FileField(upload_to="exports/", blank=True, default="")
+    row_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    # lease ของ worker: attempts เพิ่มทุกครั้งที่ถูก claim, heartbeat_at ต่ออายุระหว่างเขียนไฟล์
+    # job ที่ heartbeat ขาดนานเกินจะถูก requeue; worker เดิมเห็น attempts เปลี่ยนแล้วหยุดเอง
+    attempts = models.PositiveIntegerField(default=0)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def is_pending(self) -> bool:
+        return self.status in {self.Status.QUEUED, self.Status.RUNNING}
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} {self.status}"
+
+
+class ExportVersion(models.Model):
+    """
+    stamp ต่อ export kind ส่วนหนึ่งของ data_version; signals_exports bump เมื่อ
+    - แถวของตารางหลักถูกลบ (Max(updated_at)/Max(id) มองไม่เห็น)
+    - ชื่อในตารางที่ export join ไปเปลี่ยน (category, department, location, vendor, username, asset_code, sku, ticket_no)
+    """
+    kind = models.CharField(max_length=20, choices=ExportJob.Kind.choices, primary_key=True)
+    stamp = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.kind}={self.stamp}"
+
+
+class OutboxEvent(models.Model):
+    """
+    transactional outbox: เขียนใน transaction เดียวกับการเปลี่ยนแปลง (ticket / stock)
+    แล้ว `manage.py run_outbox` ส่งต่อเป็น Notification + webhook ทีหลัง
+    event ที่ key + topic เดียวกันภายใน coalesce window จะถูกรวมเหลือตัวล่าสุดตัวเดียว
+    """
+    class Topic(models.TextChoices):
+        TICKET_CREATED = "ticket.created", "Ticket created"
+        TICKET_UPDATED = "ticket.updated", "Ticket updated"
+        TICKET_CLOSED = "ticket.closed", "Ticket closed"
+        STOCK_LOW = "stock.low", "Low stock"
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        DONE = "DONE", "Done"
+        COALESCED = "COALESCED", "Coalesced"
+        FAILED = "FAILED", "Failed"
+
+    topic = models.CharField(max_length=40, choices=Topic.choices)
+    # เช่น "ticket:12", "part:3" ใช้รวม event ซ้ำของ object เดียวกัน
+    key = models.CharField(max_length=80)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+
+    # สร้าง notification แล้ว (เหลือ webhook ที่ยังส่งไม่ผ่าน)
+    notified_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(
+                fields=["available_at", "id"],
+                condition=models.Q(status="PENDING"),
+                name="outbox_pending_idx",
+            ),
+            models.Index(fields=["key"], condition=models.Q(status="PENDING"), name="outbox_pending_key_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} {self.key} #{self.pk} {self.status}"
+
+
+# -----------------------
+# Dashboard KPI snapshot
+# -----------------------
+class KpiCounter(models.Model):
+    """
+    ค่า KPI ของ dashboard แบบ key/value อัปเดตทีละ delta จาก signals_kpi
+    - tickets_open, assets_total
+    - cost:YYYY-MM           ค่าใช้จ่ายรวมของ ticket ตามเดือนที่สร้าง
+    - due:YYYY-MM-DDTHH:MM   จำนวน ticket ที่ยังเปิดและครบกำหนดในนาทีนั้น (UTC)
+      => overdue = ผลรวม due:* ที่น้อยกว่านาทีปัจจุบัน (key เรียงตามเวลาเป็น string ได้)
+      bucket ที่เหลือ 0 ถูกลบทันที จำนวนแถว due:* จึงไม่เกินจำนวน ticket ที่ยังเปิด
+    ชื่อจริงมี slot ต่อท้าย ("tickets_open#3", ดู core.kpi.slot_of) ค่าของ KPI = ผลรวมทุก slot
+    สร้างใหม่ทั้งหมดด้วย `manage.py rebuild_kpis`
+    """
+    name = models.CharField(max_length=40, primary_key=True)
+    value = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.name}={self.value}"
+
+
+class AssetTicketCount(models.Model):
+    """จำนวน ticket ต่อ asset สำหรับ Top Assets แทน annotate(Count) ทั้งตาราง"""
+    asset = models.OneToOneField(Asset, on_delete=models.CASCADE, primary_key=True, related_name="ticket_stats")
+    tickets = models.IntegerField(default=0, db_index=True)
+
+    def __str__(self):
+        return f"{self.asset_id}: {self.tickets}"
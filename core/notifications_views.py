@@ -2,27 +2,26 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import redirect
 from django.views.generic import ListView, View
 from .models import Notification
+from .notify import mark_all_read, mark_read, notifications_for
+from .pagination import CursorPaginationMixin
 
-class NotificationListView(LoginRequiredMixin, ListView):
+class NotificationListView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     model = Notification
     template_name = "core/notifications.html"
     context_object_name = "items"
     paginate_by = 20
 
     def get_queryset(self):
-        return (
-            Notification.objects
-            .filter(recipient_id=self.request.user.id)
-            .order_by("-created_at")
-        )
+        # direct + broadcast (audience ของ user) รวมใน query เดียว
+        return notifications_for(self.request.user)
 
 
 class NotificationMarkReadView(LoginRequiredMixin, View):
     def post(self, request, pk):
-        Notification.objects.filter(pk=pk, recipient=request.user).update(is_read=True)
+        mark_read(request.user, pk)
         return redirect("core:notifications")
 
 class NotificationMarkAllReadView(LoginRequiredMixin, View):
     def post(self, request):
-        Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True)
+        mark_all_read(request.user)
         return redirect("core:notifications")
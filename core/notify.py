@@ -1,20 +1,193 @@
+import time
+from collections import Counter
+
+from django.conf import settings
 from django.contrib.auth.models import User, Group
-from .models import Notification
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Exists, F, OuterRef, Q, Subquery, Value, When, BooleanField
+from django.db.models.functions import Coalesce
+from .models import Notification, NotificationCounter, NotificationRead, NotificationReadCursor
+from .permissions import get_group_names
+
+# unread badge cache: backend ร่วม (settings.SHARED_CACHE เช่น Redis) เก็บได้นานเพราะ run_outbox ลบให้
+# LocMem แยกต่อ process: notification จาก run_outbox (คนละ process) ลบ cache ของ web worker ไม่ได้
+# -> เก็บสั้น ๆ แค่ UNREAD_LOCAL_TIMEOUT (badge ช้าได้ไม่เกินนี้ แต่ไม่ query ทุกหน้า)
+UNREAD_CACHE_TIMEOUT = 60 * 10
+UNREAD_LOCAL_TIMEOUT = 15
+
+# audience ของ broadcast: role -> group ที่เห็น; ค่าอื่นถือเป็นชื่อ group ตรง ๆ
+BROADCAST_AUDIENCES = {
+    "IT": ["ADMIN", "IT"],
+}
+
+# เปลี่ยนทุกครั้งที่มี broadcast ใหม่ -> cache unread ของทุกคนหมดอายุพร้อมกันใน op เดียว
+BROADCAST_VERSION_KEY = "notify:broadcast_version"
+
+
+def _broadcast_version():
+    return cache.get_or_set(BROADCAST_VERSION_KEY, time.time_ns, None)
+
+
+def unread_cache_key(user_id) -> str:
+    return f"notify:unread:{user_id}:{_broadcast_version()}"
+
+
+def user_audiences(user) -> list[str]:
+    names = get_group_names(user)
+    roles = [role for role, groups in BROADCAST_AUDIENCES.items() if not names.isdisjoint(groups)]
+    return roles + sorted(names)
+
+
+# -----------------------
+# Read side
+# -----------------------
+def _read_cursor(user_id):
+    return Coalesce(
+        Subquery(NotificationReadCursor.objects.filter(user_id=user_id).values("read_through")[:1]),
+        0,
+    )
+
+
+def broadcasts_for(user):
+    return Notification.objects.filter(
+        recipient__isnull=True,
+        audience__in=user_audiences(user),
+        created_at__gte=user.date_joined,
+    )
+
+
+def notifications_for(user):
+    """direct + broadcast ใน query เดียว พร้อม annotation `seen` (อ่านแล้วหรือยัง)"""
+    audiences = user_audiences(user)
+    return (
+        Notification.objects.filter(
+            Q(recipient_id=user.pk)
+            | Q(recipient__isnull=True, audience__in=audiences, created_at__gte=user.date_joined)
+        )
+        .annotate(
+            seen=Case(
+                When(recipient__isnull=False, then=F("is_read")),
+                When(id__lte=_read_cursor(user.pk), then=Value(True)),
+                When(
+                    Exists(NotificationRead.objects.filter(user_id=user.pk, notification_id=OuterRef("pk"))),
+                    then=Value(True),
+                ),
+                default=Value(False),
+                output_field=BooleanField(),
+            )
+        )
+        .order_by("-created_at", "-id")
+    )
+
+
+def broadcast_unread_count(user) -> int:
+    return (
+        broadcasts_for(user)
+        .filter(id__gt=_read_cursor(user.pk))
+        .exclude(Exists(NotificationRead.objects.filter(user_id=user.pk, notification_id=OuterRef("pk"))))
+        .count()
+    )
 
+
+def get_unread_count(user) -> int:
+    """จำนวนที่ยังไม่อ่าน: cache -> NotificationCounter (direct) + broadcast หลัง read cursor"""
+    key = unread_cache_key(user.pk)
+    unread = cache.get(key)
+    if unread is None:
+        direct = (
+            NotificationCounter.objects.filter(user_id=user.pk).values_list("unread", flat=True).first()
+            or 0
+        )
+        unread = direct + broadcast_unread_count(user)
+        cache.set(key, unread, UNREAD_CACHE_TIMEOUT if settings.SHARED_CACHE else UNREAD_LOCAL_TIMEOUT)
+    return unread
+
+
+def _forget_unread(user_ids):
+    # ลบ cache หลัง commit กัน request อื่นอ่านค่าเก่าไป cache ซ้ำระหว่าง transaction
+    # (LocMem: ถึงเฉพาะ process นี้ ที่เหลือหมดอายุเองใน UNREAD_LOCAL_TIMEOUT)
+    user_ids = list(user_ids)
+    transaction.on_commit(lambda: cache.delete_many([unread_cache_key(uid) for uid in user_ids]))
+
+
+def adjust_unread(user_ids, delta: int):
+    user_ids = list(user_ids)
+    if not user_ids or not delta:
+        return
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=uid) for uid in user_ids], ignore_conflicts=True
+    )
+    NotificationCounter.objects.filter(user_id__in=user_ids).update(unread=F("unread") + delta)
+    _forget_unread(user_ids)
+
+
+def reset_unread(user_id):
+    NotificationCounter.objects.filter(user_id=user_id).update(unread=0)
+    _forget_unread([user_id])
+
+
+def mark_read(user, pk) -> bool:
+    """คืน True ถ้าเพิ่งถูก mark ว่าอ่าน (อ่านซ้ำ/ไม่ใช่ของ user = False)"""
+    with transaction.atomic():
+        if Notification.objects.filter(pk=pk, recipient=user, is_read=False).update(is_read=True):
+            adjust_unread([user.pk], -1)
+            return True
+
+        if not broadcasts_for(user).filter(pk=pk).exclude(id__lte=_read_cursor(user.pk)).exists():
+            return False
+        created = NotificationRead.objects.bulk_create(
+            [NotificationRead(user_id=user.pk, notification_id=pk)], ignore_conflicts=True
+        )
+        _forget_unread([user.pk])
+        return bool(created)
+
+
+def mark_all_read(user):
+    with transaction.atomic():
+        Notification.objects.filter(recipient=user, is_read=False).update(is_read=True)
+        reset_unread(user.pk)
+
+        last_id = broadcasts_for(user).order_by("-id").values_list("id", flat=True).first()
+        if last_id:
+            NotificationReadCursor.objects.update_or_create(user_id=user.pk, defaults={"read_through": last_id})
+            NotificationRead.objects.filter(user_id=user.pk, notification_id__lte=last_id).delete()
+
+
+# -----------------------
+# Write side
+# -----------------------
 def users_in_groups(group_names: list[str]):
     return User.objects.filter(groups__name__in=group_names, is_active=True).distinct()
 
+def save_notifications(notis):
+    """bulk insert notification ทั้ง direct และ broadcast พร้อมอัปเดต unread counter/cache"""
+    notis = list(notis)
+    if not notis:
+        return notis
+    with transaction.atomic():
+        Notification.objects.bulk_create(notis)
+        # ปกติ 1 noti ต่อ user; ถ้า users ซ้ำกันก็บวกตามจำนวนจริง
+        per_user = Counter(n.recipient_id for n in notis if n.recipient_id)
+        for delta in set(per_user.values()):
+            adjust_unread([uid for uid, n in per_user.items() if n == delta], delta)
+        if any(n.recipient_id is None for n in notis):
+            transaction.on_commit(lambda: cache.set(BROADCAST_VERSION_KEY, time.time_ns(), None))
+    return notis
+
 def notify_users(users, ntype, title, message="", url=""):
-    notis = []
-    for u in users:
-        notis.append(Notification(
-            recipient=u, ntype=ntype, title=title, message=message, url=url
-        ))
-    Notification.objects.bulk_create(notis)
+    save_notifications(
+        Notification(recipient=u, ntype=ntype, title=title, message=message, url=url) for u in users
+    )
+
+def notify_broadcast(audience, ntype, title, message="", url=""):
+    """เขียนแถวเดียวไม่ว่า audience มีกี่คน"""
+    noti = Notification(audience=audience, ntype=ntype, title=title, message=message, url=url)
+    save_notifications([noti])
+    return noti
 
 def notify_it(ntype, title, message="", url=""):
-    users = users_in_groups(["ADMIN", "IT"])
-    notify_users(users, ntype, title, message, url)
+    return notify_broadcast("IT", ntype, title, message, url)
 
 def notify_requester(ticket, ntype, title, message="", url=""):
     if ticket.requested_by and ticket.requested_by.is_active:
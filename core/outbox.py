@@ -0,0 +1,188 @@
+"""
+Transactional outbox ของ notification / webhook
+
+request path แค่ `publish()` แถวเดียวลง OutboxEvent ใน transaction เดียวกับการเปลี่ยนแปลง
+ส่วนงานที่ช้า (สร้าง Notification, POST webhook) ทำโดย `manage.py run_outbox`
+"""
+import json
+import logging
+import urllib.request
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification, OutboxEvent
+from .notify import save_notifications
+
+logger = logging.getLogger(__name__)
+
+# POST ไม่ผ่าน -> รอ 2, 4, 8, ... วินาที (สูงสุด 5 นาที) ก่อนลองใหม่
+MAX_BACKOFF_SECONDS = 300
+
+
+def publish(topic, key, *, ntype, title, message="", url="", audience="", recipient_id=None, data=None):
+    """บันทึก event ลง outbox (ต้องเรียกใน transaction เดียวกับการเปลี่ยนแปลงนั้น)"""
+    event = OutboxEvent.objects.create(
+        topic=topic,
+        key=key,
+        payload={
+            "notification": {
+                "ntype": ntype, "title": title, "message": message, "url": url,
+                "audience": audience, "recipient_id": recipient_id,
+            },
+            "data": data or {},
+        },
+    )
+    if settings.OUTBOX_INLINE:
+        # dev ที่ไม่มี worker: ส่งทันทีหลัง commit (งานกลับมาอยู่บน request path)
+        transaction.on_commit(lambda: process_batch(window=0))
+    return event
+
+
+def ticket_data(ticket) -> dict:
+    return {
+        "ticket_id": ticket.pk,
+        "ticket_no": ticket.ticket_no,
+        "status": ticket.status,
+        "priority": ticket.priority,
+        "asset_id": ticket.asset_id,
+    }
+
+
+# -----------------------
+# Worker side
+# -----------------------
+def _pending():
+    return OutboxEvent.objects.filter(status=OutboxEvent.Status.PENDING)
+
+
+def coalesce(events):
+    """key + topic เดียวกัน -> เก็บ event ล่าสุดไว้ตัวเดียว; คืน (kept, superseded)"""
+    latest = {}
+    for event in sorted(events, key=lambda e: e.pk):
+        latest[(event.key, event.topic)] = event
+    kept = sorted(latest.values(), key=lambda e: e.pk)
+    kept_ids = {e.pk for e in kept}
+    return kept, [e for e in events if e.pk not in kept_ids]
+
+
+def _build_notifications(events):
+    specs = [e.payload.get("notification") or {} for e in events]
+    recipient_ids = {s["recipient_id"] for s in specs if s.get("recipient_id")}
+    active = set(User.objects.filter(pk__in=recipient_ids, is_active=True).values_list("pk", flat=True))
+
+    notis = []
+    for spec in specs:
+        fields = {k: spec.get(k, "") for k in ("ntype", "title", "message", "url")}
+        if spec.get("recipient_id"):
+            if spec["recipient_id"] in active:
+                notis.append(Notification(recipient_id=spec["recipient_id"], **fields))
+        elif spec.get("audience"):
+            notis.append(Notification(audience=spec["audience"], **fields))
+    return notis
+
+
+def notify_batch(limit=200, window=None, now=None):
+    """
+    สร้าง Notification ของ event ที่ค้างอยู่ครบ coalesce window แล้ว
+    event ใหม่กว่าของ key เดียวกันถูกดึงมารวมรอบนี้ด้วย ทำให้หน่วงไม่เกิน window
+    คืน (notified, coalesced)
+    """
+    now = now or timezone.now()
+    window = settings.OUTBOX_COALESCE_SECONDS if window is None else window
+    webhooks = bool(settings.OUTBOX_WEBHOOK_URLS)
+
+    with transaction.atomic():
+        todo = _pending().filter(notified_at__isnull=True).select_for_update(skip_locked=True)
+        heads = list(
+            todo.filter(available_at__lte=now, created_at__lte=now - timedelta(seconds=window))
+            .order_by("id")[:limit]
+        )
+        if not heads:
+            return 0, 0
+        tail = list(todo.filter(key__in={e.key for e in heads}).exclude(pk__in=[e.pk for e in heads]))
+        kept, superseded = coalesce(heads + tail)
+
+        save_notifications(_build_notifications(kept))
+
+        OutboxEvent.objects.filter(pk__in=[e.pk for e in superseded]).update(
+            status=OutboxEvent.Status.COALESCED, notified_at=now, processed_at=now,
+        )
+        done = {"notified_at": now}
+        if not webhooks:
+            done.update(status=OutboxEvent.Status.DONE, processed_at=now)
+        OutboxEvent.objects.filter(pk__in=[e.pk for e in kept]).update(**done)
+    return len(kept), len(superseded)
+
+
+def webhook_body(event) -> bytes:
+    return json.dumps(
+        {
+            "id": event.pk,
+            "topic": event.topic,
+            "key": event.key,
+            "created_at": event.created_at,
+            "data": event.payload.get("data", {}),
+            "notification": event.payload.get("notification", {}),
+        },
+        cls=DjangoJSONEncoder,
+    ).encode()
+
+
+def post_webhook(url, event):
+    req = urllib.request.Request(
+        url,
+        data=webhook_body(event),
+        method="POST",
+        headers={"Content-Type": "application/json", "X-Outbox-Event": str(event.pk)},
+    )
+    # status >= 400 -> HTTPError
+    with urllib.request.urlopen(req, timeout=settings.OUTBOX_WEBHOOK_TIMEOUT) as resp:
+        resp.read()
+
+
+def deliver_webhooks(limit=100, now=None):
+    """POST event ที่สร้าง notification แล้วไปทุก OUTBOX_WEBHOOK_URLS; คืน (delivered, failed)"""
+    urls = settings.OUTBOX_WEBHOOK_URLS
+    if not urls:
+        return 0, 0
+    now = now or timezone.now()
+    lease = timedelta(seconds=settings.OUTBOX_WEBHOOK_TIMEOUT * len(urls) + 30)
+
+    delivered = failed = 0
+    for event in _pending().filter(notified_at__isnull=False, available_at__lte=now).order_by("id")[:limit]:
+        # claim แบบ conditional update กัน worker อื่นส่งซ้ำระหว่างที่กำลัง POST
+        if not _pending().filter(pk=event.pk, available_at=event.available_at).update(available_at=now + lease):
+            continue
+        try:
+            for url in urls:
+                post_webhook(url, event)
+        except Exception as e:
+            attempts = event.attempts + 1
+            gave_up = attempts >= settings.OUTBOX_MAX_ATTEMPTS
+            OutboxEvent.objects.filter(pk=event.pk).update(
+                attempts=attempts,
+                last_error=str(e)[:1000],
+                available_at=now + timedelta(seconds=min(2 ** attempts, MAX_BACKOFF_SECONDS)),
+                status=OutboxEvent.Status.FAILED if gave_up else OutboxEvent.Status.PENDING,
+                processed_at=now if gave_up else None,
+            )
+            logger.warning("outbox event %s webhook failed (attempt %s): %s", event.pk, attempts, e)
+            failed += 1
+            continue
+        OutboxEvent.objects.filter(pk=event.pk).update(
+            status=OutboxEvent.Status.DONE, attempts=event.attempts + 1, processed_at=timezone.now(),
+        )
+        delivered += 1
+    return delivered, failed
+
+
+def process_batch(limit=200, window=None):
+    """หนึ่งรอบของ worker: notification ก่อนแล้วค่อย webhook; คืน dict สรุปจำนวน"""
+    notified, coalesced = notify_batch(limit=limit, window=window)
+    delivered, failed = deliver_webhooks(limit=limit)
+    return {"notified": notified, "coalesced": coalesced, "delivered": delivered, "failed": failed}
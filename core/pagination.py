@@ -0,0 +1,209 @@
+"""
+Pagination ของตารางใหญ่
+
+- Keyset (cursor) บน (created_at, id) แทน OFFSET/LIMIT + COUNT(*):
+  หน้าถัดไป = "แถวที่เก่ากว่าแถวสุดท้ายของหน้านี้" จึงอ่านแค่ page_size + 1 แถวผ่าน index ไม่ว่าจะลึกไปกี่หน้า;
+  cursor เป็น token ทึบใน URL (?cursor=...) ส่วน filter อื่นคงอยู่ใน querystring
+- EstimatedCountPaginator: list ที่ยังใช้เลขหน้า นับด้วยค่าประมาณของ planner เมื่อผลลัพธ์ใหญ่
+"""
+import base64
+import hashlib
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+
+def encode_cursor(obj, direction: str) -> str:
+    raw = json.dumps([obj.created_at.isoformat(), obj.pk, direction], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str):
+    """คืน (created_at, id, direction) หรือ None ถ้า token ว่าง/เสีย (กลับไปหน้าแรก)"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        created_at, pk, direction = json.loads(raw)
+        if direction not in ("n", "p"):
+            return None
+        return datetime.fromisoformat(created_at), int(pk), direction
+    except (ValueError, TypeError):
+        return None
+
+
+def _older_than(created_at, pk):
+    # (created_at, id) < (c, i) เขียนเป็นช่วงของ created_at ให้ DB เดิน index แล้วหยุดที่ LIMIT ได้
+    return Q(created_at__lte=created_at) & ~Q(created_at=created_at, id__gte=pk)
+
+
+def _newer_than(created_at, pk):
+    return Q(created_at__gte=created_at) & ~Q(created_at=created_at, id__lte=pk)
+
+
+class CursorPage:
+    """ใช้แทน Page ใน template (page_obj) — ไม่มีเลขหน้า/จำนวนทั้งหมด"""
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+
+def keyset_page(queryset, cursor, page_size) -> CursorPage:
+    """ใหม่สุดก่อน (-created_at, -id); อ่าน page_size + 1 แถวเพื่อรู้ว่ามีหน้าต่อไหม"""
+    decoded = decode_cursor(cursor)
+
+    if decoded and decoded[2] == "p":
+        # ย้อนหน้า: เดินขึ้นจากแถวแรกของหน้าปัจจุบันแล้วกลับลำดับ
+        created_at, pk, _ = decoded
+        rows = list(queryset.filter(_newer_than(created_at, pk)).order_by("created_at", "id")[:page_size + 1])
+        more = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        return CursorPage(
+            rows,
+            next_cursor=encode_cursor(rows[-1], "n") if rows else None,
+            previous_cursor=encode_cursor(rows[0], "p") if rows and more else None,
+        )
+
+    qs = queryset.order_by("-created_at", "-id")
+    if decoded:
+        qs = qs.filter(_older_than(*decoded[:2]))
+    rows = list(qs[:page_size + 1])
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    return CursorPage(
+        rows,
+        next_cursor=encode_cursor(rows[-1], "n") if more else None,
+        previous_cursor=encode_cursor(rows[0], "p") if decoded and rows else None,
+    )
+
+
+class CursorPaginationMixin:
+    """
+    ListView ที่ model มี created_at: ใช้ keyset_page แทน Paginator
+    template ใช้ core/partials/pagination.html ได้เหมือนเดิม (page_obj.is_cursor)
+    """
+    cursor_param = "cursor"
+
+    def paginate_queryset(self, queryset, page_size):
+        if not isinstance(queryset, QuerySet):
+            # ผลค้นหาที่จัดอันดับแล้ว (RankedResults) ไม่ได้เรียงตามเวลา -> ใช้เลขหน้าแบบเดิม
+            return super().paginate_queryset(queryset, page_size)
+        page = keyset_page(queryset, self.request.GET.get(self.cursor_param), page_size)
+        return None, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        if isinstance(self.object_list, QuerySet):
+            # ไม่มี COUNT(*) แต่ PostgreSQL ยังบอกจำนวนคร่าว ๆ จาก planner ได้ (DB อื่น = None)
+            ctx["estimated_total"] = estimate_count(self.object_list)
+        return ctx
+
+
+# -----------------------
+# Estimated counts
+# -----------------------
+# COUNT ที่ได้น้อยกว่านี้ไม่ cache (นับเร็วอยู่แล้ว และไม่อยากให้ยอดค้างหลังเพิ่มข้อมูล)
+CACHE_COUNT_MIN = 1000
+
+
+def estimate_count(queryset):
+    """
+    จำนวนแถวโดยประมาณจาก PostgreSQL: ไม่มี filter = pg_class.reltuples, มี filter = Plan Rows ของ EXPLAIN
+    DB อื่น / ยังไม่เคย ANALYZE -> None
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+            return int(row[0]) if row and row[0] >= 0 else None
+        sql, params = queryset.order_by().values("pk").query.sql_with_params()
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def cached_count(queryset) -> int:
+    """COUNT(*) จริง; ผลลัพธ์ใหญ่เก็บ cache สั้น ๆ ตาม SQL + params"""
+    sql, params = queryset.query.sql_with_params()
+    key = "count:" + hashlib.md5(f"{queryset.db}:{sql}:{params!r}".encode()).hexdigest()
+    n = cache.get(key)
+    if n is None:
+        n = queryset.count()
+        if n >= CACHE_COUNT_MIN:
+            cache.set(key, n, settings.PAGINATION_COUNT_CACHE_SECONDS)
+    return n
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator ที่ไม่ COUNT(*) ทั้งผลลัพธ์เมื่อ planner ประมาณว่าเกิน PAGINATION_ESTIMATE_THRESHOLD
+    (`estimated` = True ให้ template แสดง "about N"); หน้าที่ขอจะอ่าน per_page + 1 แถวเพื่อให้ Next ถูกเสมอ
+    """
+    estimated = False
+
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+        n = estimate_count(self.object_list)
+        if n is not None and n >= settings.PAGINATION_ESTIMATE_THRESHOLD:
+            self.estimated = True
+            return n
+        return cached_count(self.object_list)
+
+    def validate_number(self, number):
+        if not (self.count and self.estimated):
+            return super().validate_number(number)
+        # ค่าประมาณอาจต่ำกว่าจริง: ไม่ตัดเลขหน้าที่เกิน num_pages ทิ้ง ให้ page() ดูจากแถวจริง
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages["invalid_page"])
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.estimated:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages["no_results"])
+        if len(rows) > self.per_page:
+            self.count = max(self.count, bottom + len(rows))
+        else:
+            # ถึงหน้าสุดท้ายจริงแล้ว = รู้จำนวนจริง
+            self.count, self.estimated = bottom + len(rows), False
+        self.__dict__.pop("num_pages", None)
+        return self._get_page(rows[:self.per_page], number, self)
@@ -1,8 +1,57 @@
+import itertools
+
+from django.conf import settings
 from django.contrib.auth.mixins import UserPassesTestMixin
+from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
 
+# ชื่อ group ของ user ถูก resolve ครั้งเดียวต่อ request (memo บน user object)
+# และแชร์ข้าม request/worker ผ่าน cache เมื่อ settings.SHARED_CACHE;
+# signals_permissions ลบ cache หลัง commit เมื่อ membership/ชื่อ group เปลี่ยน
+GROUP_CACHE_TIMEOUT = 60 * 60
+
+# user_id -> ลำดับครั้งล่าสุดที่ group เปลี่ยนใน process นี้: memo ที่จำไว้ก่อนหน้านั้นถือว่าเก่า
+# (group.user_set.add(...) ให้มาแค่ pk ไม่มี user object ให้ล้าง memo ตรง ๆ)
+_changed_at = {}
+_changes = itertools.count(1)
+
+
+def group_cache_key(user_id) -> str:
+    return f"perm:groups:{user_id}"
+
+
+def get_group_names(user) -> frozenset:
+    if not user.is_authenticated:
+        return frozenset()
+
+    changed_at = _changed_at.get(user.pk, 0)
+    memo = getattr(user, "_group_names", None)
+    if memo is None or memo[0] != changed_at:
+        key = group_cache_key(user.pk)
+        # memo เก่าเพราะเพิ่งเปลี่ยน group -> อ่าน DB ตรง (cache ร่วมยังเป็นค่าเดิมจนกว่าจะ commit)
+        names = cache.get(key) if settings.SHARED_CACHE and memo is None else None
+        if names is None:
+            names = frozenset(user.groups.values_list("name", flat=True))
+            if settings.SHARED_CACHE:
+                cache.set(key, names, GROUP_CACHE_TIMEOUT)
+        memo = user._group_names = (changed_at, names)
+    return memo[1]
+
+
+def invalidate_group_cache(user_ids):
+    user_ids = list(user_ids)
+    # memo ของ user object ที่ยังใช้อยู่ (รวม request ที่เพิ่งเปลี่ยน group เอง) หมดอายุทันที
+    for uid in user_ids:
+        _changed_at[uid] = next(_changes)
+    # ลบหลัง commit: ถ้าลบก่อน request อื่นอาจอ่าน membership เดิมแล้ว cache ค้างอีกชั่วโมง
+    keys = [group_cache_key(uid) for uid in user_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
 def in_group(user, group_name: str) -> bool:
-    return user.is_authenticated and user.groups.filter(name=group_name).exists()
+    return group_name in get_group_names(user)
 
 
 def is_admin(user) -> bool:
@@ -30,7 +79,7 @@ class GroupRequiredMixin(UserPassesTestMixin):
             return True
         if not u.is_authenticated:
             return False
-        return any(u.groups.filter(name=g).exists() for g in self.required_groups)
+        return not get_group_names(u).isdisjoint(self.required_groups)
 
 def can_edit_ticket(user, ticket) -> bool:
     if not user.is_authenticated:
@@ -45,4 +94,4 @@ def can_edit_ticket(user, ticket) -> bool:
     if ticket.status in [ticket.Status.DONE, ticket.Status.CLOSED, ticket.Status.CANCELED]:
         return False
 
-    return True
\ No newline at end of file
+    return True
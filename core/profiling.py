@@ -0,0 +1,84 @@
+"""
+Sampling profiler ของ request (opt-in: ตั้ง PROFILE_DIR)
+
+- สุ่ม PROFILE_SAMPLE_RATE ของ request ทั้งหมด หรือ
+- staff/ADMIN ส่ง header `X-Profile: 1` มา (response ได้ `X-Profile-File` กลับไป)
+ผลเป็นไฟล์ cProfile `.pstats` ที่ PROFILE_DIR/<view>/ เก็บล่าสุดไม่เกิน PROFILE_MAX_FILES ไฟล์
+สรุปด้วย `manage.py profile_summary <view>`
+"""
+import cProfile
+import os
+import random
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+from .permissions import is_admin
+
+# cProfile (3.12+ ใช้ sys.monitoring) จับได้ทีละตัวต่อ process -> request ที่ชนกันข้ามไป
+_active = threading.Lock()
+
+
+def view_dirname(view_name: str) -> str:
+    return view_name.replace(":", "_").replace("/", "_") or "_unresolved"
+
+
+def profile_files(view_name=None):
+    root = Path(settings.PROFILE_DIR)
+    pattern = f"{view_dirname(view_name)}/*.pstats" if view_name else "*/*.pstats"
+    # ชื่อไฟล์ขึ้นต้นด้วยเวลา (ถึง microsecond) -> เรียงตามชื่อ = เก่าไปใหม่
+    return sorted(root.glob(pattern), key=lambda p: p.name)
+
+
+def rotate(keep: int):
+    files = profile_files()
+    for old in files[:max(0, len(files) - keep)]:
+        old.unlink(missing_ok=True)
+
+
+class ProfilerMiddleware:
+    def __init__(self, get_response):
+        if not settings.PROFILE_DIR:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def _requested(self, request) -> bool:
+        if request.headers.get("X-Profile") != "1":
+            return False
+        user = getattr(request, "user", None)
+        return bool(user and user.is_authenticated and (user.is_staff or is_admin(user)))
+
+    def __call__(self, request):
+        on_demand = self._requested(request)
+        if not (on_demand or random.random() < settings.PROFILE_SAMPLE_RATE):
+            return self.get_response(request)
+        if not _active.acquire(blocking=False):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        finally:
+            _active.release()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        match = getattr(request, "resolver_match", None)
+        folder = Path(settings.PROFILE_DIR) / view_dirname(match.view_name if match else "")
+        folder.mkdir(parents=True, exist_ok=True)
+        # เวลา request อยู่ในชื่อไฟล์ ให้ profile_summary บอก p50 ได้โดยไม่ต้องเปิดไฟล์
+        path = folder / f"{timezone.now():%Y%m%dT%H%M%S%f}-{os.getpid()}-{int(elapsed_ms)}ms.pstats"
+        profiler.dump_stats(path)
+        rotate(settings.PROFILE_MAX_FILES)
+
+        if on_demand:
+            response["X-Profile-File"] = str(path)
+        return response
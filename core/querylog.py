@@ -0,0 +1,118 @@
+"""
+Slow query log + N+1 detector
+
+ทุก query ของ request ถูกย่อเป็น "shape" (ตัดค่า literal / รวม IN (...) ให้เหลือรูปเดียว)
+- query ที่ช้ากว่า QUERYLOG_SLOW_MS -> log พร้อมชื่อ view
+- shape เดียวกันรันเกิน QUERYLOG_REPEAT_THRESHOLD ครั้งใน request เดียว -> log N+1 พร้อม call site
+- QUERYLOG_JSONL=<path> เขียนสรุปทุก request เป็น JSON lines ไว้วิเคราะห์ทีหลัง
+"""
+import json
+import logging
+import re
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN \(\?(?:, ?\?)*\)", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+
+_jsonl_lock = threading.Lock()
+
+
+def shape(sql: str) -> str:
+    """SQL -> รูปแบบที่ไม่ขึ้นกับค่า: `id = 5` / `id = %s` -> `id = ?`, `IN (1, 2, 3)` -> `IN (...)`"""
+    s = _LITERAL_RE.sub("?", sql.replace("%s", "?"))
+    s = _IN_LIST_RE.sub("IN (...)", s)
+    return _SPACE_RE.sub(" ", s).strip()
+
+
+def call_site(limit=8) -> str:
+    """stack เฉพาะโค้ดของโปรเจกต์ (ไม่รวม Django/site-packages และไฟล์นี้)"""
+    base = str(settings.BASE_DIR)
+    frames = [
+        f for f in traceback.extract_stack()
+        if f.filename.startswith(base) and "site-packages" not in f.filename and f.filename != __file__
+    ]
+    return "".join(traceback.format_list(frames[-limit:]))
+
+
+class QueryWatch:
+    """execute_wrapper ที่นับ query ตาม shape; `label` เป็น callable เพราะชื่อ view รู้หลัง resolve URL"""
+
+    def __init__(self, label, slow_ms=None, repeat_threshold=None):
+        self.label = label
+        self.slow_ms = settings.QUERYLOG_SLOW_MS if slow_ms is None else slow_ms
+        self.repeat_threshold = settings.QUERYLOG_REPEAT_THRESHOLD if repeat_threshold is None else repeat_threshold
+        self.shapes = {}  # shape -> [count, seconds]
+        self.slow = []
+        self.repeated = {}  # shape -> call site ตอนเกิน threshold ครั้งแรก
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            key = shape(sql)
+            entry = self.shapes.setdefault(key, [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            if elapsed * 1000 >= self.slow_ms:
+                self.slow.append({"sql": sql, "ms": round(elapsed * 1000, 2)})
+                logger.warning("slow query %.1fms in %s: %s", elapsed * 1000, self.label(), sql)
+            if entry[0] == self.repeat_threshold + 1:
+                self.repeated[key] = call_site()
+
+    def report(self):
+        """log N+1 ที่เจอ (+ JSON lines ถ้าตั้งไว้); เรียกตอนจบ request"""
+        label = self.label()
+        for key, site in self.repeated.items():
+            count, seconds = self.shapes[key]
+            logger.warning(
+                "N+1 in %s: same query ran %d times (%.1fms): %s\n%s", label, count, seconds * 1000, key, site
+            )
+        if settings.QUERYLOG_JSONL:
+            self._write_jsonl(label)
+
+    def _write_jsonl(self, label):
+        record = {
+            "at": timezone.now().isoformat(),
+            "view": label,
+            "queries": sum(n for n, _ in self.shapes.values()),
+            "db_ms": round(sum(s for _, s in self.shapes.values()) * 1000, 2),
+            "shapes": [
+                {"shape": k, "count": n, "ms": round(s * 1000, 2)}
+                for k, (n, s) in sorted(self.shapes.items(), key=lambda kv: -kv[1][1])
+            ],
+            "slow": self.slow,
+            "repeated": [{"shape": k, "count": self.shapes[k][0], "call_site": v} for k, v in self.repeated.items()],
+        }
+        line = json.dumps(record, ensure_ascii=False)
+        with _jsonl_lock, open(settings.QUERYLOG_JSONL, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class QueryLogMiddleware:
+    def __init__(self, get_response):
+        if not settings.QUERYLOG_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        def label():
+            match = getattr(request, "resolver_match", None)
+            return match.view_name if match else request.path
+
+        watch = QueryWatch(label)
+        with connection.execute_wrapper(watch):
+            response = self.get_response(request)
+        watch.report()
+        return response
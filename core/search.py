@@ -0,0 +1,242 @@
+"""
+ค้นหา ticket / asset ผ่าน search document แทน icontains ทั้งตาราง
+
+Ticket (TicketSearchDocument): full-text, ทุกคำเป็น prefix match และต้องเจอครบทุกคำ (AND)
+- PostgreSQL: tsvector (title น้ำหนัก A, body B) + GIN, และ trigram บน title ให้หา substring ของเลข ticket/asset ได้
+- SQLite: FTS5 (core_ticketsearch_fts) เรียงด้วย bm25
+
+Asset (AssetSearchDocument): substring ของ code/serial/brand/model/owner ผ่าน trigram index
+- PostgreSQL: pg_trgm GIN รองรับ LIKE '%...%'
+- SQLite: FTS5 tokenizer trigram (core_assetsearch_fts) รองรับ GLOB '*...*'
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Asset, AssetSearchDocument, Ticket, TicketComment, TicketSearchDocument
+
+# ผลค้นหาที่จัดอันดับแล้วเก็บไว้สูงสุดกี่รายการ (เกินนี้ให้ผู้ใช้พิมพ์เจาะจงขึ้น)
+SEARCH_LIMIT = 500
+
+TICKET_NO_RE = re.compile(r"TCK-\d{8}-\d{5,}", re.IGNORECASE)
+
+# แยกคำด้วยทุกอย่างที่ไม่ใช่ตัวอักษร/ตัวเลข (เก็บสระ/วรรณยุกต์ไทยไว้ในคำ)
+_SPLIT_RE = re.compile(r"[^\w\u0E00-\u0E7F]+")
+
+
+def tokens(q: str) -> list[str]:
+    return [t for t in _SPLIT_RE.split(q.lower()) if t]
+
+
+# -----------------------
+# Index side
+# -----------------------
+def ticket_document(ticket_no, asset_code, subject, description, comments) -> tuple[str, str]:
+    title = " ".join(x for x in (ticket_no, asset_code, subject) if x)[:300]
+    body = "\n".join([description or "", *comments])
+    return title, body
+
+
+def build_documents(tickets) -> list[TicketSearchDocument]:
+    rows = list(tickets.values_list("pk", "ticket_no", "asset__asset_code", "subject", "description"))
+    comments = {}
+    for ticket_id, message in (
+        TicketComment.objects.filter(ticket_id__in=[r[0] for r in rows])
+        .order_by("created_at")
+        .values_list("ticket_id", "message")
+    ):
+        comments.setdefault(ticket_id, []).append(message)
+
+    docs = []
+    for pk, *fields in rows:
+        title, body = ticket_document(*fields, comments.get(pk, []))
+        docs.append(TicketSearchDocument(ticket_id=pk, title=title, body=body))
+    return docs
+
+
+def index_tickets(ticket_ids):
+    """upsert document ของ ticket ที่ระบุ (3 query ไม่ว่ากี่ใบ)"""
+    docs = build_documents(Ticket.objects.filter(pk__in=list(ticket_ids)))
+    TicketSearchDocument.objects.bulk_create(
+        docs, update_conflicts=True, unique_fields=["ticket"], update_fields=["title", "body", "updated_at"],
+    )
+
+
+def rebuild_ticket_index(batch_size=2000) -> int:
+    """สร้าง document ใหม่ทั้งหมด คืนจำนวน ticket"""
+    TicketSearchDocument.objects.all().delete()
+    total = last_id = 0
+    while True:
+        docs = build_documents(Ticket.objects.filter(pk__gt=last_id).order_by("pk")[:batch_size])
+        if not docs:
+            return total
+        TicketSearchDocument.objects.bulk_create(docs)
+        total += len(docs)
+        last_id = docs[-1].ticket_id
+
+
+# -----------------------
+# Query side
+# -----------------------
+class RankedResults:
+    """
+    ผลค้นหาเรียงตามคะแนน ให้ Paginator ใช้แทน queryset
+    โหลด ticket เฉพาะ id ของหน้าที่แสดง (in_bulk) แล้วเรียงตามลำดับเดิม
+    """
+
+    def __init__(self, queryset, ids, capped=False):
+        self.queryset = queryset
+        self.ids = ids
+        # True = เจอเกิน SEARCH_LIMIT แสดงแค่ชุดแรก
+        self.capped = capped
+
+    def count(self):
+        return len(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, k):
+        if not isinstance(k, slice):
+            return self[k:k + 1][0]
+        page_ids = self.ids[k]
+        objs = self.queryset.in_bulk(page_ids)
+        return [objs[i] for i in page_ids if i in objs]
+
+
+def _scope_sql(queryset, column):
+    """filter/สิทธิ์เดิมของ view (requested_by, status, ...) เป็นเงื่อนไข `column IN (subquery)`"""
+    if not queryset.query.where:
+        # ไม่มี filter = ทุกแถว ไม่ต้อง join กับตารางหลักทั้งตาราง
+        return "", []
+    sql, params = queryset.order_by().values("pk").query.sql_with_params()
+    return f"AND {column} IN ({sql})", list(params)
+
+
+def _like(q: str) -> str:
+    return "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def search_ticket_ids(queryset, q: str, limit=SEARCH_LIMIT) -> list[int]:
+    terms = tokens(q)
+    if not terms:
+        return []
+    if connection.vendor == "postgresql":
+        scope, scope_params = _scope_sql(queryset, "d.ticket_id")
+        tsquery = " & ".join(f"{t}:*" for t in terms)
+        sql = f"""
+            SELECT d.ticket_id FROM core_ticketsearchdocument d
+            WHERE (d.search_vector @@ to_tsquery('simple', %s) OR d.title ILIKE %s)
+              {scope}
+            ORDER BY ts_rank_cd(d.search_vector, to_tsquery('simple', %s)) DESC, d.ticket_id DESC
+            LIMIT %s
+        """
+        params = [tsquery, _like(q.strip()), *scope_params, tsquery, limit]
+    else:
+        # +rowid: กัน FTS5 เอาเงื่อนไข IN ไปวน MATCH ทีละ rowid
+        scope, scope_params = _scope_sql(queryset, "+rowid")
+        match = " ".join('"{}"*'.format(t.replace('"', '""')) for t in terms)
+        sql = f"""
+            SELECT rowid FROM core_ticketsearch_fts
+            WHERE core_ticketsearch_fts MATCH %s {scope}
+            ORDER BY bm25(core_ticketsearch_fts, 10.0, 1.0), rowid DESC
+            LIMIT %s
+        """
+        params = [match, *scope_params, limit]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_tickets(queryset, q: str):
+    """คืน queryset (เลข ticket ตรงตัว / DB ที่ไม่รองรับ) หรือ RankedResults"""
+    q = q.strip()
+    if TICKET_NO_RE.fullmatch(q):
+        return queryset.filter(ticket_no=q.upper())
+    if connection.vendor not in {"postgresql", "sqlite"}:
+        return queryset.filter(Q(search_doc__title__icontains=q) | Q(search_doc__body__icontains=q))
+    # ขอเกินมา 1 แถวเพื่อรู้ว่าถูกตัดที่ SEARCH_LIMIT หรือไม่
+    ids = search_ticket_ids(queryset, q, SEARCH_LIMIT + 1)
+    return RankedResults(queryset, ids[:SEARCH_LIMIT], capped=len(ids) > SEARCH_LIMIT)
+
+
+# -----------------------
+# Assets
+# -----------------------
+# trigram index ใช้ได้เมื่อทุกคำยาว >= 3 ตัวอักษร (สั้นกว่านี้ต้อง scan)
+TRIGRAM_MIN = 3
+
+
+def asset_document(asset_code, serial_number, brand, model_name, owner_username) -> str:
+    return " ".join(x for x in (asset_code, serial_number, brand, model_name, owner_username) if x).lower()[:500]
+
+
+def build_asset_documents(assets) -> list[AssetSearchDocument]:
+    rows = assets.values_list("pk", "asset_code", "serial_number", "brand", "model_name", "owner__username")
+    return [AssetSearchDocument(asset_id=pk, text=asset_document(*fields)) for pk, *fields in rows]
+
+
+def index_assets(asset_ids):
+    AssetSearchDocument.objects.bulk_create(
+        build_asset_documents(Asset.objects.filter(pk__in=list(asset_ids))),
+        update_conflicts=True, unique_fields=["asset"], update_fields=["text"],
+    )
+
+
+def rebuild_asset_index(batch_size=2000) -> int:
+    """สร้าง document ใหม่ทั้งหมด คืนจำนวน asset"""
+    AssetSearchDocument.objects.all().delete()
+    total = last_id = 0
+    while True:
+        docs = build_asset_documents(Asset.objects.filter(pk__gt=last_id).order_by("pk")[:batch_size])
+        if not docs:
+            return total
+        AssetSearchDocument.objects.bulk_create(docs)
+        total += len(docs)
+        last_id = docs[-1].asset_id
+
+
+def _glob(term: str) -> str:
+    # ตัวพิเศษของ GLOB ครอบด้วย [] (ESCAPE ทำให้ FTS5 ไม่ใช้ index)
+    return "*" + re.sub(r"([*?\[])", r"[\1]", term) + "*"
+
+
+def search_assets(queryset, q: str):
+    """
+    code / serial ตรงตัว -> ใช้ unique/serial index ก่อน
+    ไม่งั้นหา substring ทุกคำ (AND) ใน AssetSearchDocument ภายใต้ filter เดิมของ view
+    เก็บไม่เกิน SEARCH_LIMIT รายการ (คำกว้าง ๆ อย่าง "dell" ไม่ต้องตรวจทุกแถวที่เจอ) โดยเลือก asset ใหม่สุดก่อน;
+    คืน queryset (view ดูจำนวน >= SEARCH_LIMIT เพื่อบอกว่าผลถูกตัด)
+    """
+    q = q.strip()
+    terms = q.lower().split()
+    if not terms:
+        return queryset
+
+    if len(terms) == 1:
+        exact = queryset.filter(Q(asset_code=q) | Q(asset_code=q.upper()) | Q(serial_number=q))
+        if exact.exists():
+            return exact
+
+    if connection.vendor == "sqlite" and all(len(t) >= TRIGRAM_MIN for t in terms):
+        scope, scope_params = _scope_sql(queryset, "+rowid")
+        where = " AND ".join(["text GLOB %s"] * len(terms))
+        ids = RawSQL(
+            f"SELECT rowid FROM core_assetsearch_fts WHERE {where} {scope} ORDER BY rowid DESC LIMIT %s",
+            [*(_glob(t) for t in terms), *scope_params, SEARCH_LIMIT],
+        )
+    else:
+        # postgresql: LIKE '%...%' ใช้ gin_trgm_ops index ได้ตรง ๆ
+        docs = AssetSearchDocument.objects.all()
+        for t in terms:
+            docs = docs.filter(text__contains=t)
+        if queryset.query.where:
+            docs = docs.filter(asset__in=queryset.order_by().values("pk"))
+        ids = docs.order_by("-asset_id").values("asset_id")[:SEARCH_LIMIT]
+    return queryset.filter(pk__in=ids)
@@ -0,0 +1,413 @@
+"""
+Synthetic dataset ขนาด production (manage.py seed_load)
+
+- deterministic: seed + วันที่สิ้นสุด (until) เดียวกัน = ข้อมูลชุดเดียวกันทุกแถว
+- เขียนตรงลงตาราง (PostgreSQL = COPY, DB อื่น = executemany ทีละ batch) ไม่ผ่าน Model.save/signal/auto_now
+  ตารางที่ได้จาก signal (KPI, search document, stock balance, unread counter) ต้อง rebuild ทีหลัง
+- id ของตารางที่ถูกอ้างถึงกำหนดเอง (1..N) จึงไม่ต้องอ่านกลับ -> ต้องเริ่มจาก DB ว่าง
+"""
+import csv
+import io
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import Group, User
+from django.core.management.color import no_style
+from django.db import connection
+from django.utils import timezone
+
+from .models import (
+    Asset, AssetCategory, AuditLog, Department, Location, Notification, Part, PartStockMovement, Ticket,
+    TicketComment, TicketSequence, Vendor,
+)
+from .sla import get_sla_hours
+
+# ตาราง lookup ไม่ขยายตาม scale
+LOOKUPS = {
+    "departments": 40,
+    "locations": 300,
+    "vendors": 200,
+    "categories": 25,
+    "parts": 3_000,
+}
+
+# จำนวนแถวที่ scale = 1
+SIZES = {
+    "users": 5_000,
+    "assets": 500_000,
+    "tickets": 2_000_000,
+    "comments": 3_000_000,
+    "movements": 10_000_000,
+    "notifications": 3_000_000,
+    "audit": 5_000_000,
+}
+
+HISTORY_DAYS = 3 * 365
+
+CATEGORIES = [
+    "Laptop", "Desktop", "Monitor", "Printer", "Scanner", "Router", "Switch", "Access Point", "Server", "UPS",
+    "Phone", "Tablet", "Projector", "Dock", "Headset", "Webcam", "NAS", "Firewall", "Keyboard", "Mouse",
+]
+BRANDS = {
+    "Lenovo": ["ThinkPad T14", "ThinkPad X1", "ThinkCentre M70", "ThinkVision T24"],
+    "Dell": ["Latitude 5440", "OptiPlex 7010", "P2422H", "PowerEdge R650"],
+    "HP": ["EliteBook 840", "ProDesk 400", "LaserJet M404", "E24 G5"],
+    "Apple": ["MacBook Air", "MacBook Pro", "iMac 24", "iPad 10"],
+    "Cisco": ["Catalyst 9200", "Meraki MR36", "IP Phone 8841"],
+    "Epson": ["EB-X51", "L3250", "DS-530"],
+    "APC": ["Back-UPS 1500", "Smart-UPS 3000"],
+}
+DEPARTMENTS = ["Finance", "HR", "Sales", "Marketing", "Engineering", "Operations", "Legal", "Procurement", "IT", "Support"]
+PROBLEMS = [
+    "screen flickering", "battery not charging", "keyboard keys stuck", "printer paper jam", "cannot connect to wifi",
+    "VPN disconnects", "Outlook keeps crashing", "password reset", "no display on monitor", "fan very loud",
+    "overheating", "blue screen after update", "driver install request", "license expired", "toner empty",
+    "mouse not detected", "no audio", "camera not working", "bluetooth pairing fails", "disk almost full",
+    "backup failed", "slow boot", "BIOS password", "cannot login", "calendar not syncing",
+]
+PART_NAMES = ["RAM 16GB", "SSD 512GB", "Battery", "Keyboard", "Charger 65W", "Toner", "Fan", "Screen 14\"", "Cable", "Mouse"]
+
+# (ค่า, น้ำหนัก)
+ASSET_STATUS = [("IN_USE", 70), ("IN_STOCK", 15), ("REPAIR", 5), ("RETIRED", 8), ("LOST", 2)]
+PRIORITY = [("LOW", 25), ("MEDIUM", 50), ("HIGH", 20), ("URGENT", 5)]
+# สัดส่วน status ตามอายุ ticket: ของใหม่ยังเปิดอยู่เยอะ ของเก่าปิดเกือบหมด
+STATUS_BY_AGE = [
+    (3, [("NEW", 30), ("ASSIGNED", 25), ("IN_PROGRESS", 25), ("DONE", 15), ("CLOSED", 3), ("CANCELED", 2)]),
+    (30, [("NEW", 3), ("ASSIGNED", 5), ("IN_PROGRESS", 10), ("DONE", 30), ("CLOSED", 47), ("CANCELED", 5)]),
+    (None, [("NEW", 0.2), ("ASSIGNED", 0.3), ("IN_PROGRESS", 0.5), ("DONE", 4), ("CLOSED", 90), ("CANCELED", 5)]),
+]
+MOVEMENT_TYPE = [("OUT", 60), ("IN", 35), ("ADJUST", 5)]
+
+
+def scaled_sizes(scale: float, **overrides) -> dict:
+    sizes = {k: max(1, round(v * scale)) for k, v in SIZES.items()}
+    sizes.update({k: v for k, v in overrides.items() if v is not None})
+    # ต้องมีคนพอแยก role
+    sizes["users"] = max(sizes["users"], 20)
+    return {**LOOKUPS, **sizes}
+
+
+def _picker(rnd, weighted):
+    values = [v for v, _ in weighted]
+    cum, total = [], 0
+    for _, w in weighted:
+        total += w
+        cum.append(total)
+    return lambda: rnd.choices(values, cum_weights=cum)[0]
+
+
+def _count(rnd, rate: float) -> int:
+    """จำนวนเต็มที่เฉลี่ยแล้วได้ rate"""
+    return int(rate) + (rnd.random() < rate - int(rate))
+
+
+# -----------------------
+# Writer
+# -----------------------
+class TableWriter:
+    """เก็บแถว (tuple ตามลำดับ fields) ไว้จนครบ batch_size แล้วเขียนทีเดียว"""
+
+    def __init__(self, model, fields, batch_size=10_000):
+        opts = model._meta
+        self.table = connection.ops.quote_name(opts.db_table)
+        self.fields = [opts.get_field(name) for name in fields]
+        self.columns = ", ".join(connection.ops.quote_name(f.column) for f in self.fields)
+        # (ตำแหน่ง, ฟังก์ชันแปลงค่า) เฉพาะคอลัมน์ที่ต้องแปลง
+        self.adapters = [(i, a) for i, a in enumerate(map(self._adapter, self.fields)) if a]
+        self.batch_size = batch_size
+        self.rows = []
+        self.count = 0
+
+    @staticmethod
+    def _adapter(field):
+        kind = field.get_internal_type()
+        if kind == "DateTimeField":
+            if connection.vendor == "sqlite":
+                # ทางลัดของ adapt_datetimefield_value (ค่าทั้งหมดเป็น aware อยู่แล้ว): เรียกเป็นสิบล้านครั้ง
+                tz = connection.timezone
+                return lambda v: str(v.astimezone(tz).replace(tzinfo=None))
+            return connection.ops.adapt_datetimefield_value
+        if kind == "DateField":
+            return connection.ops.adapt_datefield_value
+        if kind == "DecimalField":
+            return lambda v: connection.ops.adapt_decimalfield_value(v, field.max_digits, field.decimal_places)
+        return None
+
+    def add(self, *row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        rows = self.rows
+        if self.adapters:
+            rows = [list(row) for row in rows]
+            for row in rows:
+                for i, adapt in self.adapters:
+                    if row[i] is not None:
+                        row[i] = adapt(row[i])
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                self._copy(cursor.cursor, rows)
+            else:
+                marks = ", ".join(["%s"] * len(self.fields))
+                cursor.executemany(f"INSERT INTO {self.table} ({self.columns}) VALUES ({marks})", rows)
+        self.count += len(rows)
+        self.rows = []
+
+    def _copy(self, raw, rows):
+        buf = io.StringIO()
+        csv.writer(buf).writerows([["\\N" if v is None else v for v in row] for row in rows])
+        sql = f"COPY {self.table} ({self.columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        if hasattr(raw, "copy_expert"):  # psycopg2
+            buf.seek(0)
+            raw.copy_expert(sql, buf)
+        else:  # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(buf.getvalue())
+
+
+# -----------------------
+# Generator
+# -----------------------
+class SyntheticData:
+    """
+    สร้างข้อมูลทั้งชุดตามลำดับ FK; ticket + comment/notification/audit ของมันเขียนใน pass เดียว
+    (ไม่ต้องเก็บ ticket หลักล้านใบไว้ใน memory)
+    """
+
+    def __init__(self, sizes: dict, seed: int = 42, until=None, batch_size=10_000, log=None):
+        self.sizes = sizes
+        self.rnd = random.Random(seed)
+        until = until or timezone.localdate()
+        self.end = timezone.make_aware(datetime.combine(until, time.min))
+        self.start = self.end - timedelta(days=HISTORY_DAYS)
+        self.batch_size = batch_size
+        self.log = log or (lambda msg: None)
+        self.counts = {}
+
+    def writer(self, model, fields):
+        return TableWriter(model, fields, self.batch_size)
+
+    def run(self) -> dict:
+        for step in (self.users, self.lookups, self.assets, self.parts, self.tickets, self.movements):
+            step()
+        self.reset_sequences()
+        return self.counts
+
+    def _done(self, name, *writers):
+        for w in writers:
+            w.flush()
+        self.counts[name] = sum(w.count for w in writers)
+        self.log(f"{name}: {self.counts[name]}")
+
+    def _at(self, frac: float):
+        return self.start + (self.end - self.start) * frac
+
+    # -----------------------
+    def users(self):
+        n = self.sizes["users"]
+        w = self.writer(User, ["id", "password", "is_superuser", "username", "first_name", "last_name", "email",
+                                "is_staff", "is_active", "date_joined"])
+        for i in range(1, n + 1):
+            # "!" = unusable password (ใช้ force_login / ตั้งรหัสเองทีหลัง)
+            w.add(i, "!", False, f"user{i:06d}", "", "", f"user{i:06d}@example.com", i <= 5, True, self.start)
+        self._done("users", w)
+
+        # role: 5 admin, 2% IT, 1% manager, ที่เหลือ employee
+        n_it = max(3, n // 50)
+        n_manager = max(2, n // 100)
+        self.admins = list(range(1, 6))
+        self.it_users = list(range(6, 6 + n_it))
+        self.managers = list(range(6 + n_it, 6 + n_it + n_manager))
+        self.employees = list(range(6 + n_it + n_manager, n + 1))
+        groups = {name: Group.objects.get_or_create(name=name)[0].pk for name in ("ADMIN", "IT", "MANAGER", "EMPLOYEE")}
+        members = self.writer(User.groups.through, ["user", "group"])
+        for name, ids in (("ADMIN", self.admins), ("IT", self.it_users), ("MANAGER", self.managers),
+                          ("EMPLOYEE", self.employees)):
+            for uid in ids:
+                members.add(uid, groups[name])
+        self._done("group memberships", members)
+
+    def lookups(self):
+        rnd, s = self.rnd, self.sizes
+        w = self.writer(Department, ["id", "name"])
+        for i in range(1, s["departments"] + 1):
+            w.add(i, f"{DEPARTMENTS[(i - 1) % len(DEPARTMENTS)]} {(i - 1) // len(DEPARTMENTS) + 1}")
+        self._done("departments", w)
+
+        w = self.writer(Location, ["id", "name", "detail"])
+        for i in range(1, s["locations"] + 1):
+            w.add(i, f"Building {chr(65 + (i - 1) // 50 % 26)}", f"Floor {(i - 1) % 50 + 1}")
+        self._done("locations", w)
+
+        w = self.writer(Vendor, ["id", "name", "phone", "email", "address", "is_active"])
+        for i in range(1, s["vendors"] + 1):
+            w.add(i, f"Vendor {i:04d}", f"02-{rnd.randint(100, 999)}-{rnd.randint(1000, 9999)}",
+                  f"sales{i}@vendor.example", "", rnd.random() < 0.9)
+        self._done("vendors", w)
+
+        w = self.writer(AssetCategory, ["id", "name"])
+        for i in range(1, s["categories"] + 1):
+            base = CATEGORIES[(i - 1) % len(CATEGORIES)]
+            w.add(i, base if i <= len(CATEGORIES) else f"{base} {(i - 1) // len(CATEGORIES) + 1}")
+        self._done("categories", w)
+
+    def assets(self):
+        rnd, s = self.rnd, self.sizes
+        status = _picker(rnd, ASSET_STATUS)
+        brands = list(BRANDS)
+        people = self.employees + self.managers + self.it_users
+        w = self.writer(Asset, ["id", "asset_code", "serial_number", "category", "brand", "model_name", "status",
+                                "department", "owner", "location", "purchase_date", "warranty_end", "note",
+                                "created_at", "updated_at"])
+        for i in range(1, s["assets"] + 1):
+            created = self._at((i - 1) / s["assets"] * 0.9)  # asset ส่วนใหญ่มีก่อน ticket
+            brand = rnd.choice(brands)
+            st = status()
+            purchased = created.date() - timedelta(days=rnd.randint(0, 30))
+            w.add(
+                i, f"IT-{i:06d}", f"SN{rnd.getrandbits(40):010X}", rnd.randint(1, s["categories"]), brand,
+                rnd.choice(BRANDS[brand]), st, rnd.randint(1, s["departments"]),
+                rnd.choice(people) if st == "IN_USE" else None, rnd.randint(1, s["locations"]),
+                purchased, purchased + timedelta(days=365 * rnd.choice((1, 3, 5))), "", created, created,
+            )
+        self._done("assets", w)
+
+    def parts(self):
+        rnd, s = self.rnd, self.sizes
+        w = self.writer(Part, ["id", "name", "sku", "vendor", "unit", "unit_cost", "low_stock_threshold", "updated_at"])
+        for i in range(1, s["parts"] + 1):
+            w.add(i, f"{rnd.choice(PART_NAMES)} #{i}", f"SKU-{i:06d}", rnd.randint(1, s["vendors"]), "pcs",
+                  Decimal(rnd.randint(100, 20_000)) / 4, rnd.choice((0, 2, 5, 10, 20)), self.start)
+        self._done("parts", w)
+
+    def tickets(self):
+        rnd, s = self.rnd, self.sizes
+        n = s["tickets"]
+        priority = _picker(rnd, PRIORITY)
+        by_age = [(days, _picker(rnd, mix)) for days, mix in STATUS_BY_AGE]
+        rates = {k: s[k] / n for k in ("comments", "notifications", "audit")}
+        requesters = self.employees + self.managers
+
+        tickets = self.writer(Ticket, [
+            "id", "ticket_no", "asset", "subject", "description", "priority", "status", "requested_by",
+            "assigned_to", "vendor", "cost", "sla_hours", "due_at", "started_at", "resolved_at", "closed_at",
+            "created_at", "updated_at",
+        ])
+        comments = self.writer(TicketComment, ["ticket", "message", "created_by", "created_at"])
+        notis = self.writer(Notification, ["recipient", "audience", "ntype", "title", "message", "url", "is_read",
+                                           "created_at"])
+        audit = self.writer(AuditLog, ["action", "object_type", "object_id", "summary", "created_by", "created_at"])
+
+        sequences = {}  # วัน (local) -> เลขล่าสุด
+        for i in range(1, n + 1):
+            # เรียงตามเวลา (id มากกว่า = ใหม่กว่า) เหมือนข้อมูลจริง
+            created = self._at((i - 0.5) / n + rnd.uniform(-0.2, 0.2) / n)
+            age_days = (self.end - created).days
+            st = next(pick for days, pick in by_age if days is None or age_days < days)()
+            pr = priority()
+            sla = get_sla_hours(pr)
+            day = timezone.localtime(created).date()
+            sequences[day] = sequences.get(day, 0) + 1
+            ticket_no = Ticket.format_ticket_no(day, sequences[day])
+            requester = rnd.choice(requesters)
+            assignee = rnd.choice(self.it_users) if st != "NEW" else None
+
+            started = resolved = closed = None
+            if st in ("IN_PROGRESS", "DONE", "CLOSED"):
+                started = created + timedelta(minutes=rnd.randint(5, 60 * sla))
+            if st in ("DONE", "CLOSED"):
+                resolved = started + timedelta(minutes=rnd.randint(10, 60 * 2 * sla))
+            if st == "CLOSED":
+                closed = resolved + timedelta(hours=rnd.randint(1, 72))
+            updated = closed or resolved or started or created
+            vendor = cost = None
+            if resolved and rnd.random() < 0.15:
+                vendor = rnd.randint(1, s["vendors"])
+                cost = Decimal(rnd.randint(500, 50_000))
+
+            problem = rnd.choice(PROBLEMS)
+            tickets.add(
+                i, ticket_no, rnd.randint(1, s["assets"]), problem.capitalize(),
+                f"{problem}. Reported by user{requester:06d}, ref {rnd.getrandbits(24):06x}.", pr, st, requester,
+                assignee, vendor, cost, sla, created + timedelta(hours=sla), started, resolved, closed,
+                created, updated,
+            )
+
+            # เหตุการณ์ตามเวลาของ ticket นี้
+            events = [t for t in (started, resolved, closed) if t]
+            for _ in range(_count(rnd, rates["comments"])):
+                at = created + (updated - created) * rnd.random()
+                comments.add(i, f"Update on {problem}: {rnd.choice(PROBLEMS)} checked", rnd.choice(
+                    (requester, assignee or requester)), at)
+
+            url = f"/tickets/{i}/"
+            read_before = self.end - timedelta(days=30)
+            for k in range(_count(rnd, rates["notifications"])):
+                if k == 0:
+                    notis.add(None, "IT", "TICKET_NEW", f"New ticket {ticket_no}", problem, url, False, created)
+                else:
+                    at = events[(k - 1) % len(events)] if events else created
+                    ntype = "TICKET_CLOSED" if at == closed else "TICKET_UPDATE"
+                    notis.add(requester, "", ntype, f"{ticket_no} {st.lower()}", "", url,
+                              at < read_before or rnd.random() < 0.5, at)
+
+            actions = [("CREATE_TICKET", requester, created)]
+            if started:
+                actions.append(("START_TICKET", assignee, started))
+            if resolved:
+                actions.append(("RESOLVE_TICKET", assignee, resolved))
+            if closed:
+                actions.append(("CLOSE_TICKET", assignee, closed))
+            for k in range(_count(rnd, rates["audit"])):
+                action, by, at = actions[k] if k < len(actions) else ("UPDATE_TICKET", assignee or requester, updated)
+                audit.add(action, "Ticket", str(i), ticket_no, by, at)
+
+        self._done("tickets", tickets)
+        self._done("comments", comments)
+        self._done("notifications", notis)
+        self._done("audit", audit)
+
+        seq = self.writer(TicketSequence, ["day", "last_no"])
+        for day, last_no in sorted(sequences.items()):
+            seq.add(day, last_no)
+        self._done("ticket sequences", seq)
+
+    def movements(self):
+        rnd, s = self.rnd, self.sizes
+        n = s["movements"]
+        mtype = _picker(rnd, MOVEMENT_TYPE)
+        # อะไหล่ไม่กี่ตัวถูกใช้บ่อย (กระจายแบบเบ้)
+        hot = max(1, s["parts"] // 10)
+        w = self.writer(PartStockMovement, ["part", "movement_type", "qty", "ref_ticket", "note", "created_by",
+                                            "created_at"])
+        balance = [0] * (s["parts"] + 1)  # ไม่ให้ OUT เกินของที่มี (ledger ไม่ติดลบ)
+        for i in range(n):
+            frac = (i + 0.5) / n
+            part = rnd.randint(1, hot) if rnd.random() < 0.7 else rnd.randint(1, s["parts"])
+            t = mtype()
+            qty = rnd.randint(1, 5)
+            if t == "OUT" and balance[part] < qty:
+                t = "IN"
+            ref = None
+            if t == "OUT" and rnd.random() < 0.6:
+                # ticket ที่สร้างราว ๆ เวลาเดียวกัน
+                ref = min(s["tickets"], max(1, int(frac * s["tickets"]) - rnd.randint(0, 50)))
+            if t == "IN":
+                qty = rnd.randint(10, 60)
+                balance[part] += qty
+            elif t == "OUT":
+                balance[part] -= qty
+            w.add(part, t, qty, ref, "", rnd.choice(self.it_users), self._at(frac))
+        self._done("movements", w)
+
+    def reset_sequences(self):
+        """id กำหนดเอง -> เลื่อน sequence ของ PostgreSQL ให้พ้น id สุดท้าย"""
+        models = [User, Department, Location, Vendor, AssetCategory, Asset, Part, Ticket]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
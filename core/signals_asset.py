@@ -3,17 +3,23 @@ from django.dispatch import receiver
 from .models import Asset, AssetAssignmentLog
 
 @receiver(pre_save, sender=Asset)
-def asset_owner_change_log(sender, instance: Asset, **kwargs):
-    if not instance.pk:
+def asset_owner_change_log(sender, instance: Asset, update_fields=None, **kwargs):
+    if not instance.pk or "owner" not in instance.changed_fields(update_fields):
         return
-    old = Asset.objects.filter(pk=instance.pk).only("owner_id").first()
-    if not old:
-        return
-    if old.owner_id != instance.owner_id:
+    try:
+        # ค่าเดิมจาก TrackChangesMixin ไม่ต้อง SELECT
+        old_owner_id = instance.loaded_value("owner")
+    except KeyError:
+        # instance ที่สร้างเองพร้อม pk (ไม่ได้โหลดจาก DB) -> อ่านค่าเดิมแบบเดิม
+        old = Asset.objects.filter(pk=instance.pk).only("owner_id").first()
+        if not old:
+            return
+        old_owner_id = old.owner_id
+    if old_owner_id != instance.owner_id:
         # changed_by เราจะ set ผ่าน view (ดูด้านล่าง) ถ้าไม่มีให้เป็น None
         AssetAssignmentLog.objects.create(
             asset=instance,
-            old_owner_id=old.owner_id,
+            old_owner_id=old_owner_id,
             new_owner_id=instance.owner_id,
             changed_by=getattr(instance, "_changed_by", None),
         )
@@ -0,0 +1,76 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .export_jobs import bump_export_versions
+from .models import Asset, AssetCategory, Department, Location, Part, PartStockMovement, Ticket, Vendor
+
+# data_version เห็น insert/update ของตารางหลักเองจาก Max(updated_at)/Max(id)
+# ที่นี่ bump เฉพาะสิ่งที่มันมองไม่เห็น: การลบ และชื่อในตารางที่ export join ไป
+LOOKUP_EXPORTS = {
+    AssetCategory: ["assets"],
+    Department: ["assets"],
+    Location: ["assets"],
+    Vendor: ["parts"],
+}
+# field ที่ export อื่นแสดงผ่าน join: asset_code ใน tickets, sku / ticket_no ใน movements
+JOINED_FIELDS = {
+    Asset: ("asset_code", ["tickets"]),
+    Part: ("sku", ["movements"]),
+    Ticket: ("ticket_no", ["movements"]),
+}
+# ลบ ticket: ref_ticket ของ movement ถูก SET_NULL โดยไม่ผ่าน save
+DELETE_EXPORTS = {
+    Asset: ["assets"],
+    Ticket: ["tickets", "movements"],
+    Part: ["parts", "movements"],
+    PartStockMovement: ["movements"],
+    User: ["assets", "tickets", "movements"],
+    **LOOKUP_EXPORTS,
+}
+
+
+@receiver(post_save, sender=AssetCategory)
+@receiver(post_save, sender=Department)
+@receiver(post_save, sender=Location)
+@receiver(post_save, sender=Vendor)
+def lookup_renamed(sender, instance, created, raw=False, **kwargs):
+    if not (created or raw):
+        bump_export_versions(LOOKUP_EXPORTS[sender])
+
+
+@receiver(post_save, sender=Asset)
+@receiver(post_save, sender=Part)
+@receiver(post_save, sender=Ticket)
+def joined_field_changed(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    field, kinds = JOINED_FIELDS[sender]
+    if not (created or raw) and field in instance.changed_fields(update_fields):
+        bump_export_versions(kinds)
+
+
+@receiver(post_save, sender=PartStockMovement)
+def movement_edited(sender, instance, created, raw=False, **kwargs):
+    # movement ปกติเขียนครั้งเดียว แก้ทีหลังได้ทาง admin เท่านั้น
+    if not (created or raw):
+        bump_export_versions(["movements"])
+
+
+@receiver(post_save, sender=User)
+def username_changed(sender, instance: User, created, raw=False, update_fields=None, **kwargs):
+    # login บันทึกแค่ last_login -> ข้าม
+    if created or raw or (update_fields is not None and "username" not in update_fields):
+        return
+    bump_export_versions(DELETE_EXPORTS[User])
+
+
+# ผูกทีละ sender: receiver ที่ไม่ระบุ sender ทำให้ queryset.delete() ของทุก model เสีย fast delete
+@receiver(post_delete, sender=Asset)
+@receiver(post_delete, sender=Ticket)
+@receiver(post_delete, sender=Part)
+@receiver(post_delete, sender=PartStockMovement)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=AssetCategory)
+@receiver(post_delete, sender=Department)
+@receiver(post_delete, sender=Location)
+@receiver(post_delete, sender=Vendor)
+def export_row_deleted(sender, instance, **kwargs):
+    bump_export_versions(DELETE_EXPORTS[sender])
@@ -0,0 +1,60 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import Asset, Ticket
+from .kpi import ASSETS_TOTAL, bump, bump_asset_tickets, diff, slot_of, ticket_contribution
+
+
+# field ที่มีผลกับ KPI (ลำดับตาม ticket_contribution + asset)
+KPI_FIELDS = ("status", "due_at", "cost", "created_at", "asset")
+
+
+def _contribution(t: Ticket):
+    return ticket_contribution(t.status, t.due_at, t.cost, t.created_at)
+
+
+@receiver(pre_save, sender=Ticket)
+def ticket_kpi_snapshot_old(sender, instance: Ticket, **kwargs):
+    # จำค่าก่อนแก้ไว้คิด delta ใน post_save (ค่าเดิมจาก TrackChangesMixin ไม่ต้อง SELECT)
+    instance._kpi_old = None
+    if not instance.pk:
+        return
+    try:
+        old = [instance.loaded_value(f) for f in KPI_FIELDS]
+    except KeyError:
+        old = Ticket.objects.filter(pk=instance.pk).values_list(
+            "status", "due_at", "cost", "created_at", "asset_id"
+        ).first()
+    if old:
+        *contribution, asset_id = old
+        instance._kpi_old = (ticket_contribution(*contribution), asset_id)
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_kpi_apply(sender, instance: Ticket, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = getattr(instance, "_kpi_old", None)
+    old_contrib, old_asset = old if old else ({}, None)
+    bump(diff(_contribution(instance), old_contrib), slot_of(instance.pk))
+
+    if old_asset != instance.asset_id:
+        bump_asset_tickets(old_asset, -1)
+        bump_asset_tickets(instance.asset_id, 1)
+    instance._kpi_old = (_contribution(instance), instance.asset_id)
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_kpi_delete(sender, instance: Ticket, **kwargs):
+    bump(diff({}, _contribution(instance)), slot_of(instance.pk))
+    bump_asset_tickets(instance.asset_id, -1)
+
+
+@receiver(post_save, sender=Asset)
+def asset_kpi_apply(sender, instance: Asset, created, raw=False, **kwargs):
+    if created and not raw:
+        bump({ASSETS_TOTAL: 1}, slot_of(instance.pk))
+
+
+@receiver(post_delete, sender=Asset)
+def asset_kpi_delete(sender, instance: Asset, **kwargs):
+    bump({ASSETS_TOTAL: -1}, slot_of(instance.pk))
@@ -1,30 +1,41 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from .models import Ticket, Notification
-from .notify import notify_users
+from .models import Ticket, Notification, OutboxEvent
+from .outbox import publish, ticket_data
 
 @receiver(post_save, sender=Ticket)
-def ticket_update_notify(sender, instance: Ticket, created, **kwargs):
-    # created เคสแจ้ง IT เราทำใน view แล้วก็ได้ (หรือทำที่นี่ก็ได้)
+def ticket_update_notify(sender, instance: Ticket, created, update_fields=None, **kwargs):
+    # created แจ้ง IT ใน TicketCreateView แล้ว
     if created:
         return
+    # save ที่ไม่ได้เปลี่ยนอะไร (เช่น update_fields=["updated_at"]) ไม่ต้องแจ้ง
+    changed = instance.changed_fields(update_fields)
+    if not changed:
+        return
 
     # แจ้งคนแจ้ง (requested_by) เมื่อ ticket ถูกอัปเดต
+    # (ผ่าน outbox: update หลายครั้งติดกันถูกรวมเหลือ notification เดียว)
     if instance.requested_by_id:
-        notify_users(
-            [instance.requested_by],
-            Notification.Type.TICKET_UPDATE,
+        publish(
+            OutboxEvent.Topic.TICKET_UPDATED,
+            f"ticket:{instance.pk}",
+            ntype=Notification.Type.TICKET_UPDATE,
             title=f"Ticket updated: {instance.ticket_no}",
             message=f"Status: {instance.status}",
             url=f"/tickets/{instance.pk}/",
+            recipient_id=instance.requested_by_id,
+            data=ticket_data(instance),
         )
 
-    # ถ้าปิดแล้ว แจ้งเพิ่มแบบชัด ๆ
-    if instance.status == "CLOSED" and instance.requested_by_id:
-        notify_users(
-            [instance.requested_by],
-            Notification.Type.TICKET_CLOSED,
+    # เพิ่งถูกปิด แจ้งเพิ่มแบบชัด ๆ
+    if "status" in changed and instance.status == "CLOSED" and instance.requested_by_id:
+        publish(
+            OutboxEvent.Topic.TICKET_CLOSED,
+            f"ticket:{instance.pk}",
+            ntype=Notification.Type.TICKET_CLOSED,
             title=f"Ticket closed: {instance.ticket_no}",
             message=instance.subject,
             url=f"/tickets/{instance.pk}/",
+            recipient_id=instance.requested_by_id,
+            data=ticket_data(instance),
         )
@@ -0,0 +1,32 @@
+from django.contrib.auth.models import Group, User
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+from .permissions import invalidate_group_cache
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def group_membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        # group.user_set.clear(): หลัง clear จะไม่รู้แล้วว่าใครเคยอยู่ใน group
+        instance._cleared_user_ids = list(instance.user_set.values_list("id", flat=True))
+        return
+    if action not in {"post_add", "post_remove", "post_clear"}:
+        return
+
+    if not reverse:
+        invalidate_group_cache([instance.pk])  # user.groups.add/remove/clear
+    elif action == "post_clear":
+        invalidate_group_cache(getattr(instance, "_cleared_user_ids", []))
+    else:
+        invalidate_group_cache(pk_set or [])  # group.user_set.add/remove
+
+
+@receiver(post_save, sender=Group)
+def group_renamed(sender, instance: Group, created, **kwargs):
+    if not created:
+        invalidate_group_cache(instance.user_set.values_list("id", flat=True))
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleted(sender, instance: Group, **kwargs):
+    invalidate_group_cache(instance.user_set.values_list("id", flat=True))
@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Asset, AssetSearchDocument, Ticket, TicketComment, TicketSearchDocument
+from .search import index_assets, index_tickets
+
+
+# field ที่อยู่ใน search document; save ที่เปลี่ยนแค่ status/assignee ไม่ต้อง reindex
+TICKET_DOCUMENT_FIELDS = {"ticket_no", "asset", "subject", "description"}
+ASSET_DOCUMENT_FIELDS = {"asset_code", "serial_number", "brand", "model_name", "owner"}
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_search_index(sender, instance: Ticket, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if created or instance.changed_fields(update_fields) & TICKET_DOCUMENT_FIELDS:
+        index_tickets([instance.pk])
+
+
+@receiver(post_save, sender=TicketComment)
+@receiver(post_delete, sender=TicketComment)
+def comment_search_index(sender, instance: TicketComment, raw=False, **kwargs):
+    if not raw:
+        index_tickets([instance.ticket_id])
+
+
+@receiver(post_save, sender=Asset)
+def asset_code_search_index(sender, instance: Asset, created, raw=False, update_fields=None, **kwargs):
+    # asset_code อยู่ใน title ของทุก ticket ของ asset นี้; reindex เฉพาะตอน code เปลี่ยนจริง
+    if created or raw or "asset_code" not in instance.changed_fields(update_fields):
+        return
+    stale = (
+        TicketSearchDocument.objects.filter(ticket__asset=instance)
+        .exclude(title__contains=instance.asset_code)
+        .values_list("ticket_id", flat=True)
+    )
+    stale = list(stale)
+    if stale:
+        index_tickets(stale)
+
+
+@receiver(post_save, sender=Asset)
+def asset_search_index(sender, instance: Asset, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if created or instance.changed_fields(update_fields) & ASSET_DOCUMENT_FIELDS:
+        index_assets([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def owner_search_index(sender, instance: User, created, raw=False, update_fields=None, **kwargs):
+    # login บันทึกแค่ last_login -> ข้าม; username อยู่ใน document ของ asset ที่ถือครอง
+    if created or raw or (update_fields is not None and "username" not in update_fields):
+        return
+    stale = list(
+        AssetSearchDocument.objects.filter(asset__owner=instance)
+        .exclude(text__contains=instance.username.lower())
+        .values_list("asset_id", flat=True)
+    )
+    if stale:
+        index_assets(stale)
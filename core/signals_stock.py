@@ -1,7 +1,7 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import PartStockMovement, Notification
-from .notify import notify_it
+from .models import PartStockMovement, PartStockBalance, Notification, OutboxEvent
+from .outbox import publish
 
 @receiver(post_save, sender=PartStockMovement)
 def low_stock_notify(sender, instance: PartStockMovement, created, **kwargs):
@@ -11,9 +11,20 @@ def low_stock_notify(sender, instance: PartStockMovement, created, **kwargs):
     balance = part.stock_balance()
 
     if balance <= part.low_stock_threshold:
-        notify_it(
-            Notification.Type.LOW_STOCK,
+        # อยู่ใน transaction ของ PartStockMovement.save(); OUT ติดกันหลายครั้งรวมเป็นแจ้งเตือนเดียว
+        publish(
+            OutboxEvent.Topic.STOCK_LOW,
+            f"part:{part.pk}",
+            ntype=Notification.Type.LOW_STOCK,
             title=f"LOW STOCK: {part.sku}",
             message=f"Balance={balance} threshold={part.low_stock_threshold}",
             url=f"/parts/{part.pk}/",
+            audience="IT",
+            data={"part_id": part.pk, "sku": part.sku, "balance": balance, "threshold": part.low_stock_threshold},
         )
+
+
+@receiver(post_delete, sender=PartStockMovement)
+def stock_balance_on_delete(sender, instance: PartStockMovement, **kwargs):
+    # post_delete ยิงใน transaction ของ delete (รวมถึง queryset.delete() ใน admin)
+    PartStockBalance.apply(instance.part_id, instance.movement_type, -instance.qty)
@@ -0,0 +1,29 @@
+from django.db import transaction
+
+from .models import AuditLog, PartStockMovement
+
+
+def use_part_for_ticket(ticket, part, qty: int, user=None, note: str = "") -> PartStockMovement:
+    """
+    ตัด stock (OUT) ให้ ticket พร้อม audit log ใน transaction เดียว
+    ปลอดภัยกับหลาย gunicorn worker: PartStockMovement.save() ตัดยอดด้วย
+    conditional decrement บน PartStockBalance จึงไม่ต้องส่งงาน stock ผ่าน worker เดียว
+    ยอดไม่พอ -> ValidationError
+    """
+    with transaction.atomic():
+        mv = PartStockMovement.objects.create(
+            part=part,
+            movement_type=PartStockMovement.Type.OUT,
+            qty=qty,
+            ref_ticket=ticket,
+            note=note,
+            created_by=user,
+        )
+        AuditLog.objects.create(
+            action="USE_PART_FOR_TICKET",
+            object_type="Ticket",
+            object_id=str(ticket.id),
+            summary=f"{ticket.ticket_no} OUT {part.sku} x{qty}",
+            created_by=user,
+        )
+    return mv
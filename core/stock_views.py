@@ -3,12 +3,15 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models import F, Q
 from django.shortcuts import redirect
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import datetime, time, timedelta
 from decimal import Decimal
 from django.urls import reverse_lazy
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView
 
 from .forms import PartForm, StockMovementForm
 from .models import Part, PartStockMovement, AuditLog
+from .pagination import CursorPaginationMixin, EstimatedCountPaginator
 from .querysets import parts_with_balance_qs
 from .permissions import GroupRequiredMixin, is_it, is_manager
 
@@ -19,6 +22,7 @@ class PartListView(LoginRequiredMixin, GroupRequiredMixin, ListView):
     template_name = "core/part_list.html"
     context_object_name = "parts"
     paginate_by = 10
+    paginator_class = EstimatedCountPaginator
 
     def get_queryset(self):
         qs = parts_with_balance_qs(Part).order_by("sku")
@@ -37,9 +41,10 @@ class PartDetailView(LoginRequiredMixin, GroupRequiredMixin, DetailView):
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         part = self.object
-        ctx["balance"] = part.stock_balance()
-        ctx["in_total"] = part.stock_in_total()
-        ctx["out_total"] = part.stock_out_total()
+        totals = part.stock_totals()
+        ctx["balance"] = totals.balance
+        ctx["in_total"] = totals.in_qty
+        ctx["out_total"] = totals.out_qty
 
         ctx["can_move_stock"] = is_it(self.request.user)
         ctx["movement_form"] = StockMovementForm(user=self.request.user)
@@ -53,12 +58,12 @@ class PartDetailView(LoginRequiredMixin, GroupRequiredMixin, DetailView):
         if not is_it(request.user):
             return redirect("core:part_detail", pk=part.pk)
 
-        form = StockMovementForm(request.POST, user=request.user)
+        # ใส่ part ให้ instance ก่อน validate (clean() ของ OUT ต้องเช็คยอดของ part)
+        form = StockMovementForm(
+            request.POST, user=request.user, instance=PartStockMovement(part=part, created_by=request.user)
+        )
         if form.is_valid():
-            mv = form.save(commit=False)
-            mv.part = part
-            mv.created_by = request.user
-            mv.save()
+            mv = form.save()
 
             AuditLog.objects.create(
                 action="STOCK_MOVEMENT",
@@ -104,12 +109,17 @@ class PartUpdateView(LoginRequiredMixin, GroupRequiredMixin, UpdateView):
         return reverse_lazy("core:part_detail", kwargs={"pk": self.object.pk})
 
     def form_valid(self, form):
+        changed = form.instance.changed_fields()
+        if not changed:
+            messages.info(self.request, "No changes")
+            return redirect(self.get_success_url())
+
         res = super().form_valid(form)
         AuditLog.objects.create(
             action="UPDATE_PART",
             object_type="Part",
             object_id=str(self.object.id),
-            summary=f"{self.object.sku}",
+            summary=f"{self.object.sku}: {', '.join(sorted(changed))}"[:255],
             created_by=self.request.user,
         )
         messages.success(self.request, "Part updated")
@@ -133,7 +143,18 @@ class LowStockListView(LoginRequiredMixin, GroupRequiredMixin, ListView):
         # balance <= threshold
         return qs.filter(balance__lte=F("low_stock_threshold"))
 
-class MovementHistoryView(LoginRequiredMixin, GroupRequiredMixin, ListView):
+def _day_start(raw):
+    """'YYYY-MM-DD' -> เวลาเริ่มวันนั้น (timezone ปัจจุบัน) หรือ None ถ้าว่าง/ผิดรูปแบบ"""
+    try:
+        d = parse_date(raw) if raw else None
+    except ValueError:
+        return None
+    if d is None:
+        return None
+    return timezone.make_aware(datetime.combine(d, time.min))
+
+
+class MovementHistoryView(LoginRequiredMixin, GroupRequiredMixin, CursorPaginationMixin, ListView):
     required_groups = ["ADMIN", "IT", "MANAGER"]
     model = PartStockMovement
     template_name = "core/movement_history.html"
@@ -167,10 +188,13 @@ class MovementHistoryView(LoginRequiredMixin, GroupRequiredMixin, ListView):
             qs = qs.filter(Q(part__sku__icontains=part) | Q(part__name__icontains=part))
         if ticket:
             qs = qs.filter(ref_ticket__ticket_no__icontains=ticket)
-        if date_from:
-            qs = qs.filter(created_at__date__gte=date_from)
-        if date_to:
-            qs = qs.filter(created_at__date__lte=date_to)
+        # เทียบเป็นช่วงเวลาแทน created_at__date (ฟังก์ชันครอบ column ทำให้ใช้ index ไม่ได้)
+        start = _day_start(date_from)
+        if start:
+            qs = qs.filter(created_at__gte=start)
+        end = _day_start(date_to)
+        if end:
+            qs = qs.filter(created_at__lt=end + timedelta(days=1))
 
         return qs
 
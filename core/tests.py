@@ -1,3 +1,1593 @@
-from django.test import TestCase
+import gzip
+import json
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from functools import partial
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .benchutils import regressions, webhook_sink
+from .export_jobs import (
+    LeaseLost, artifact_path, claim_next_job, request_export, requeue_stale_jobs, resolve_since, run_job,
+)
+from .imports import import_tickets, read_rows
+from .kpi import TICKETS_OPEN, dashboard_snapshot, slot_of, top_assets
+from .metrics import REGISTRY
+from .models import (
+    Asset, AssetAssignmentLog, AssetCategory, AuditLog, Department, ExportJob, KpiCounter, Location, Notification,
+    OutboxEvent, Part, PartStockBalance, PartStockMovement, Ticket, TicketComment, TicketSequence, Vendor,
+)
+from .notify import (
+    UNREAD_LOCAL_TIMEOUT, get_unread_count, mark_read, notifications_for, notify_broadcast, notify_it, notify_users,
+)
+from .outbox import process_batch, publish
+from .permissions import group_cache_key, is_admin, is_it, is_manager
+from .profiling import profile_files
+from .querylog import QueryWatch, shape
+from .search import rebuild_asset_index, rebuild_ticket_index
+from .stock import use_part_for_ticket
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class StockOutConcurrencyTests(TransactionTestCase):
+    """ยิง OUT พร้อมกันหลายร้อยครั้งที่ SKU เดียว ต้องไม่ oversell"""
+
+    STOCK = 150
+    ATTEMPTS = 400
+    WORKERS = 16
+
+    def setUp(self):
+        self.part = Part.objects.create(name="SSD 512GB", sku="SSD-512")
+        PartStockMovement.objects.create(part=self.part, movement_type="IN", qty=self.STOCK)
+        category = AssetCategory.objects.create(name="Laptop")
+        asset = Asset.objects.create(asset_code="IT-000001", category=category)
+        self.ticket = Ticket.objects.create(asset=asset, subject="Disk", description="replace")
+
+    def _use_one(self, _):
+        try:
+            use_part_for_ticket(self.ticket, self.part, 1)
+            return True
+        except ValidationError:
+            return False
+        finally:
+            close_old_connections()
+
+    def test_concurrent_out_never_oversells(self):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            results = list(pool.map(self._use_one, range(self.ATTEMPTS)))
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(results.count(True), self.STOCK)
+        self.assertEqual(self.part.stock_balance(), 0)
+        self.assertEqual(self.part.movements.filter(movement_type="OUT").count(), self.STOCK)
+
+        throughput = self.ATTEMPTS / elapsed
+        self.assertGreater(throughput, 20, f"{throughput:.0f} stock OUT attempts/s")
+
+
+class StockBalanceTests(TestCase):
+    def setUp(self):
+        self.part = Part.objects.create(name="SSD 512GB", sku="SSD-512")
+
+    def _row(self):
+        b = PartStockBalance.objects.get(part=self.part)
+        return b.in_qty, b.out_qty, b.adjust_qty, b.balance
+
+    def test_apply_creates_row_and_reverses(self):
+        PartStockBalance.apply(self.part.pk, "IN", 10)
+        PartStockBalance.apply(self.part.pk, "OUT", 3)
+        # ADJUST เก็บแยก ไม่นับรวม balance
+        PartStockBalance.apply(self.part.pk, "ADJUST", 4)
+        self.assertEqual(self._row(), (10, 3, 4, 7))
+
+        PartStockBalance.apply(self.part.pk, "OUT", -3)
+        self.assertEqual(self._row(), (10, 0, 4, 10))
+
+    def test_consume_never_goes_negative(self):
+        PartStockBalance.apply(self.part.pk, "IN", 2)
+        self.assertTrue(PartStockBalance.consume(self.part.pk, 2))
+        self.assertFalse(PartStockBalance.consume(self.part.pk, 1))
+        self.assertEqual(self._row(), (2, 2, 0, 0))
+        # ไม่มี balance row = ไม่มี stock
+        other = Part.objects.create(name="RAM", sku="RAM-8")
+        self.assertFalse(PartStockBalance.consume(other.pk, 1))
+
+    def test_conditional_decrement_refuses_over_draw(self):
+        # แต่ละครั้งพอถ้าตัดลำพัง แต่สองครั้งรวมกันเกินยอด: ครั้งที่สองต้องถูกปฏิเสธ ไม่ติดลบ
+        # (StockOutConcurrencyTests ยิงพร้อมกันจริงบน PostgreSQL; อันนี้รันได้บน SQLite)
+        PartStockMovement.objects.create(part=self.part, movement_type="IN", qty=5)
+        self.assertTrue(PartStockBalance.consume(self.part.pk, 3))
+        self.assertFalse(PartStockBalance.consume(self.part.pk, 3))
+        self.assertEqual(self._row(), (5, 3, 0, 2))
+
+        category = AssetCategory.objects.create(name="Laptop")
+        asset = Asset.objects.create(asset_code="IT-000001", category=category)
+        ticket = Ticket.objects.create(asset=asset, subject="Disk", description="replace")
+        # สอง worker อ่านยอด 2 ใน clean() พร้อมกัน (ยังไม่ lock) แล้วต่างคนขอ 2: conditional UPDATE ตัดได้คนเดียว
+        with mock.patch.object(Part, "stock_balance", return_value=2):
+            use_part_for_ticket(ticket, self.part, 2)
+            with self.assertRaises(ValidationError):
+                use_part_for_ticket(ticket, self.part, 2)
+        self.assertEqual(self._row(), (5, 5, 0, 0))
+        self.assertEqual(self.part.movements.filter(movement_type="OUT").count(), 1)
+
+    def test_movements_keep_balance_in_step(self):
+        PartStockMovement.objects.create(part=self.part, movement_type="IN", qty=5)
+        out = PartStockMovement.objects.create(part=self.part, movement_type="OUT", qty=2)
+        self.assertEqual(self._row(), (5, 2, 0, 3))
+        out.delete()
+        self.assertEqual(self._row(), (5, 0, 0, 5))
+
+    def test_rebuild_reports_and_fixes_drift(self):
+        PartStockMovement.objects.create(part=self.part, movement_type="IN", qty=5)
+        PartStockMovement.objects.create(part=self.part, movement_type="OUT", qty=2)
+        missing = Part.objects.create(name="RAM", sku="RAM-8")
+        PartStockMovement.objects.bulk_create([PartStockMovement(part=missing, movement_type="IN", qty=4)])
+        PartStockBalance.objects.filter(part=missing).delete()
+        PartStockBalance.objects.filter(part=self.part).update(balance=99)
+
+        out = StringIO()
+        call_command("rebuild_stock_balances", "--dry-run", stdout=out)
+        self.assertIn(f"part={self.part.pk} stored=(5, 2, 0, 99) ledger=(5, 2, 0, 3)", out.getvalue())
+        self.assertIn(f"part={missing.pk} stored=None ledger=(4, 0, 0, 4)", out.getvalue())
+        self.assertIn("2 parts drifted (dry run", out.getvalue())
+        self.assertEqual(self._row(), (5, 2, 0, 99))
+
+        call_command("rebuild_stock_balances", stdout=StringIO())
+        self.assertEqual(self._row(), (5, 2, 0, 3))
+        self.assertEqual(PartStockBalance.objects.get(part=missing).balance, 4)
+        out = StringIO()
+        call_command("rebuild_stock_balances", stdout=out)
+        self.assertIn("no drift", out.getvalue())
+
+
+class TicketSequenceTests(TestCase):
+    def test_reserve_hands_out_contiguous_blocks(self):
+        day = date(2026, 3, 1)
+        self.assertEqual(TicketSequence.reserve(day), 1)
+        self.assertEqual(TicketSequence.reserve(day, 100), 2)
+        self.assertEqual(TicketSequence.reserve(day), 102)
+        self.assertEqual(TicketSequence.objects.get(day=day).last_no, 102)
+        # แต่ละวันนับแยกกัน
+        self.assertEqual(TicketSequence.reserve(date(2026, 3, 2), 5), 1)
+
+    def test_ticket_numbers_roll_over_with_the_day(self):
+        first_day = timezone.make_aware(datetime(2026, 3, 1, 23, 59))
+        with mock.patch("django.utils.timezone.now", return_value=first_day):
+            self.assertEqual(
+                Ticket.reserve_ticket_nos(3), ["TCK-20260301-00001", "TCK-20260301-00002", "TCK-20260301-00003"],
+            )
+            self.assertEqual(Ticket.reserve_ticket_nos(1), ["TCK-20260301-00004"])
+        with mock.patch("django.utils.timezone.now", return_value=first_day + timedelta(minutes=2)):
+            self.assertEqual(Ticket.reserve_ticket_nos(2), ["TCK-20260302-00001", "TCK-20260302-00002"])
+
+    def test_created_tickets_take_the_next_number(self):
+        category = AssetCategory.objects.create(name="Laptop")
+        asset = Asset.objects.create(asset_code="IT-000001", category=category)
+        block = Ticket.reserve_ticket_nos(2)
+        ticket = Ticket.objects.create(asset=asset, subject="Disk", description="replace")
+        today = timezone.localdate()
+        self.assertEqual(ticket.ticket_no, Ticket.format_ticket_no(today, int(block[-1][-5:]) + 1))
+
+
+@override_settings(SHARED_CACHE=True)
+class PermissionCacheQueryCountTests(TestCase):
+    """group ของ user ต้อง resolve ครั้งเดียวต่อ request และมาจาก cache ใน request ถัดไป"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ["ADMIN", "IT", "MANAGER", "EMPLOYEE"]:
+            Group.objects.create(name=name)
+        cls.it_user = User.objects.create_user("tech", password="x")
+        cls.it_user.groups.add(Group.objects.get(name="IT"))
+        cls.employee = User.objects.create_user("emp", password="x")
+        cls.employee.groups.add(Group.objects.get(name="EMPLOYEE"))
+
+        category = AssetCategory.objects.create(name="Laptop")
+        asset = Asset.objects.create(asset_code="IT-000001", category=category, owner=cls.employee)
+        cls.ticket = Ticket.objects.create(
+            asset=asset, subject="Screen", description="flicker", requested_by=cls.employee
+        )
+        part = Part.objects.create(name="RAM 8GB", sku="RAM-8")
+        PartStockMovement.objects.create(part=part, movement_type="IN", qty=5)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_group_names_memoized_per_request(self):
+        user = User.objects.get(pk=self.it_user.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(is_it(user))
+            self.assertFalse(is_manager(user))
+            self.assertFalse(is_admin(user))
+        # user object ใหม่ (request ถัดไป) อ่านจาก shared cache
+        with self.assertNumQueries(0):
+            self.assertTrue(is_it(User(pk=self.it_user.pk, username="tech")))
+
+    def test_membership_change_invalidates_cache(self):
+        self.assertFalse(is_manager(User.objects.get(pk=self.employee.pk)))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employee.groups.add(Group.objects.get(name="MANAGER"))
+        self.assertTrue(is_manager(User.objects.get(pk=self.employee.pk)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Group.objects.get(name="MANAGER").user_set.remove(self.employee)
+        self.assertFalse(is_manager(User.objects.get(pk=self.employee.pk)))
+
+    def test_same_object_sees_its_group_change(self):
+        # request ที่เปลี่ยน group เองใช้ user object เดิมต่อ (ยังไม่ commit)
+        user = User.objects.get(pk=self.employee.pk)
+        self.assertFalse(is_manager(user))
+        user.groups.add(Group.objects.get(name="MANAGER"))
+        self.assertTrue(is_manager(user))
+        Group.objects.get(name="MANAGER").user_set.remove(user)  # reverse: signal ได้แค่ pk
+        self.assertFalse(is_manager(user))
+
+    def test_invalidation_waits_for_commit(self):
+        self.assertTrue(is_it(User.objects.get(pk=self.it_user.pk)))
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.it_user.groups.clear()
+            # ยังไม่ commit: request อื่นเห็น membership เดิม และ cache ต้องยังไม่ถูกลบ
+            self.assertIsNotNone(cache.get(group_cache_key(self.it_user.pk)))
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertFalse(is_it(User.objects.get(pk=self.it_user.pk)))
+
+    def test_group_rename_invalidates_cache(self):
+        self.assertTrue(is_it(User.objects.get(pk=self.it_user.pk)))
+        group = Group.objects.get(name="IT")
+        group.name = "IT-OLD"
+        with self.captureOnCommitCallbacks(execute=True):
+            group.save()
+        self.assertFalse(is_it(User.objects.get(pk=self.it_user.pk)))
+
+    @override_settings(SHARED_CACHE=False)
+    def test_per_process_cache_is_not_shared_across_requests(self):
+        # LocMem: ลบ cache ข้าม worker ไม่ได้ จึง resolve ใหม่ทุก request
+        with self.assertNumQueries(1):
+            self.assertTrue(is_it(User(pk=self.it_user.pk, username="tech")))
+        self.assertIsNone(cache.get(group_cache_key(self.it_user.pk)))
+        Group.objects.get(name="IT").user_set.remove(self.it_user)  # ไม่รอ signal/commit
+        self.assertFalse(is_it(User(pk=self.it_user.pk, username="tech")))
+
+    # session + user = 2 query ทุก request; ที่เหลือเป็นของ view เอง
+    # (group กับ unread badge มาจาก cache ไม่มี query แล้ว)
+    VIEW_QUERY_COUNTS = [
+        ("it_user", "core:dashboard", {}, 4),
+        # keyset pagination: ไม่มี COUNT(*)
+        ("it_user", "core:ticket_list", {}, 3),
+        ("it_user", "core:ticket_detail", {"pk": "ticket"}, 8),
+        ("it_user", "core:my_dashboard", {}, 8),
+        ("it_user", "core:part_list", {}, 4),
+        ("employee", "core:ticket_list", {}, 3),
+        ("employee", "core:ticket_detail", {"pk": "ticket"}, 8),
+    ]
+
+    def _url(self, name, kwargs):
+        return reverse(name, kwargs={k: getattr(self, v).pk for k, v in kwargs.items()})
+
+    def test_view_query_counts(self):
+        for user_attr, name, kwargs, expected in self.VIEW_QUERY_COUNTS:
+            url = self._url(name, kwargs)
+            with self.subTest(user=user_attr, view=name):
+                self.client.force_login(getattr(self, user_attr))
+                self.client.get(url)  # warm group cache
+                with self.assertNumQueries(expected):
+                    self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_cold_cache_costs_group_and_unread_queries(self):
+        # cache ว่าง: group names + unread counter (direct) + broadcast unread
+        for user_attr, name, kwargs, expected in self.VIEW_QUERY_COUNTS:
+            url = self._url(name, kwargs)
+            with self.subTest(user=user_attr, view=name):
+                self.client.force_login(getattr(self, user_attr))
+                cache.clear()
+                with self.assertNumQueries(expected + 3):
+                    self.client.get(url)
+
+
+class UnreadCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("emp", password="x")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_counter_follows_notify_and_mark_read(self):
+        # cache ถูกลบใน on_commit จึงต้องสั่งให้ callback ทำงานใน TestCase
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_users([self.user], Notification.Type.TICKET_UPDATE, "a")
+            notify_users([self.user], Notification.Type.TICKET_UPDATE, "b")
+        self.assertEqual(get_unread_count(self.user), 2)
+
+        first = Notification.objects.filter(recipient=self.user).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("core:notification_read", args=[first.pk]))
+            self.client.post(reverse("core:notification_read", args=[first.pk]))  # อ่านซ้ำต้องไม่ลดอีก
+        self.assertEqual(get_unread_count(self.user), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("core:notification_read_all"))
+        self.assertEqual(get_unread_count(self.user), 0)
+
+    @override_settings(SHARED_CACHE=True)
+    def test_cached_count_skips_database(self):
+        notify_users([self.user], Notification.Type.TICKET_UPDATE, "a")
+        get_unread_count(self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_count(self.user), 1)
+
+    @override_settings(SHARED_CACHE=False)
+    def test_default_cache_keeps_badge_briefly(self):
+        # LocMem (ค่าเริ่มต้น): หน้าถัดไปไม่ query badge ซ้ำ
+        url = reverse("core:ticket_list")
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+        self.assertFalse([q for q in ctx.captured_queries if "core_notification" in q["sql"]])
+
+        # run_outbox เป็นอีก process: on_commit ของมันไม่ถึง LocMem ของ web worker -> ค่าเก่าไม่เกิน TTL
+        notify_users([self.user], Notification.Type.TICKET_UPDATE, "a")  # ไม่รัน on_commit
+        self.assertEqual(get_unread_count(self.user), 0)
+        later = time.time() + UNREAD_LOCAL_TIMEOUT + 1
+        with mock.patch("django.core.cache.backends.locmem.time.time", return_value=later):
+            self.assertEqual(get_unread_count(User.objects.get(pk=self.user.pk)), 1)
+
+
+class BroadcastNotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        it = Group.objects.create(name="IT")
+        cls.techs = [User.objects.create_user(f"tech{i}", password="x") for i in range(3)]
+        it.user_set.add(*cls.techs)
+        cls.employee = User.objects.create_user("emp", password="x")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_broadcast_is_one_row_for_whole_audience(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_it(Notification.Type.LOW_STOCK, "LOW STOCK: RAM-8")
+        self.assertEqual(Notification.objects.count(), 1)
+        for tech in self.techs:
+            self.assertEqual(get_unread_count(tech), 1)
+        self.assertEqual(get_unread_count(self.employee), 0)
+
+    def test_list_merges_direct_and_broadcast_with_read_state(self):
+        tech = self.techs[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_it(Notification.Type.TICKET_NEW, "New Ticket: A")
+            notify_users([tech], Notification.Type.TICKET_UPDATE, "Ticket updated: B")
+            b2 = notify_broadcast("IT", Notification.Type.TICKET_NEW, "New Ticket: C")
+
+        self.client.force_login(tech)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("core:notification_read", args=[b2.pk]))
+        items = {n.title: n.seen for n in notifications_for(tech)}
+        self.assertEqual(items, {"New Ticket: A": False, "Ticket updated: B": False, "New Ticket: C": True})
+        self.assertEqual(get_unread_count(tech), 2)
+        # คนอื่นใน audience ยังไม่อ่าน
+        self.assertEqual(get_unread_count(self.techs[1]), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("core:notification_read_all"))
+        self.assertFalse(any(n.seen is False for n in notifications_for(tech)))
+        self.assertEqual(get_unread_count(tech), 0)
+        self.assertEqual(get_unread_count(self.techs[1]), 2)
+
+    def test_cannot_mark_broadcast_of_other_audience(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            noti = notify_it(Notification.Type.TICKET_NEW, "New Ticket: A")
+        self.assertFalse(mark_read(self.employee, noti.pk))
+
+
+@override_settings(OUTBOX_WEBHOOK_URLS=[], OUTBOX_INLINE=False)
+class OutboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        it = Group.objects.create(name="IT")
+        cls.tech = User.objects.create_user("tech", password="x")
+        it.user_set.add(cls.tech)
+        cls.employee = User.objects.create_user("emp", password="x")
+        category = AssetCategory.objects.create(name="Laptop")
+        cls.asset = Asset.objects.create(asset_code="IT-000001", category=category, owner=cls.employee)
+        cls.ticket = Ticket.objects.create(
+            asset=cls.asset, subject="Screen", description="flicker", requested_by=cls.employee
+        )
+
+    def test_update_view_notifies_requester_once_via_outbox(self):
+        self.client.force_login(self.tech)
+        self.client.post(reverse("core:ticket_update", args=[self.ticket.pk]), {
+            "asset": self.asset.pk, "subject": "Screen", "description": "flicker",
+            "priority": "MEDIUM", "status": "IN_PROGRESS", "sla_hours": 24,
+        })
+        # request path เขียนแค่ outbox
+        self.assertEqual(Notification.objects.count(), 0)
+        self.assertEqual(OutboxEvent.objects.filter(topic=OutboxEvent.Topic.TICKET_UPDATED).count(), 1)
+
+        process_batch(window=0)
+        self.assertEqual(
+            list(Notification.objects.filter(recipient=self.employee).values_list("ntype", flat=True)),
+            [Notification.Type.TICKET_UPDATE],
+        )
+
+    def test_repeated_updates_are_coalesced(self):
+        for status in ["ASSIGNED", "IN_PROGRESS", "DONE"]:
+            self.ticket.status = status
+            self.ticket.save()
+
+        stats = process_batch(window=0)
+        self.assertEqual((stats["notified"], stats["coalesced"]), (1, 2))
+        noti = Notification.objects.get(recipient=self.employee)
+        self.assertEqual(noti.message, "Status: DONE")
+        self.assertFalse(OutboxEvent.objects.filter(status=OutboxEvent.Status.PENDING).exists())
+
+    def test_save_without_changes_publishes_nothing(self):
+        with self.assertNumQueries(1):  # UPDATE อย่างเดียว: ไม่ SELECT ค่าเดิม ไม่ reindex ไม่เข้า outbox
+            self.ticket.save(update_fields=["updated_at"])
+        self.ticket.save()
+        self.ticket.priority = "HIGH"
+        self.ticket.save(update_fields=["updated_at"])  # เปลี่ยนใน memory แต่ไม่ได้เขียน priority
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_events_wait_for_coalesce_window(self):
+        self.ticket.status = Ticket.Status.ASSIGNED
+        self.ticket.save()
+        self.assertEqual(process_batch(window=60)["notified"], 0)
+        self.assertEqual(process_batch(window=0)["notified"], 1)
+
+    def test_webhook_delivery_and_retry(self):
+        self.ticket.status = Ticket.Status.ASSIGNED
+        self.ticket.save()
+        with webhook_sink(status=500) as (url, received):
+            with override_settings(OUTBOX_WEBHOOK_URLS=[url]):
+                stats = process_batch(window=0)
+        self.assertEqual((stats["notified"], stats["failed"]), (1, 1))
+        event = OutboxEvent.objects.get()
+        self.assertEqual((event.status, event.attempts), (OutboxEvent.Status.PENDING, 1))
+        # notification ไม่ถูกสร้างซ้ำตอน retry webhook
+        OutboxEvent.objects.update(available_at=event.created_at)
+
+        with webhook_sink() as (url, received):
+            with override_settings(OUTBOX_WEBHOOK_URLS=[url]):
+                stats = process_batch(window=0)
+        self.assertEqual(stats["delivered"], 1)
+        self.assertEqual(received[0]["topic"], "ticket.updated")
+        self.assertEqual(received[0]["data"]["ticket_no"], self.ticket.ticket_no)
+        self.assertEqual(OutboxEvent.objects.get().status, OutboxEvent.Status.DONE)
+        self.assertEqual(Notification.objects.count(), 1)
+
+
+class TicketActionAtomicityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        it = Group.objects.create(name="IT")
+        cls.tech = User.objects.create_user("tech", password="x")
+        it.user_set.add(cls.tech)
+        category = AssetCategory.objects.create(name="Laptop")
+        asset = Asset.objects.create(asset_code="IT-000001", category=category)
+        cls.ticket = Ticket.objects.create(asset=asset, subject="Screen", description="flicker", requested_by=cls.tech)
+
+    def setUp(self):
+        self.addCleanup(cache.clear)
+
+    def test_failed_audit_rolls_back_ticket_and_outbox(self):
+        self.client.force_login(self.tech)
+        before = dashboard_snapshot()
+        for name in ["core:ticket_assign_to_me", "core:ticket_start", "core:ticket_resolve", "core:ticket_close"]:
+            with mock.patch.object(AuditLog.objects, "create", side_effect=RuntimeError("audit down")):
+                with self.assertRaises(RuntimeError):
+                    self.client.post(reverse(name, args=[self.ticket.pk]))
+
+            self.ticket.refresh_from_db()
+            self.assertEqual((self.ticket.status, self.ticket.assigned_to), (Ticket.Status.NEW, None), name)
+            self.assertFalse(OutboxEvent.objects.exists(), name)
+            self.assertEqual(dashboard_snapshot(), before, name)
+
+    def test_failed_use_part_shows_message_and_rolls_back(self):
+        part = Part.objects.create(name="SSD 512GB", sku="SSD-512")
+        PartStockMovement.objects.create(part=part, movement_type="IN", qty=5)
+        self.client.force_login(self.tech)
+        url = reverse("core:ticket_detail", args=[self.ticket.pk])
+        with mock.patch.object(AuditLog.objects, "create", side_effect=IntegrityError("boom")), \
+                self.assertLogs("core.views", "ERROR"):
+            resp = self.client.post(url, {"use_part": "1", "part": part.pk, "qty": 2}, follow=True)
+        self.assertContains(resp, "Cannot use part: stock could not be updated")
+        self.assertEqual(part.stock_balance(), 5)
+        self.assertFalse(part.movements.filter(movement_type="OUT").exists())
+
+
+class KpiSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = AssetCategory.objects.create(name="Laptop")
+        cls.a1 = Asset.objects.create(asset_code="IT-000001", category=category)
+        cls.a2 = Asset.objects.create(asset_code="IT-000002", category=category)
+
+    def _ticket(self, asset, **kw):
+        return Ticket.objects.create(asset=asset, subject="x", description="-", **kw)
+
+    def _live(self):
+        # ค่าที่ dashboard เคยคำนวณสดจากตารางจริง
+        now = timezone.now()
+        open_qs = Ticket.objects.filter(status__in=["NEW", "ASSIGNED", "IN_PROGRESS"])
+        month = Ticket.objects.filter(created_at__year=now.year, created_at__month=now.month)
+        return {
+            "open_tickets": open_qs.count(),
+            "overdue_tickets": open_qs.filter(due_at__lt=now - timedelta(minutes=1)).count(),
+            "assets_total": Asset.objects.count(),
+            "cost_month": sum((t.cost or 0) for t in month),
+        }
+
+    def test_snapshot_follows_ticket_and_asset_changes(self):
+        past = timezone.now() - timedelta(hours=3)
+        t1 = self._ticket(self.a1, due_at=past)
+        t2 = self._ticket(self.a1, cost=Decimal("100.50"))
+        t3 = self._ticket(self.a2, due_at=past, cost=Decimal("20"))
+        self.assertEqual(dashboard_snapshot(), self._live())
+
+        t1.status = Ticket.Status.DONE
+        t1.save()
+        t2.cost = Decimal("80")
+        t2.asset = self.a2
+        t2.save()
+        t3.delete()
+        Asset.objects.create(asset_code="IT-000003", category=self.a1.category)
+
+        self.assertEqual(dashboard_snapshot(), self._live())
+        self.assertEqual([(r.asset_id, r.tickets) for r in top_assets()], [(self.a1.pk, 1), (self.a2.pk, 1)])
+
+        out = StringIO()
+        call_command("rebuild_kpis", "--dry-run", stdout=out)
+        self.assertIn("no drift", out.getvalue())
+
+    def test_closed_due_buckets_are_removed(self):
+        past = timezone.now() - timedelta(hours=3)
+        tickets = [self._ticket(self.a1, due_at=past), self._ticket(self.a2, due_at=past - timedelta(days=1))]
+        self.assertEqual(KpiCounter.objects.filter(name__startswith="due:").count(), 2)
+        for t in tickets:
+            t.status = Ticket.Status.CLOSED
+            t.save()
+        # overdue อ่านเฉพาะ bucket ของ ticket ที่ยังเปิด ไม่สะสม bucket 0 ตามประวัติ
+        self.assertFalse(KpiCounter.objects.filter(name__startswith="due:").exists())
+        self.assertEqual(dashboard_snapshot()["overdue_tickets"], 0)
+
+        tickets[0].status = Ticket.Status.NEW  # reopen: bucket กลับมา
+        tickets[0].save()
+        self.assertEqual(dashboard_snapshot(), self._live())
+
+    def test_tickets_spread_over_counter_slots(self):
+        tickets = [self._ticket(self.a1) for _ in range(3)]
+        # ticket ติดกันไม่แย่ง row lock แถวเดียว
+        self.assertEqual(
+            sorted(KpiCounter.objects.filter(name__startswith=TICKETS_OPEN).values_list("name", flat=True)),
+            sorted(f"{TICKETS_OPEN}#{slot_of(t.pk)}" for t in tickets),
+        )
+        tickets[1].status = Ticket.Status.CLOSED
+        tickets[1].save()
+        self.assertEqual(KpiCounter.objects.get(name=f"{TICKETS_OPEN}#{slot_of(tickets[1].pk)}").value, 0)
+        self.assertEqual(dashboard_snapshot(), self._live())
+
+    def test_rebuild_repairs_drift(self):
+        self._ticket(self.a1, cost=Decimal("5"))
+        Ticket.objects.update(status=Ticket.Status.CLOSED)  # queryset.update ไม่ผ่าน signal
+        self.assertEqual(dashboard_snapshot()["open_tickets"], 1)
+
+        call_command("rebuild_kpis", stdout=StringIO())
+        self.assertEqual(dashboard_snapshot(), self._live())
+
+
+class ExportJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("boss", password="x")
+        cls.category = AssetCategory.objects.create(name="Laptop")
+        cls.a1 = Asset.objects.create(asset_code="IT-000001", category=cls.category, owner=cls.user)
+        cls.a2 = Asset.objects.create(asset_code="IT-000002", category=cls.category)
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _export(self, since=None):
+        job = request_export("assets", self.user, since=since)
+        if job.status == ExportJob.Status.QUEUED:
+            claimed = claim_next_job()
+            self.assertEqual(claimed, job)
+            job = run_job(claimed)
+        return job
+
+    def _rows(self, job):
+        with gzip.open(artifact_path(job), "rt", encoding="utf-8") as fh:
+            return [line.split(",")[0] for line in fh.read().splitlines()[1:]]
+
+    def test_unchanged_data_reuses_artifact(self):
+        first = self._export()
+        self.assertEqual(self._rows(first), ["IT-000001", "IT-000002"])
+        with self.assertNumQueries(3):  # version 2 + หา job เดิม ไม่ COUNT ทั้งตาราง
+            self.assertEqual(request_export("assets", self.user), first)
+        # login เขียนแค่ last_login ไม่เกี่ยวกับ export
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=["last_login"])
+        self.assertEqual(request_export("assets", self.user), first)
+
+    def test_changes_to_joined_rows_invalidate_artifact(self):
+        changes = [
+            lambda: AssetCategory.objects.filter(pk=self.category.pk).first().save(),
+            lambda: User.objects.get(pk=self.user.pk).save(),
+            lambda: Asset.objects.get(pk=self.a2.pk).delete(),
+            lambda: Asset.objects.create(asset_code="IT-000003", category=self.category),
+        ]
+        job = self._export()
+        for change in changes:
+            change()
+            newer = request_export("assets", self.user)
+            self.assertNotEqual(newer, job)
+            job = self._export()
+
+    def test_since_last_exports_only_rows_changed_after_previous_export(self):
+        self.assertIsNone(resolve_since("assets", self.user, "last"))
+        full = self._export()
+        since = resolve_since("assets", self.user, "last")
+        self.assertEqual(since, full.cutoff_at)
+
+        asset = Asset.objects.get(pk=self.a2.pk)
+        asset.brand = "Dell"
+        asset.save()
+        delta = self._export(since=since)
+        self.assertEqual((delta.since, self._rows(delta)), (full.cutoff_at, ["IT-000002"]))
+        self.assertEqual(resolve_since("assets", self.user, "last"), delta.cutoff_at)
+
+    def test_stale_lease_is_requeued_and_old_worker_stops(self):
+        job = request_export("assets", self.user)
+        self.assertEqual(claim_next_job(), job)
+        job.refresh_from_db()
+        # heartbeat ยังสด แม้เริ่มมานานแล้ว -> ไม่ requeue
+        ExportJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(requeue_stale_jobs(timedelta(minutes=15)), 0)
+
+        ExportJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_jobs(timedelta(minutes=15)), 1)
+        retry = claim_next_job()
+        self.assertEqual((retry.pk, retry.attempts), (job.pk, 2))
+
+        # worker แรกยังถือ attempt 1 อยู่: ต้องหยุดโดยไม่แตะ job และไม่ทิ้ง tmp ไว้
+        with self.assertRaises(LeaseLost):
+            run_job(job)
+        self.assertEqual(ExportJob.objects.get(pk=job.pk).status, ExportJob.Status.RUNNING)
+        self.assertEqual(list((Path(settings.MEDIA_ROOT) / "exports").iterdir()), [])
+
+        done = run_job(retry)
+        self.assertEqual((done.status, self._rows(done)), (ExportJob.Status.DONE, ["IT-000001", "IT-000002"]))
+
+
+class ListViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        it = Group.objects.create(name="IT")
+        cls.tech = User.objects.create_user("tech", password="x")
+        it.user_set.add(cls.tech)
+        asset = Asset.objects.create(asset_code="IT-000001", category=AssetCategory.objects.create(name="Laptop"))
+        for i in range(12):
+            Ticket.objects.create(asset=asset, subject=f"t{i}", description="-")
+        part = Part.objects.create(name="RAM 8GB", sku="RAM-8")
+        PartStockMovement.objects.create(part=part, movement_type="IN", qty=5)
+
+    def setUp(self):
+        self.client.force_login(self.tech)
+
+    def test_pagination_keeps_filters(self):
+        resp = self.client.get(reverse("core:ticket_list"), {"status": "NEW"})
+        self.assertContains(resp, f"?status=NEW&amp;cursor={resp.context['page_obj'].next_cursor}")
+
+    def test_cursor_pages_walk_forward_and_back(self):
+        url = reverse("core:ticket_list")
+        newest = list(Ticket.objects.order_by("-created_at", "-id").values_list("pk", flat=True))
+
+        first = self.client.get(url).context
+        self.assertEqual([t.pk for t in first["tickets"]], newest[:10])
+        self.assertFalse(first["page_obj"].has_previous())
+
+        second = self.client.get(url, {"cursor": first["page_obj"].next_cursor}).context
+        self.assertEqual([t.pk for t in second["tickets"]], newest[10:])
+        self.assertFalse(second["page_obj"].has_next())
+
+        back = self.client.get(url, {"cursor": second["page_obj"].previous_cursor}).context
+        self.assertEqual([t.pk for t in back["tickets"]], newest[:10])
+        self.assertFalse(back["page_obj"].has_previous())
+
+        # cursor เสีย -> หน้าแรก
+        self.assertEqual(len(self.client.get(url, {"cursor": "garbage"}).context["tickets"]), 10)
+
+    def test_movement_history_date_range(self):
+        today = timezone.localdate().isoformat()
+        url = reverse("core:movement_history")
+        self.assertEqual(len(self.client.get(url, {"from": today, "to": today}).context["movements"]), 1)
+        self.assertEqual(len(self.client.get(url, {"to": "2000-01-01"}).context["movements"]), 0)
+        self.assertEqual(self.client.get(url, {"from": "2000-13-40"}).status_code, 200)
+
+    def test_large_exact_count_is_cached(self):
+        Part.objects.bulk_create(Part(name=f"Part {i}", sku=f"SKU-{i:05d}") for i in range(1000))
+        cache.clear()
+        url = reverse("core:part_list")
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertContains(self.client.get(url), "1001 items")
+            return sum("COUNT(" in q["sql"] and "core_part" in q["sql"] for q in ctx.captured_queries)
+
+        self.assertEqual(count_queries(), 1)
+        self.assertEqual(count_queries(), 0)
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "planner estimates are PostgreSQL only")
+@override_settings(PAGINATION_ESTIMATE_THRESHOLD=20)
+class EstimatedCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("emp", password="x")
+        category = AssetCategory.objects.create(name="Laptop")
+        Asset.objects.bulk_create(Asset(asset_code=f"IT-{i:06d}", category=category) for i in range(35))
+
+    def test_estimate_shown_until_last_page(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE core_asset")
+        self.client.force_login(self.user)
+        url = reverse("core:asset_list")
+
+        first = self.client.get(url)
+        self.assertTrue(first.context["page_obj"].paginator.estimated)
+        self.assertContains(first, "Total: about")
+
+        last = self.client.get(url, {"page": 4})
+        self.assertEqual(len(last.context["assets"]), 5)
+        self.assertFalse(last.context["page_obj"].has_next())
+        self.assertContains(last, "Total: 35")
+
+
+class TicketSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        it = Group.objects.create(name="IT")
+        cls.tech = User.objects.create_user("tech", password="x")
+        it.user_set.add(cls.tech)
+        cls.employee = User.objects.create_user("emp", password="x")
+        category = AssetCategory.objects.create(name="Laptop")
+        cls.laptop = Asset.objects.create(asset_code="NB-000042", category=category)
+        printer = Asset.objects.create(asset_code="PR-000007", category=category)
+
+        cls.screen = Ticket.objects.create(asset=cls.laptop, subject="Screen flicker", description="after update")
+        cls.battery = Ticket.objects.create(
+            asset=cls.laptop, subject="Battery", description="screen goes dark", requested_by=cls.employee,
+        )
+        cls.jam = Ticket.objects.create(asset=printer, subject="Paper jam", description="tray 2")
+        TicketComment.objects.create(ticket=cls.jam, message="replaced the roller assembly")
+
+    def _search(self, q, user=None):
+        self.client.force_login(user or self.tech)
+        return [t.pk for t in self.client.get(reverse("core:ticket_list"), {"q": q}).context["tickets"]]
+
+    def test_ranked_prefix_search_over_all_fields(self):
+        # subject (title) มาก่อน description
+        self.assertEqual(self._search("scree"), [self.screen.pk, self.battery.pk])
+        self.assertEqual(self._search("roll"), [self.jam.pk])
+        self.assertEqual(self._search("NB-000042"), [self.battery.pk, self.screen.pk])
+        self.assertEqual(self._search("screen dark"), [self.battery.pk])
+        self.assertEqual(self._search(self.jam.ticket_no.lower()), [self.jam.pk])
+
+    def test_search_respects_view_scope(self):
+        self.assertEqual(self._search("screen", user=self.employee), [self.battery.pk])
+
+    def test_index_follows_changes(self):
+        self.screen.subject = "Keyboard"
+        self.screen.save()
+        self.assertEqual(self._search("keyb"), [self.screen.pk])
+
+        self.laptop.asset_code = "NB-009999"
+        self.laptop.save()
+        self.assertEqual(sorted(self._search("NB-009999")), sorted([self.screen.pk, self.battery.pk]))
+
+        self.assertEqual(rebuild_ticket_index(), 3)
+        self.assertEqual(self._search("tray"), [self.jam.pk])
+
+    def test_capped_results_are_flagged(self):
+        self.client.force_login(self.tech)
+        url = reverse("core:ticket_list")
+        with mock.patch("core.search.SEARCH_LIMIT", 1), mock.patch("core.views.SEARCH_LIMIT", 1):
+            resp = self.client.get(url, {"q": "screen"})
+        self.assertEqual([t.pk for t in resp.context["tickets"]], [self.screen.pk])
+        self.assertTrue(resp.context["search_capped"])
+        self.assertContains(resp, "Showing the first 1 matches")
+        self.assertFalse(self.client.get(url, {"q": "screen"}).context["search_capped"])
+
+
+class AssetSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("somchai", password="x")
+        category = AssetCategory.objects.create(name="Laptop")
+        cls.t14 = Asset.objects.create(
+            asset_code="NB-000042", serial_number="PF3XK9Q1", category=category,
+            brand="Lenovo", model_name="ThinkPad T14", owner=cls.user,
+        )
+        cls.dell = Asset.objects.create(
+            asset_code="NB-000043", serial_number="5CD1234", category=category, brand="Dell", model_name="Latitude",
+            status=Asset.Status.REPAIR,
+        )
+        cls.printer = Asset.objects.create(asset_code="PR-000420", serial_number="VNB3K", category=category, brand="HP")
+
+    def _search(self, q, **params):
+        self.client.force_login(self.user)
+        resp = self.client.get(reverse("core:asset_list"), {"q": q, **params})
+        return [a.pk for a in resp.context["assets"]]
+
+    def test_substring_over_all_fields(self):
+        self.assertEqual(self._search("00042"), [self.t14.pk, self.printer.pk])
+        self.assertEqual(self._search("3xk9"), [self.t14.pk])
+        self.assertEqual(self._search("thinkpad t14"), [self.t14.pk])
+        self.assertEqual(self._search("SOMCH"), [self.t14.pk])
+        self.assertEqual(self._search("00042", status=Asset.Status.REPAIR), [])
+        self.assertEqual(self._search("nb-0000", status=Asset.Status.REPAIR), [self.dell.pk])
+        # สั้นกว่า trigram ก็ยังหาได้ (scan)
+        self.assertEqual(self._search("hp"), [self.printer.pk])
+
+    def test_exact_code_and_serial(self):
+        # code ตรงตัวไม่ดึง asset อื่นที่มี code เป็น substring
+        self.assertEqual(self._search("nb-000042"), [self.t14.pk])
+        self.assertEqual(self._search("5CD1234"), [self.dell.pk])
+
+    def test_index_follows_changes(self):
+        self.dell.owner = self.user
+        self.dell.save()
+        self.assertEqual(self._search("somchai"), [self.t14.pk, self.dell.pk])
+
+        self.user.username = "malee"
+        self.user.save()
+        self.assertEqual(self._search("malee"), [self.t14.pk, self.dell.pk])
+
+        self.assertEqual(rebuild_asset_index(), 3)
+        self.assertEqual(self._search("latitude"), [self.dell.pk])
+
+    def test_capped_results_keep_newest_and_are_flagged(self):
+        with mock.patch("core.search.SEARCH_LIMIT", 2), mock.patch("core.views.SEARCH_LIMIT", 2):
+            self.client.force_login(self.user)
+            resp = self.client.get(reverse("core:asset_list"), {"q": "0004"})
+        # ตัดแบบมีลำดับ: asset ใหม่สุด 2 ตัว ไม่ใช่ 2 แถวไหนก็ได้
+        self.assertEqual([a.pk for a in resp.context["assets"]], [self.dell.pk, self.printer.pk])
+        self.assertTrue(resp.context["search_capped"])
+        self.assertContains(resp, "Showing the first 2 matches")
+        self.assertFalse(self.client.get(reverse("core:asset_list"), {"q": "0004"}).context["search_capped"])
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user("admin1", password="x")
+        Group.objects.create(name="ADMIN").user_set.add(cls.admin)
+        cls.employee = User.objects.create_user("emp", password="x")
+
+    def setUp(self):
+        REGISTRY.reset()
+
+    def test_per_view_metrics_exposed_to_admins_only(self):
+        self.client.force_login(self.employee)
+        self.client.get(reverse("core:ticket_list"))
+        self.client.get(reverse("core:ticket_list"))
+        self.assertEqual(self.client.get(reverse("core:metrics")).status_code, 403)
+
+        self.client.force_login(self.admin)
+        body = self.client.get(reverse("core:metrics")).content.decode()
+        self.assertIn('itams_http_requests_total{view="core:ticket_list",method="GET",status="200"} 2', body)
+        self.assertIn('itams_http_request_duration_seconds_count{view="core:ticket_list",method="GET"} 2', body)
+        self.assertIn('itams_db_queries_total{view="core:ticket_list",method="GET"}', body)
+        self.assertIn('itams_http_requests_total{view="core:metrics",method="GET",status="403"} 1', body)
+
+    @override_settings(METRICS_TOKEN="s3cret")
+    def test_bearer_token(self):
+        resp = self.client.get(reverse("core:metrics"), headers={"Authorization": "Bearer s3cret"})
+        self.assertEqual(resp.status_code, 200)
+        resp = self.client.get(reverse("core:metrics"), headers={"Authorization": "Bearer nope"})
+        self.assertEqual(resp.status_code, 403)
+
+    def test_workers_aggregate_through_shared_directory(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            self.client.force_login(self.admin)
+            self.client.get(reverse("core:ticket_list"))
+            # snapshot ของอีก worker หนึ่ง
+            other = {"core:ticket_list|GET": {
+                "buckets": [3] + [0] * 10, "seconds": 0.01, "count": 3, "status": {"200": 3},
+                "db_queries": 9, "db_seconds": 0.003, "response_bytes": 300,
+            }}
+            with open(f"{directory}/999999.json", "w") as f:
+                json.dump(other, f)
+
+            body = self.client.get(reverse("core:metrics")).content.decode()
+        self.assertIn('itams_http_requests_total{view="core:ticket_list",method="GET",status="200"} 4', body)
+
+
+class QueryLogTests(TestCase):
+    def test_shape_ignores_values(self):
+        self.assertEqual(
+            shape("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x'"),
+            shape("SELECT *  FROM t WHERE id IN (%s) AND name = 'yy'"),
+        )
+        self.assertEqual(shape("SELECT 1 FROM t WHERE a = 42"), "SELECT ? FROM t WHERE a = ?")
+
+    def test_repeated_shape_logged_with_call_site(self):
+        watch = QueryWatch(lambda: "test:view", slow_ms=10_000, repeat_threshold=2)
+        with connection.execute_wrapper(watch):
+            for pk in range(3):
+                Ticket.objects.filter(pk=pk).exists()
+            Ticket.objects.count()
+
+        with self.assertLogs("core.querylog", "WARNING") as logs:
+            watch.report()
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("N+1 in test:view: same query ran 3 times", logs.output[0])
+        self.assertIn("core/tests.py", logs.output[0])
+
+    def test_slow_queries_and_jsonl(self):
+        with tempfile.NamedTemporaryFile(suffix=".jsonl") as f, override_settings(QUERYLOG_JSONL=f.name):
+            watch = QueryWatch(lambda: "test:view", slow_ms=0, repeat_threshold=10)
+            with self.assertLogs("core.querylog", "WARNING") as logs:
+                with connection.execute_wrapper(watch):
+                    Ticket.objects.count()
+                watch.report()
+            record = json.loads(f.read().decode().splitlines()[-1])
+
+        self.assertIn("slow query", logs.output[0])
+        self.assertEqual(record["view"], "test:view")
+        self.assertEqual(record["queries"], 1)
+        self.assertEqual(len(record["slow"]), 1)
+
+
+class ProfilerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user("admin1", password="x")
+        Group.objects.create(name="ADMIN").user_set.add(cls.admin)
+        cls.employee = User.objects.create_user("emp", password="x")
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings_override = override_settings(PROFILE_DIR=tmp.name, PROFILE_SAMPLE_RATE=0, PROFILE_MAX_FILES=3)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_profile_on_demand_for_admins_only(self):
+        self.client.force_login(self.employee)
+        resp = self.client.get(reverse("core:ticket_list"), headers={"X-Profile": "1"})
+        self.assertNotIn("X-Profile-File", resp)
+        self.assertEqual(profile_files(), [])
+
+        self.client.force_login(self.admin)
+        resp = self.client.get(reverse("core:ticket_list"), headers={"X-Profile": "1"})
+        self.assertIn("/core_ticket_list/", resp["X-Profile-File"])
+        self.assertEqual(len(profile_files("core:ticket_list")), 1)
+
+    def test_rotation_and_summary(self):
+        self.client.force_login(self.admin)
+        for _ in range(5):
+            self.client.get(reverse("core:ticket_list"), headers={"X-Profile": "1"})
+        self.assertEqual(len(profile_files()), 3)
+
+        out = StringIO()
+        call_command("profile_summary", "core:ticket_list", "--limit", "5", stdout=out)
+        self.assertIn("core:ticket_list: 3 profiles", out.getvalue())
+        self.assertIn("cumtime", out.getvalue())
+
+
+class SeedLoadTests(TestCase):
+    def _load(self):
+        out = StringIO()
+        call_command("seed_load", "--scale", "0.0005", "--until", "2026-01-31", "--seed", "7", stdout=out)
+        return out.getvalue()
+
+    def _snapshot(self):
+        return (
+            list(Ticket.objects.order_by("pk").values_list("ticket_no", "status", "asset_id", "created_at", "due_at")),
+            list(PartStockMovement.objects.order_by("pk").values_list("part_id", "movement_type", "qty", "created_at")),
+        )
+
+    def test_deterministic_and_derived_tables_consistent(self):
+        with transaction.atomic():
+            self._load()
+            first = self._snapshot()
+            transaction.set_rollback(True)
+
+        self.assertIn("✅", self._load())
+        self.assertEqual(self._snapshot(), first)
+        self.assertEqual(Ticket.objects.count(), 1000)
+
+        for name in ("rebuild_kpis", "rebuild_stock_balances", "reconcile_unread_counts"):
+            out = StringIO()
+            call_command(name, "--dry-run", stdout=out)
+            self.assertIn("no drift", out.getvalue(), name)
+        self.assertFalse(PartStockBalance.objects.filter(balance__lt=0).exists())
+
+        # เลข ticket ใหม่ต่อจาก sequence ของวันนั้น ไม่ชนของที่โหลดไว้
+        last = Ticket.objects.filter(ticket_no__startswith="TCK-20260130-").order_by("-ticket_no").first()
+        seq = TicketSequence.reserve(date(2026, 1, 30))
+        self.assertGreater(Ticket.format_ticket_no(date(2026, 1, 30), seq), last.ticket_no)
+
+    def test_refuses_non_empty_database(self):
+        User.objects.create_user("someone")
+        with self.assertRaises(CommandError):
+            self._load()
+
+
+class TicketImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        it = Group.objects.create(name="IT")
+        cls.tech = User.objects.create_user("tech", password="x")
+        it.user_set.add(cls.tech)
+        cls.employee = User.objects.create_user("emp", password="x")
+        category = AssetCategory.objects.create(name="Laptop")
+        cls.laptop = Asset.objects.create(asset_code="NB-000042", category=category)
+        cls.printer = Asset.objects.create(asset_code="PR-000007", category=category)
+
+    def _file(self, name="tickets.csv"):
+        rows = "\n".join([
+            "asset_code,subject,description,priority,requested_by",
+            "NB-000042,Screen flicker,after update,HIGH,emp",
+            "PR-000007,Paper jam,tray 2,,",
+            "XX-1,Lost asset,-,LOW,",
+            "NB-000042,,no subject,ASAP,ghost",
+            "PR-000007,Toner low,-,low,emp",
+        ])
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        path = f"{folder.name}/{name}"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(rows)
+        return path
+
+    def test_command_imports_valid_rows_in_batches(self):
+        out = StringIO()
+        with CaptureQueriesContext(connection) as ctx:
+            call_command("import_tickets", self._file(), "--user", "tech", "--batch-size", "2", stdout=out)
+        # INSERT ticket ครั้งเดียวต่อ batch ที่มีแถวผ่าน (batch 2 = แถว 3-4 ไม่ผ่านทั้งคู่)
+        inserts = [q for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "core_ticket" ')]
+        self.assertEqual(len(inserts), 2)
+        self.assertIn("row 3: unknown asset_code XX-1", out.getvalue())
+        self.assertIn("row 4: subject is required; unknown priority ASAP; unknown user ghost", out.getvalue())
+        self.assertIn("imported 3 of 5 tickets", out.getvalue())
+
+        tickets = list(Ticket.objects.order_by("ticket_no"))
+        self.assertEqual([t.subject for t in tickets], ["Screen flicker", "Paper jam", "Toner low"])
+        self.assertEqual([t.requested_by for t in tickets], [self.employee, self.tech, self.employee])
+        screen = tickets[0]
+        self.assertEqual(screen.sla_hours, 4)
+        self.assertLess(abs(screen.due_at - screen.created_at - timedelta(hours=4)), timedelta(seconds=5))
+        self.assertEqual(len({t.ticket_no for t in tickets}), 3)
+
+        # signal ไม่ถูกเรียก แต่ KPI / search / audit / outbox ต้องครบ (รวมเป็นแถวต่อ batch)
+        kpi = StringIO()
+        call_command("rebuild_kpis", "--dry-run", stdout=kpi)
+        self.assertIn("no drift", kpi.getvalue())
+        self.assertEqual(dashboard_snapshot()["open_tickets"], 3)
+        self.client.force_login(self.tech)
+        found = self.client.get(reverse("core:ticket_list"), {"q": "jam"}).context["tickets"]
+        self.assertEqual([t.pk for t in found], [tickets[1].pk])
+        self.assertEqual(AuditLog.objects.filter(action="IMPORT_TICKETS", created_by=self.tech).count(), 2)
+        self.assertEqual(OutboxEvent.objects.filter(topic=OutboxEvent.Topic.TICKET_CREATED).count(), 2)
+
+    def test_dry_run_writes_nothing(self):
+        out = StringIO()
+        call_command("import_tickets", self._file(), "--dry-run", stdout=out)
+        self.assertIn("would import 3 of 5 tickets", out.getvalue())
+        self.assertFalse(Ticket.objects.exists())
+        self.assertFalse(TicketSequence.objects.exists())
+
+    @override_settings(IMPORT_WEB_MAX_ROWS=4)
+    def test_upload_over_row_cap_is_rejected_before_writing(self):
+        self.client.force_login(self.tech)
+        with open(self._file(), "rb") as f:
+            resp = self.client.post(reverse("core:ticket_import"), {"file": f})
+        self.assertContains(resp, "More than 4 rows")
+        self.assertFalse(Ticket.objects.exists())
+        self.assertFalse(TicketSequence.objects.exists())
+
+    def test_upload_view(self):
+        payload = json.dumps([
+            {"asset_code": "NB-000042", "subject": "Battery", "priority": "LOW"},
+            {"asset_code": "nope", "subject": "x"},
+        ]).encode()
+        upload = SimpleUploadedFile("tickets.json", payload, content_type="application/json")
+
+        self.client.force_login(self.employee)
+        self.assertEqual(self.client.post(reverse("core:ticket_import"), {"file": upload}).status_code, 403)
+
+        upload.seek(0)
+        self.client.force_login(self.tech)
+        resp = self.client.post(reverse("core:ticket_import"), {"file": upload})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["errors"], [(2, "unknown asset_code nope")])
+        self.assertEqual(Ticket.objects.get().requested_by, self.tech)
+
+        bad = SimpleUploadedFile("tickets.xlsx", b"-")
+        resp = self.client.post(reverse("core:ticket_import"), {"file": bad})
+        self.assertFormError(resp.context["form"], "file", "unsupported file type '.xlsx' (use csv, json, jsonl)")
+
+    def test_bad_jsonl_line_is_rejected_like_any_other_row(self):
+        lines = [
+            json.dumps({"asset_code": "NB-000042", "subject": "Battery"}),
+            '{"asset_code": "PR-000007", "subject": ',
+            json.dumps({"asset_code": "PR-000007", "subject": "Toner"}),
+        ]
+        result = import_tickets(read_rows(StringIO("\n".join(lines)), "jsonl"), user=self.tech, batch_size=2)
+        self.assertEqual((result.created, result.stopped_at), (2, None))
+        self.assertEqual([n for n, _ in result.errors], [2])
+        self.assertTrue(result.errors[0][1].startswith("invalid JSON"))
+
+    def test_unreadable_file_reports_what_was_already_imported(self):
+        # แถว 3 เกิน csv.field_size_limit: csv.Error หลัง batch แรก commit ไปแล้ว
+        rows = "\n".join([
+            "asset_code,subject",
+            "NB-000042,Screen",
+            "PR-000007,Paper jam",
+            "NB-000042," + "x" * 200_000,
+            "PR-000007,Toner",
+        ])
+        upload = SimpleUploadedFile("tickets.csv", rows.encode())
+        self.client.force_login(self.tech)
+        with mock.patch("core.import_views.import_tickets", partial(import_tickets, batch_size=2)):
+            resp = self.client.post(reverse("core:ticket_import"), {"file": upload})
+
+        result = resp.context["result"]
+        self.assertEqual((result.created, result.stopped_at), (2, 3))
+        self.assertEqual(Ticket.objects.count(), 2)
+        self.assertEqual(resp.context["errors"][-1][0], 3)
+        self.assertContains(resp, "Stopped at row 3")
+        self.assertContains(resp, f"{result.first_ticket_no} .. {result.last_ticket_no}")
+
+        path = self._file()
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\nNB-000042," + "x" * 200_000 + "\nPR-000007,late,-,,")
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, "stopped at row 6"):
+            call_command("import_tickets", path, "--batch-size", "2", stdout=out)
+        self.assertIn("imported 3 of 6 tickets", out.getvalue())
+
+
+class TicketImportLockTests(TransactionTestCase):
+    """import batch ต้องไม่ถือ lock ของ TicketSequence ไว้ทั้ง batch"""
+
+    def setUp(self):
+        self.user = User.objects.create_user("tech")
+        category = AssetCategory.objects.create(name="Laptop")
+        self.laptop = Asset.objects.create(asset_code="NB-000042", category=category)
+        self.printer = Asset.objects.create(asset_code="PR-000007", category=category)
+        self.rows = [{"asset_code": "NB-000042", "subject": f"Imported {i}"} for i in range(3)]
+
+    def test_numbers_are_reserved_outside_the_batch_transaction(self):
+        seen = []
+        reserve = TicketSequence.reserve
+
+        def spy(day, count=1):
+            seen.append(connection.in_atomic_block)
+            return reserve(day, count)
+
+        with mock.patch.object(TicketSequence, "reserve", side_effect=spy):
+            import_tickets(self.rows, user=self.user)
+        # จองแล้ว commit ทันที ไม่ได้อยู่ใน transaction ของ batch
+        self.assertEqual(seen, [False])
+        self.assertEqual(Ticket.objects.count(), 3)
+
+    @skipUnlessDBFeature("has_select_for_update")
+    def test_ticket_can_be_created_while_a_batch_is_open(self):
+        created = []
+
+        def create_ticket():
+            try:
+                return Ticket.objects.create(asset=self.printer, subject="Walk-in", description="-")
+            finally:
+                close_old_connections()
+
+        def during_batch(*args, **kwargs):
+            # batch เขียน ticket / search / audit ไปแล้วแต่ยังไม่ commit
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                created.append(pool.submit(create_ticket).result(timeout=10))
+            return publish(*args, **kwargs)
+
+        with mock.patch("core.imports.publish", side_effect=during_batch):
+            import_tickets(self.rows, user=self.user)
+        self.assertEqual(len(created), 1)
+        self.assertEqual(Ticket.objects.count(), 4)
+
+
+class AssetImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user("admin", password="x")
+        cls.alice = User.objects.create_user("alice")
+        cls.bob = User.objects.create_user("bob")
+        cls.laptop = AssetCategory.objects.create(name="Laptop")
+        AssetCategory.objects.create(name="Printer")
+        cls.hq = Location.objects.create(name="HQ", detail="3F")
+        cls.nb1 = Asset.objects.create(asset_code="NB-1", category=cls.laptop, owner=cls.alice)
+        cls.nb2 = Asset.objects.create(asset_code="NB-2", category=cls.laptop, owner=cls.bob, brand="Dell")
+        Asset.objects.create(asset_code="NB-3", category=cls.laptop)
+
+    def _run(self, *args):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        path = f"{folder.name}/assets.csv"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join([
+                "asset_code,category,status,owner,location,purchase_date",
+                "NB-1,Laptop,IN_USE,bob,HQ - 3F,",
+                "NB-2,Laptop,REPAIR,bob,,",
+                "NB-3,Laptop,IN_USE,,,",
+                "PR-9,Printer,IN_STOCK,alice,,2025-02-30",
+                "PR-8,Phone,,ghost,,",
+                "NB-1,Laptop,LOST,,,",
+                "PR-7,Printer,IN_STOCK,alice,,2025-03-01",
+            ]))
+        out = StringIO()
+        call_command("import_assets", path, "--user", "admin", *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_prints_diff_and_writes_nothing(self):
+        out = self._run("--dry-run")
+        self.assertIn("~ NB-1 (row 1) owner: alice -> bob, location: - -> HQ - 3F", out)
+        self.assertIn("~ NB-2 (row 2) status: IN_USE -> REPAIR", out)
+        self.assertIn("+ PR-7 (row 7)", out)
+        self.assertIn("row 4: purchase_date must be YYYY-MM-DD", out)
+        self.assertIn("row 5: unknown category Phone; unknown owner ghost; unknown status (blank)", out)
+        self.assertIn("row 6: asset_code NB-1 already on row 1", out)
+        self.assertIn("would create 1, update 2, unchanged 1 of 7 assets", out)
+        self.assertEqual(Asset.objects.count(), 3)
+        self.assertFalse(AssetAssignmentLog.objects.exists())
+
+    def test_upsert_logs_owner_changes_in_one_insert(self):
+        with CaptureQueriesContext(connection) as ctx:
+            out = self._run()
+        sql = [q["sql"] for q in ctx.captured_queries]
+        self.assertIn("created 1, updated 2, unchanged 1 of 7 assets", out)
+        # ไม่มี SELECT ต่อ asset แบบ signal เดิม: upsert 1 statement สำหรับแถวใหม่ + 1 สำหรับแถวเดิม (มี pk), log 1 ครั้ง
+        self.assertEqual(sum(q.startswith('INSERT INTO "core_asset" ') for q in sql), 2)
+        self.assertEqual(sum(q.startswith('INSERT INTO "core_assetassignmentlog"') for q in sql), 1)
+
+        self.nb1.refresh_from_db()
+        self.assertEqual((self.nb1.owner, self.nb1.location), (self.bob, self.hq))
+        self.nb2.refresh_from_db()
+        self.assertEqual((self.nb2.status, self.nb2.brand), ("REPAIR", "Dell"))  # คอลัมน์ที่ไม่มีในไฟล์คงเดิม
+        self.assertEqual(Asset.objects.get(asset_code="PR-7").owner, self.alice)
+        self.assertEqual(
+            list(AssetAssignmentLog.objects.values_list("asset__asset_code", "old_owner", "new_owner", "changed_by")),
+            [("NB-1", self.alice.pk, self.bob.pk, self.admin.pk)],
+        )
+        self.assertEqual(dashboard_snapshot()["assets_total"], 4)
+        self.assertEqual(AuditLog.objects.filter(action="IMPORT_ASSETS", created_by=self.admin).count(), 1)
+
+        self.client.force_login(User.objects.create_superuser("root", password="x"))
+        found = self.client.get(reverse("core:asset_list"), {"q": "bob"}).context["assets"]
+        self.assertEqual(sorted(a.asset_code for a in found), ["NB-1", "NB-2"])
+
+        # รอบสองไม่มีอะไรเปลี่ยน
+        self.assertIn("created 0, updated 0, unchanged 4", self._run())
+
+
+class ChangeTrackingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("boss", password="x")
+        cls.alice = User.objects.create_user("alice")
+        category = AssetCategory.objects.create(name="Laptop")
+        cls.asset = Asset.objects.create(asset_code="IT-000001", category=category, owner=cls.alice)
+
+    def test_changed_fields_against_loaded_values(self):
+        asset = Asset.objects.get(pk=self.asset.pk)
+        self.assertEqual(asset.changed_fields(), set())
+        asset.owner = self.admin
+        asset.brand = "Dell"
+        self.assertEqual(asset.changed_fields(), {"owner", "brand"})
+        self.assertEqual(asset.changed_fields(update_fields=["brand", "updated_at"]), {"brand"})
+        self.assertEqual(asset.loaded_value("owner"), self.alice.pk)
+
+        with CaptureQueriesContext(connection) as ctx:
+            asset.save()
+        # owner log ไม่ต้อง SELECT ค่าเดิม
+        self.assertFalse([q for q in ctx.captured_queries if q["sql"].startswith('SELECT "core_asset"."id", "core_asset"."owner_id" FROM')])
+        self.assertEqual(
+            list(AssetAssignmentLog.objects.values_list("old_owner", "new_owner")), [(self.alice.pk, self.admin.pk)]
+        )
+        self.assertEqual(asset.changed_fields(), set())
+
+        # deferred field ไม่รู้ค่าเดิม -> ไม่นับจนกว่าจะโหลด
+        partial = Asset.objects.only("asset_code").get(pk=self.asset.pk)
+        self.assertEqual(partial.changed_fields(), set())
+        self.assertEqual(partial.owner_id, self.admin.pk)  # โหลด deferred field
+        self.assertEqual(partial.loaded_value("owner"), self.admin.pk)
+
+        # สร้างเองพร้อม pk (ไม่ได้โหลดจาก DB) -> ไม่รู้ค่าเดิม ถอยไปอ่านจาก DB
+        detached = Asset(pk=self.asset.pk, owner=None)
+        with self.assertRaises(KeyError):
+            detached.loaded_value("owner")
+        detached.save(update_fields=["owner"])
+        self.assertEqual(AssetAssignmentLog.objects.latest("pk").old_owner, self.admin)
+
+    def test_unchanged_form_writes_nothing(self):
+        self.client.force_login(self.admin)
+        url = reverse("core:asset_update", args=[self.asset.pk])
+        data = {"asset_code": "IT-000001", "category": self.asset.category_id, "status": "IN_USE",
+                "owner": self.alice.pk}
+        with self.assertNumQueries(8):  # session/user + asset + validate ของฟอร์ม ไม่มี UPDATE/audit
+            self.client.post(url, data)
+        self.assertFalse(AuditLog.objects.exists())
+
+        self.client.post(url, {**data, "status": "REPAIR"})
+        self.assertEqual(AuditLog.objects.get().summary, "IT-000001: status")
+
+
+class LoadsimTests(TransactionTestCase):
+    """virtual user ยิงจาก thread ของตัวเอง -> ข้อมูลต้อง commit แล้ว"""
+
+    def setUp(self):
+        for role, group in (("emp", "EMPLOYEE"), ("tech", "IT"), ("boss", "MANAGER")):
+            Group.objects.get_or_create(name=group)[0].user_set.add(User.objects.create_user(role))
+        category = AssetCategory.objects.create(name="Laptop")
+        Asset.objects.create(asset_code="IT-000001", category=category)
+
+    def test_arguments_are_checked(self):
+        with self.assertRaisesMessage(CommandError, "unknown scenarios: nope"):
+            call_command("loadsim", "--only", "nope", stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, "cannot be combined with --url"):
+            call_command("loadsim", "--seed-scale", "0.001", "--url", "http://localhost:8000", stdout=StringIO())
+        User.objects.filter(groups__name="MANAGER").update(is_active=False)
+        with self.assertRaisesMessage(CommandError, "no active users in group MANAGER"):
+            call_command("loadsim", "--only", "dashboard", "--duration", "0", stdout=StringIO())
+
+    def test_tiny_run_in_process(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        path = f"{folder.name}/report.json"
+        out = StringIO()
+        call_command(
+            "loadsim", "--users", "1", "--duration", "0.5", "--only", "create_ticket,ticket_list,start",
+            "--json", path, stdout=out,
+        )
+        report = json.loads(Path(path).read_text())
+        self.assertEqual(report["target"], "wsgi")
+        self.assertEqual(report["errors"], 0, out.getvalue())
+        self.assertGreater(report["scenarios"]["create_ticket"]["count"], 0)
+        self.assertGreater(report["scenarios"]["ticket_list"]["count"], 0)
+        # ยังไม่มี ticket ASSIGNED -> ข้าม ไม่นับเป็น error
+        self.assertEqual(report["scenarios"]["start"]["count"], 0)
+        self.assertEqual(Ticket.objects.count(), report["scenarios"]["create_ticket"]["count"])
+        self.assertIn("actions in", out.getvalue())
+
+
+class BenchRegressionTests(unittest.TestCase):
+    def test_regressions(self):
+        baseline = {
+            "fast": {"p50_ms": 2.0, "queries": 3},
+            "slow": {"p50_ms": 100.0, "queries": 5},
+            "gone": {"p50_ms": 1.0, "queries": 1},
+        }
+        current = {
+            "fast": {"p50_ms": 3.5, "queries": 3},     # +75% แต่ต่างไม่ถึง min_delta_ms
+            "slow": {"p50_ms": 130.0, "queries": 6},   # ช้าลง 30% และ query เพิ่ม
+            "new": {"p50_ms": 50.0, "queries": 9},     # ไม่มีใน baseline
+        }
+        self.assertEqual(
+            regressions(baseline, current, tolerance=0.25, min_delta_ms=2.0),
+            ["slow: p50 100.0ms -> 130.0ms", "slow: queries 5 -> 6"],
+        )
+        self.assertEqual(regressions(baseline, current, tolerance=0.5, min_delta_ms=2.0), ["slow: queries 5 -> 6"])
+
+
+# -----------------------
+# Query budgets: ทุก URL ใน core/urls.py ต้องไม่เกินจำนวน query นี้ ไม่ว่าข้อมูลจะมากแค่ไหน
+# (method, user, url name, url kwargs -> attribute ของ test, POST data(test) หรือ None, budget)
+# ตัวเลขรวม session + user 2 query แล้ว; วัดแบบ production ที่มี shared cache (group/unread อุ่นไว้ก่อนวัด)
+# -----------------------
+QUERY_BUDGETS = [
+    ("get", "it_user", "core:home", {}, None, 2),
+    ("get", "it_user", "core:dashboard", {}, None, 4),
+    ("get", "it_user", "core:my_dashboard", {}, None, 8),
+    ("get", "employee", "core:my_dashboard", {}, None, 8),
+    ("get", "it_user", "core:asset_list", {}, None, 4),
+    ("get", "admin", "core:asset_create", {}, None, 6),
+    ("post", "admin", "core:asset_create", {}, lambda t: {
+        "asset_code": "IT-NEW-1", "category": t.asset.category_id, "status": "IN_USE", "owner": t.employee.pk,
+    }, 13),
+    ("get", "it_user", "core:asset_detail", {"pk": "asset"}, None, 9),
+    ("get", "admin", "core:asset_update", {"pk": "asset"}, None, 7),
+    ("post", "admin", "core:asset_update", {"pk": "asset"}, lambda t: {
+        "asset_code": t.asset.asset_code, "category": t.asset.category_id, "status": "REPAIR", "owner": t.it_user.pk,
+    }, 13),
+    ("get", "it_user", "core:asset_delete", {"pk": "asset"}, None, 4),
+    ("get", "it_user", "core:ticket_list", {}, None, 3),
+    ("get", "employee", "core:ticket_list", {}, None, 3),
+    ("get", "it_user", "core:ticket_create", {}, None, 5),
+    ("post", "employee", "core:ticket_create", {}, lambda t: {
+        "asset": t.asset.pk, "subject": "Fan noise", "description": "loud", "priority": "LOW",
+    }, 23),
+    ("get", "it_user", "core:ticket_import", {}, None, 2),
+    ("post", "it_user", "core:ticket_import", {}, lambda t: {
+        "file": SimpleUploadedFile("t.csv", f"asset_code,subject\n{t.asset.asset_code},Imported\n".encode()),
+    }, 18),
+    ("get", "it_user", "core:ticket_detail", {"pk": "ticket"}, None, 9),
+    ("get", "employee", "core:ticket_detail", {"pk": "ticket"}, None, 9),
+    ("post", "it_user", "core:ticket_detail", {"pk": "ticket"}, lambda t: {
+        "use_part": "1", "part": t.part.pk, "qty": 1,
+    }, 16),
+    ("post", "it_user", "core:ticket_detail", {"pk": "ticket"}, lambda t: {"add_comment": "1", "message": "ok"}, 8),
+    ("get", "it_user", "core:ticket_update", {"pk": "ticket"}, None, 7),
+    ("post", "it_user", "core:ticket_update", {"pk": "ticket"}, lambda t: {
+        "asset": t.asset.pk, "subject": "Screen", "description": "flicker", "priority": "HIGH", "status": "NEW",
+        "sla_hours": 24, "assigned_to": t.it_user.pk, "vendor": t.vendor.pk,
+    }, 18),
+    ("get", "admin", "core:ticket_delete", {"pk": "ticket"}, None, 3),
+    ("post", "it_user", "core:ticket_assign_to_me", {"pk": "ticket"}, None, 8),
+    ("post", "it_user", "core:ticket_start", {"pk": "ticket"}, None, 8),
+    ("post", "it_user", "core:ticket_resolve", {"pk": "ticket"}, None, 12),
+    ("post", "it_user", "core:ticket_close", {"pk": "ticket"}, None, 13),
+    ("get", "it_user", "core:export_assets_csv", {}, None, 6),
+    ("get", "it_user", "core:export_tickets_csv", {}, None, 6),
+    ("get", "it_user", "core:export_parts_csv", {}, None, 7),
+    ("get", "it_user", "core:export_movements_csv", {}, None, 6),
+    ("get", "it_user", "core:export_job_detail", {"pk": "job"}, None, 3),
+    ("get", "it_user", "core:export_job_download", {"pk": "job"}, None, 3),
+    ("get", "admin", "core:metrics", {}, None, 2),
+    ("get", "it_user", "core:part_list", {}, None, 4),
+    ("get", "it_user", "core:part_create", {}, None, 3),
+    ("get", "it_user", "core:part_detail", {"pk": "part"}, None, 7),
+    ("get", "it_user", "core:part_update", {"pk": "part"}, None, 4),
+    ("post", "it_user", "core:part_update", {"pk": "part"}, lambda t: {
+        "name": "RAM 16GB", "sku": t.part.sku, "unit": "pcs", "unit_cost": "10", "low_stock_threshold": 5,
+    }, 6),
+    ("get", "it_user", "core:part_delete", {"pk": "part"}, None, 3),
+    ("get", "it_user", "core:low_stock", {}, None, 4),
+    ("get", "it_user", "core:movement_history", {}, None, 3),
+    ("get", "it_user", "core:stock_report", {}, None, 3),
+    ("get", "it_user", "core:notifications", {}, None, 3),
+    ("get", "employee", "core:notifications", {}, None, 3),
+    ("post", "employee", "core:notification_read", {"pk": "notification"}, None, 7),
+    ("post", "it_user", "core:notification_read_all", {}, None, 14),
+]
+
+
+@override_settings(SHARED_CACHE=True)
+class QueryBudgetTests(TestCase):
+    """วัดแต่ละ URL บนข้อมูลชุดเล็กแล้วชุดใหญ่: ต้องอยู่ใน budget และจำนวน query ต้องไม่โตตามจำนวนแถว (N+1)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        groups = {name: Group.objects.create(name=name) for name in ["ADMIN", "IT", "MANAGER", "EMPLOYEE"]}
+        cls.admin = User.objects.create_superuser("boss", password="x")
+        cls.admin.groups.add(groups["ADMIN"])
+        cls.it_user = User.objects.create_user("tech", password="x")
+        cls.it_user.groups.add(groups["IT"])
+        cls.employee = User.objects.create_user("emp", password="x")
+        cls.employee.groups.add(groups["EMPLOYEE"])
+
+        cls.category = AssetCategory.objects.create(name="Laptop")
+        cls.department = Department.objects.create(name="Finance")
+        cls.location = Location.objects.create(name="HQ", detail="Floor 1")
+        cls.vendor = Vendor.objects.create(name="Acme")
+        cls.asset = Asset.objects.create(
+            asset_code="IT-000001", category=cls.category, department=cls.department, location=cls.location,
+            owner=cls.employee,
+        )
+        cls.ticket = Ticket.objects.create(
+            asset=cls.asset, subject="Screen", description="flicker", requested_by=cls.employee,
+            assigned_to=cls.it_user, vendor=cls.vendor,
+        )
+        cls.part = Part.objects.create(name="RAM 8GB", sku="RAM-8", vendor=cls.vendor)
+        PartStockMovement.objects.create(part=cls.part, movement_type="IN", qty=1000)
+        # ให้ข้อมูลชุดเล็กผ่าน code path เดียวกับชุดใหญ่ (มี low stock / comment / broadcast อย่างละแถว)
+        Part.objects.create(name="Toner", sku="TONER-1", vendor=cls.vendor, low_stock_threshold=5)
+        TicketComment.objects.create(ticket=cls.ticket, message="first", created_by=cls.employee)
+        cls.notification = Notification.objects.create(
+            recipient=cls.employee, ntype=Notification.Type.TICKET_UPDATE, title="hello",
+        )
+        Notification.objects.create(audience="IT", ntype=Notification.Type.TICKET_NEW, title="broadcast")
+        cls.job = ExportJob.objects.create(kind="parts", requested_by=cls.it_user, fingerprint="x")
+
+    def setUp(self):
+        cache.clear()
+        # cache group/unread ผูกกับ user pk ซึ่ง test class ถัดไปใช้ซ้ำ -> ล้างตอนจบด้วย
+        self.addCleanup(cache.clear)
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        # ไฟล์ export ของ self.job สำหรับหน้า download
+        run_job(claim_next_job())
+
+    def grow(self, n=30):
+        """เพิ่มแถวทุกชนิดที่หน้า list/detail แสดง n เท่า"""
+        users = User.objects.bulk_create(User(username=f"bulk{i}") for i in range(n))
+        assets = Asset.objects.bulk_create(
+            Asset(asset_code=f"IT-B{i:05d}", category=self.category, department=self.department,
+                  location=self.location, owner=users[i]) for i in range(n)
+        )
+        due = timezone.now() - timedelta(hours=1)
+        tickets = Ticket.objects.bulk_create(
+            Ticket(ticket_no=no, asset=assets[i], subject=f"bulk {i}", description="-", requested_by=self.employee,
+                   assigned_to=self.it_user, vendor=self.vendor, due_at=due)
+            for i, no in enumerate(Ticket.reserve_ticket_nos(n))
+        )
+        parts = Part.objects.bulk_create(
+            Part(name=f"Part {i}", sku=f"BULK-{i:04d}", vendor=self.vendor, low_stock_threshold=5) for i in range(n)
+        )
+        PartStockBalance.objects.bulk_create(PartStockBalance(part=p, balance=1) for p in parts)
+        PartStockMovement.objects.bulk_create(
+            PartStockMovement(part=parts[i], movement_type="OUT", qty=1, ref_ticket=self.ticket,
+                              created_by=self.it_user) for i in range(n)
+        )
+        TicketComment.objects.bulk_create(
+            TicketComment(ticket=self.ticket, message=f"c{i}", created_by=users[i]) for i in range(n)
+        )
+        Notification.objects.bulk_create(
+            Notification(recipient=u, ntype=Notification.Type.TICKET_UPDATE, title=f"n{i}")
+            for i, u in enumerate([self.employee, self.it_user] * n)
+        )
+        Notification.objects.bulk_create(
+            Notification(audience="IT", ntype=Notification.Type.TICKET_NEW, title=f"b{i}") for i in range(n)
+        )
+        AssetAssignmentLog.objects.bulk_create(
+            AssetAssignmentLog(asset=self.asset, old_owner=users[i], new_owner=users[i - 1], changed_by=self.it_user)
+            for i in range(n)
+        )
+        rebuild_ticket_index()
+        rebuild_asset_index()
+        call_command("rebuild_kpis", stdout=StringIO())
+        return tickets
+
+    def measure(self, method, user_attr, name, kwargs, data):
+        url = reverse(name, kwargs={k: getattr(self, v).pk for k, v in kwargs.items()})
+        self.client.force_login(getattr(self, user_attr))
+        self.client.get(reverse("core:notifications"))  # อุ่น cache group / unread
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as ctx:
+                resp = getattr(self.client, method)(url, data(self) if data else {})
+            transaction.set_rollback(True)  # POST ไม่เปลี่ยนข้อมูลที่ entry ถัดไปใช้
+        self.assertIn(resp.status_code, (200, 302), f"{method} {url}")
+        self.assertFalse(resp.get("Location", "").startswith(reverse("login")), f"{method} {url}")
+        return len(ctx.captured_queries)
+
+    def test_every_url_has_a_budget(self):
+        from .urls import urlpatterns
+
+        budgeted = {name for _, _, name, _, _, _ in QUERY_BUDGETS}
+        self.assertEqual({f"core:{p.name}" for p in urlpatterns} - budgeted, set())
+
+    def test_query_budgets(self):
+        small = [self.measure(*entry[:5]) for entry in QUERY_BUDGETS]
+        self.grow()
+        for entry, before in zip(QUERY_BUDGETS, small):
+            method, user_attr, name, kwargs, data, budget = entry
+            with self.subTest(method=method, user=user_attr, view=name):
+                after = self.measure(method, user_attr, name, kwargs, data)
+                self.assertLessEqual(after, budget)
+                self.assertLessEqual(after, before, "query count grows with row count (N+1)")
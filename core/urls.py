@@ -1,6 +1,5 @@
 from django.urls import path
-from . import views, stock_views, views_my, notifications_views
-from .exports import export_assets_csv, export_tickets_csv, export_parts_csv, export_movements_csv
+from . import views, stock_views, views_my, notifications_views, export_views, import_views, metrics_views
 
 
 app_name = "core"
@@ -19,15 +18,21 @@ urlpatterns = [
     # Ticket
     path("tickets/", views.TicketListView.as_view(), name="ticket_list"),
     path("tickets/new/", views.TicketCreateView.as_view(), name="ticket_create"),
+    path("tickets/import/", import_views.TicketImportView.as_view(), name="ticket_import"),
     path("tickets/<int:pk>/", views.TicketDetailView.as_view(), name="ticket_detail"),
     path("tickets/<int:pk>/edit/", views.TicketUpdateView.as_view(), name="ticket_update"),
     path("tickets/<int:pk>/delete/", views.TicketDeleteView.as_view(), name="ticket_delete"),
     
-    path("export/assets.csv", export_assets_csv, name="export_assets_csv"),
-    path("export/tickets.csv", export_tickets_csv, name="export_tickets_csv"),
+    path("export/assets.csv", export_views.ExportRequestView.as_view(kind="assets"), name="export_assets_csv"),
+    path("export/tickets.csv", export_views.ExportRequestView.as_view(kind="tickets"), name="export_tickets_csv"),
     
-    path("export/parts.csv", export_parts_csv, name="export_parts_csv"),
-    path("export/movements.csv", export_movements_csv, name="export_movements_csv"),
+    path("export/parts.csv", export_views.ExportRequestView.as_view(kind="parts"), name="export_parts_csv"),
+    path("export/movements.csv", export_views.ExportRequestView.as_view(kind="movements"), name="export_movements_csv"),
+
+    path("exports/<int:pk>/", export_views.ExportJobDetailView.as_view(), name="export_job_detail"),
+    path("exports/<int:pk>/download/", export_views.ExportJobDownloadView.as_view(), name="export_job_download"),
+
+    path("metrics", metrics_views.MetricsView.as_view(), name="metrics"),
 ]
 
 urlpatterns += [
@@ -1,6 +1,9 @@
+import logging
+
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib import messages
-from django.db.models import Count, Sum, Q
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
 from django.utils import timezone
@@ -13,8 +16,14 @@ from .permissions import GroupRequiredMixin, is_it, is_manager, can_edit_ticket
 from .forms import AssetForm, TicketForm, TicketAttachmentForm, TicketCommentForm, TicketUsePartForm
 from .models import Asset, Ticket, TicketAttachment, TicketComment, AuditLog, PartStockMovement
 from .sla import get_sla_hours, calc_due_at
-from .notify import notify_it, notify_users, notify_requester
-from .models import Notification
+from .stock import use_part_for_ticket
+from .kpi import dashboard_snapshot, top_assets
+from .pagination import CursorPaginationMixin, EstimatedCountPaginator
+from .search import SEARCH_LIMIT, search_assets, search_tickets
+from .outbox import publish, ticket_data
+from .models import Notification, OutboxEvent
+
+logger = logging.getLogger(__name__)
 
 class HomeRedirectView(View):
     def get(self, request, *args, **kwargs):
@@ -30,18 +39,9 @@ class DashboardView(LoginRequiredMixin, GroupRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        now = timezone.now()
-        active_status = ["NEW", "ASSIGNED", "IN_PROGRESS"]
-
-        ctx["open_tickets"] = Ticket.objects.filter(status__in=active_status).count()
-        ctx["overdue_tickets"] = Ticket.objects.filter(status__in=active_status, due_at__lt=now).count()
-        ctx["assets_total"] = Asset.objects.count()
-        ctx["cost_month"] = Ticket.objects.filter(cost__isnull=False).aggregate(s=Sum("cost"))["s"] or 0
-
-        ctx["top_assets"] = (
-            Asset.objects.annotate(ticket_count=Count("tickets"))
-            .order_by("-ticket_count")[:5]
-        )
+        # อ่านจาก KPI snapshot (core/kpi.py) ที่อัปเดตตาม signal แทน count/sum ทั้งตาราง
+        ctx.update(dashboard_snapshot())
+        ctx["top_assets"] = top_assets(5)
         return ctx
 
 
@@ -53,17 +53,25 @@ class AssetListView(LoginRequiredMixin, ListView):
     template_name = "core/asset_list.html"
     context_object_name = "assets"
     paginate_by = 10
+    paginator_class = EstimatedCountPaginator
 
     def get_queryset(self):
         qs = super().get_queryset().select_related("category", "department", "owner", "location")
         q = self.request.GET.get("q", "").strip()
         status = self.request.GET.get("status", "").strip()
-        if q:
-            qs = qs.filter(asset_code__icontains=q) | qs.filter(serial_number__icontains=q)
         if status:
             qs = qs.filter(status=status)
+        if q:
+            qs = search_assets(qs, q)
         return qs
 
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        # ผลค้นหาถูกตัดที่ SEARCH_LIMIT -> บอกให้ค้นให้แคบลง
+        ctx["search_limit"] = SEARCH_LIMIT
+        ctx["search_capped"] = bool(self.request.GET.get("q", "").strip()) and ctx["paginator"].count >= SEARCH_LIMIT
+        return ctx
+
 
 class AssetDetailView(LoginRequiredMixin, DetailView):
     model = Asset
@@ -107,6 +115,11 @@ class AssetUpdateView(LoginRequiredMixin, GroupRequiredMixin, UpdateView):
 
     def form_valid(self, form):
         obj = form.save(commit=False)
+        changed = obj.changed_fields()
+        if not changed:
+            # ไม่มีอะไรเปลี่ยน: ไม่ save / ไม่เขียน audit
+            messages.info(self.request, "No changes")
+            return redirect("core:asset_detail", pk=obj.pk)
         obj._changed_by = self.request.user
         obj.save()
         form.save_m2m()
@@ -116,7 +129,7 @@ class AssetUpdateView(LoginRequiredMixin, GroupRequiredMixin, UpdateView):
             action="UPDATE_ASSET",
             object_type="Asset",
             object_id=str(self.object.id),
-            summary=f"{self.object.asset_code}",
+            summary=f"{self.object.asset_code}: {', '.join(sorted(changed))}"[:255],
             created_by=self.request.user,
         )
         return redirect("core:asset_detail", pk=self.object.pk)
@@ -132,7 +145,7 @@ class AssetDeleteView(LoginRequiredMixin, GroupRequiredMixin, DeleteView):
 # -----------------------
 # Ticket CRUD
 # -----------------------
-class TicketListView(LoginRequiredMixin, ListView):
+class TicketListView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     model = Ticket
     template_name = "core/ticket_list.html"
     context_object_name = "tickets"
@@ -141,6 +154,8 @@ class TicketListView(LoginRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         ctx["now"] = timezone.now()
+        ctx["search_limit"] = SEARCH_LIMIT
+        ctx["search_capped"] = getattr(self.object_list, "capped", False)
         return ctx
     
     def get_queryset(self):
@@ -161,13 +176,6 @@ class TicketListView(LoginRequiredMixin, ListView):
         mine = (self.request.GET.get("mine") or "").strip()
         overdue = (self.request.GET.get("overdue") or "").strip()
 
-        if q:
-            qs = qs.filter(
-                Q(ticket_no__icontains=q)
-                | Q(subject__icontains=q)
-                | Q(asset__asset_code__icontains=q)
-            )
-
         if status:
             qs = qs.filter(status=status)
 
@@ -178,6 +186,9 @@ class TicketListView(LoginRequiredMixin, ListView):
             now = timezone.now()
             qs = qs.filter(status__in=["NEW", "ASSIGNED", "IN_PROGRESS"], due_at__lt=now)
 
+        # ค้นหาผ่าน search index (core/search.py) หลัง filter อื่นครบแล้ว ผลเรียงตามความเกี่ยวข้อง
+        if q:
+            return search_tickets(qs, q)
         return qs
     
 
@@ -192,6 +203,8 @@ class TicketDetailView(LoginRequiredMixin, DetailView):
         ctx["attach_form"] = TicketAttachmentForm()
         ctx["comment_form"] = TicketCommentForm()
         ctx["use_part_form"] = TicketUsePartForm()
+        # ดึงผู้เขียนมาพร้อม comment (กัน N+1 ต่อ comment)
+        ctx["comments"] = self.object.comments.select_related("created_by")
         ctx["used_parts"] = PartStockMovement.objects.filter(
             ref_ticket=self.object, movement_type="OUT"
         ).select_related("part", "created_by").order_by("-created_at")[:50]
@@ -249,25 +262,18 @@ class TicketDetailView(LoginRequiredMixin, DetailView):
                 note = form.cleaned_data.get("note", "")
 
                 try:
-                    PartStockMovement.objects.create(
-                        part=part,
-                        movement_type="OUT",
-                        qty=qty,
-                        ref_ticket=self.object,
-                        note=note,
-                        created_by=request.user,
-                    )
-                    AuditLog.objects.create(
-                        action="USE_PART_FOR_TICKET",
-                        object_type="Ticket",
-                        object_id=str(self.object.id),
-                        summary=f"{self.object.ticket_no} OUT {part.sku} x{qty}",
-                        created_by=request.user,
-                    )
+                    use_part_for_ticket(self.object, part, qty, user=request.user, note=note)
                     messages.success(request, f"Used {part.sku} x{qty}")
-                except Exception as e:
+                except ValidationError as e:
                     # ถ้า OUT เกิน balance จะโดน ValidationError จาก model
-                    messages.error(request, f"Cannot use part: {e}")
+                    messages.error(request, f"Cannot use part: {' '.join(e.messages)}")
+                except Exception:
+                    # อย่างอื่น (IntegrityError ของ balance row ฯลฯ): atomic ใน use_part_for_ticket rollback แล้ว
+                    # แจ้งผู้ใช้แทนหน้า 500 และเก็บ traceback ไว้ใน log
+                    logger.exception("use part %s x%s for ticket %s failed", part.pk, qty, self.object.pk)
+                    messages.error(
+                        request, "Cannot use part: stock could not be updated, nothing was changed. Please try again."
+                    )
 
             else:
                 messages.error(request, "Invalid part usage form")
@@ -302,22 +308,28 @@ class TicketCreateView(LoginRequiredMixin, CreateView):
         if not obj.due_at:
             obj.due_at = calc_due_at(now, obj.sla_hours)
 
-        obj.save()
-        notify_it(
-            Notification.Type.TICKET_NEW,
-            title=f"New Ticket: {obj.ticket_no}",
-            message=obj.subject,
-            url=f"/tickets/{obj.pk}/",
-        )
-        self.object = obj
-
-        AuditLog.objects.create(
-            action="CREATE_TICKET",
-            object_type="Ticket",
-            object_id=str(self.object.id),
-            summary=self.object.ticket_no,
-            created_by=self.request.user,
-        )
+        # ticket + audit + outbox event commit พร้อมกัน; notification ส่งโดย run_outbox
+        with transaction.atomic():
+            obj.save()
+            publish(
+                OutboxEvent.Topic.TICKET_CREATED,
+                f"ticket:{obj.pk}",
+                ntype=Notification.Type.TICKET_NEW,
+                title=f"New Ticket: {obj.ticket_no}",
+                message=obj.subject,
+                url=f"/tickets/{obj.pk}/",
+                audience="IT",
+                data=ticket_data(obj),
+            )
+            self.object = obj
+
+            AuditLog.objects.create(
+                action="CREATE_TICKET",
+                object_type="Ticket",
+                object_id=str(self.object.id),
+                summary=self.object.ticket_no,
+                created_by=self.request.user,
+            )
         messages.success(self.request, "Ticket created")
         return redirect("core:ticket_detail", pk=self.object.pk)
 
@@ -342,21 +354,21 @@ class TicketUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         return reverse_lazy("core:ticket_detail", kwargs={"pk": self.object.pk})
 
     def form_valid(self, form):
-        res = super().form_valid(form)
-        AuditLog.objects.create(
-            action="UPDATE_TICKET",
-            object_type="Ticket",
-            object_id=str(self.object.id),
-            summary=self.object.ticket_no,
-            created_by=self.request.user,
-        )
-        notify_requester(
-            self.object,
-            Notification.Type.TICKET_UPDATE,
-            title=f"Ticket Updated: {self.object.ticket_no}",
-            message=f"Status: {self.object.status}",
-            url=f"/tickets/{self.object.pk}/",
-        )
+        changed = form.instance.changed_fields()
+        if not changed:
+            messages.info(self.request, "No changes")
+            return redirect(self.get_success_url())
+
+        # แจ้งคนแจ้งผ่าน signals_notifications (outbox) ที่เดียว ไม่แจ้งซ้ำจาก view
+        with transaction.atomic():
+            res = super().form_valid(form)
+            AuditLog.objects.create(
+                action="UPDATE_TICKET",
+                object_type="Ticket",
+                object_id=str(self.object.id),
+                summary=f"{self.object.ticket_no}: {', '.join(sorted(changed))}"[:255],
+                created_by=self.request.user,
+            )
 
         messages.success(self.request, "Ticket updated")
         return res
@@ -379,19 +391,22 @@ class TicketAssignToMeView(TicketActionBase, TemplateView):
     template_name = "core/_noop.html"  # ไม่ต้องมีจริง (จะ redirect)
 
     def post(self, request, *args, **kwargs):
-        t = self.get_ticket(kwargs["pk"])
-        t.assigned_to = request.user
-        if t.status == Ticket.Status.NEW:
-            t.status = Ticket.Status.ASSIGNED
-        t.save(update_fields=["assigned_to", "status", "updated_at"])
+        # ticket + outbox event + KPI + audit ต้อง commit พร้อมกัน
+        with transaction.atomic():
+            t = self.get_ticket(kwargs["pk"])
+            t.assigned_to = request.user
+            if t.status == Ticket.Status.NEW:
+                t.status = Ticket.Status.ASSIGNED
+            t.save(update_fields=["assigned_to", "status", "updated_at"])
+
+            AuditLog.objects.create(
+                action="ASSIGN_TICKET_TO_ME",
+                object_type="Ticket",
+                object_id=str(t.id),
+                summary=t.ticket_no,
+                created_by=request.user,
+            )
 
-        AuditLog.objects.create(
-            action="ASSIGN_TICKET_TO_ME",
-            object_type="Ticket",
-            object_id=str(t.id),
-            summary=t.ticket_no,
-            created_by=request.user,
-        )
         messages.success(request, "Assigned to you")
         return redirect("core:ticket_detail", pk=t.pk)
 
@@ -400,21 +415,23 @@ class TicketStartView(TicketActionBase, TemplateView):
     template_name = "core/_noop.html"
 
     def post(self, request, *args, **kwargs):
-        t = self.get_ticket(kwargs["pk"])
-        if not t.assigned_to:
-            t.assigned_to = request.user
-        t.status = Ticket.Status.IN_PROGRESS
-        if not t.started_at:
-            t.started_at = timezone.now()
-        t.save(update_fields=["assigned_to", "status", "started_at", "updated_at"])
+        with transaction.atomic():
+            t = self.get_ticket(kwargs["pk"])
+            if not t.assigned_to:
+                t.assigned_to = request.user
+            t.status = Ticket.Status.IN_PROGRESS
+            if not t.started_at:
+                t.started_at = timezone.now()
+            t.save(update_fields=["assigned_to", "status", "started_at", "updated_at"])
+
+            AuditLog.objects.create(
+                action="START_TICKET",
+                object_type="Ticket",
+                object_id=str(t.id),
+                summary=t.ticket_no,
+                created_by=request.user,
+            )
 
-        AuditLog.objects.create(
-            action="START_TICKET",
-            object_type="Ticket",
-            object_id=str(t.id),
-            summary=t.ticket_no,
-            created_by=request.user,
-        )
         messages.success(request, "Ticket started")
         return redirect("core:ticket_detail", pk=t.pk)
 
@@ -423,19 +440,21 @@ class TicketResolveView(TicketActionBase, TemplateView):
     template_name = "core/_noop.html"
 
     def post(self, request, *args, **kwargs):
-        t = self.get_ticket(kwargs["pk"])
-        t.status = Ticket.Status.DONE
-        if not t.resolved_at:
-            t.resolved_at = timezone.now()
-        t.save(update_fields=["status", "resolved_at", "updated_at"])
+        with transaction.atomic():
+            t = self.get_ticket(kwargs["pk"])
+            t.status = Ticket.Status.DONE
+            if not t.resolved_at:
+                t.resolved_at = timezone.now()
+            t.save(update_fields=["status", "resolved_at", "updated_at"])
+
+            AuditLog.objects.create(
+                action="RESOLVE_TICKET",
+                object_type="Ticket",
+                object_id=str(t.id),
+                summary=t.ticket_no,
+                created_by=request.user,
+            )
 
-        AuditLog.objects.create(
-            action="RESOLVE_TICKET",
-            object_type="Ticket",
-            object_id=str(t.id),
-            summary=t.ticket_no,
-            created_by=request.user,
-        )
         messages.success(request, "Ticket resolved (DONE)")
         return redirect("core:ticket_detail", pk=t.pk)
 
@@ -444,18 +463,20 @@ class TicketCloseView(TicketActionBase, TemplateView):
     template_name = "core/_noop.html"
 
     def post(self, request, *args, **kwargs):
-        t = self.get_ticket(kwargs["pk"])
-        t.status = Ticket.Status.CLOSED
-        if not t.closed_at:
-            t.closed_at = timezone.now()
-        t.save(update_fields=["status", "closed_at", "updated_at"])
+        with transaction.atomic():
+            t = self.get_ticket(kwargs["pk"])
+            t.status = Ticket.Status.CLOSED
+            if not t.closed_at:
+                t.closed_at = timezone.now()
+            t.save(update_fields=["status", "closed_at", "updated_at"])
+
+            AuditLog.objects.create(
+                action="CLOSE_TICKET",
+                object_type="Ticket",
+                object_id=str(t.id),
+                summary=t.ticket_no,
+                created_by=request.user,
+            )
 
-        AuditLog.objects.create(
-            action="CLOSE_TICKET",
-            object_type="Ticket",
-            object_id=str(t.id),
-            summary=t.ticket_no,
-            created_by=request.user,
-        )
         messages.success(request, "Ticket closed")
         return redirect("core:ticket_detail", pk=t.pk)